@@ -1,9 +1,12 @@
 """Global fixtures for RCT Power integration."""
 
+from collections.abc import AsyncGenerator
 from unittest.mock import patch
 
 import pytest
 
+from tests.simulator import RctPowerSimulator
+
 pytest_plugins = ("pytest_homeassistant_custom_component",)
 
 
@@ -25,13 +28,13 @@ def skip_notifications_fixture():
         yield
 
 
-# This fixture, when used, will result in calls to async_get_data to return None.
+# This fixture, when used, will result in calls to async_get_data to return no data.
 @pytest.fixture(name="bypass_get_data")
 def bypass_get_data_fixture():
     """Skip calls to get data from API."""
     with patch(
         "custom_components.rct_power.RctPowerApiClient.async_get_data",
-        return_value=None,
+        return_value={},
     ):
         yield
 
@@ -46,3 +49,16 @@ def error_get_data_fixture():
         side_effect=Exception,
     ):
         yield
+
+
+# This fixture provides a simulated inverter listening on a random local port, which
+# allows for testing the API client's actual network code.
+@pytest.fixture(name="rct_simulator")
+async def rct_simulator_fixture(
+    socket_enabled: None,
+) -> AsyncGenerator[RctPowerSimulator]:
+    """Run a simulated inverter."""
+    simulator = RctPowerSimulator()
+    await simulator.start()
+    yield simulator
+    await simulator.stop()
@@ -7,17 +7,44 @@ https://github.com/weltenwort/home-assistant-rct-power-integration
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
 from typing import cast
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PORT
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.util.hass_dict import HassEntryKey
 
+from .capabilities import CapabilityMap
+from .change_rates import ChangeRateMap
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_DERIVED_SENSORS,
     CONF_HOSTNAME,
+    CONF_LEARNED_UPDATE_PRIORITIES,
+    CONF_MAX_READ_TIMEOUT,
+    CONF_MAX_VALUE_AGE,
+    CONF_MIN_READ_TIMEOUT,
+    CONF_PASSIVE_LISTENING,
+    CONF_PERSISTENT_CONNECTION,
+    CONF_PUSH_UPDATES,
+    CONF_READ_WINDOW,
+    CONF_RETRY_BUDGET,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_DERIVED_SENSORS,
+    DEFAULT_LEARNED_UPDATE_PRIORITIES,
+    DEFAULT_MAX_READ_TIMEOUT,
+    DEFAULT_MAX_VALUE_AGE,
+    DEFAULT_MIN_READ_TIMEOUT,
+    DEFAULT_PASSIVE_LISTENING,
+    DEFAULT_PERSISTENT_CONNECTION,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_READ_WINDOW,
+    DEFAULT_RETRY_BUDGET,
     DOMAIN,
+    LOGGER,
     PLATFORMS,
     ConfScanInterval,
     EntityUpdatePriority,
@@ -25,8 +52,19 @@ from .const import (
 )
 from .coordinator import RctPowerDataUpdateCoordinator
 from .lib.api import RctPowerApiClient
+from .lib.derived_sensors import (
+    InvalidFormulaError,
+    get_derived_sensor_entity_description,
+    parse_derived_sensors,
+)
 from .lib.entities import all_entity_descriptions
-from .lib.entity import resolve_object_infos
+from .lib.entity import (
+    RctPowerBitfieldSensorEntityDescription,
+    RctPowerEntityDescription,
+    RctPowerSensorEntityDescription,
+    resolve_object_infos,
+)
+from .lib.topology import HardwareTopology, async_discover_hardware_topology
 from .models import RctConfEntryData, RctConfEntryOptions
 
 RCT_DATA_KEY: HassEntryKey[RctData] = HassEntryKey(DOMAIN)
@@ -36,74 +74,163 @@ type RctConfigEntry = ConfigEntry[RctData]
 
 @dataclass
 class RctData:
-    update_coordinators: dict[EntityUpdatePriority, RctPowerDataUpdateCoordinator]
+    update_coordinator: RctPowerDataUpdateCoordinator
+    hardware_topology: HardwareTopology
+    derived_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = field(
+        default_factory=list
+    )
+
 
+def object_ids_for_update_priority(
+    update_priority: EntityUpdatePriority,
+    hardware_topology: HardwareTopology | None = None,
+    learned_update_priorities: Mapping[int, EntityUpdatePriority] | None = None,
+    entity_descriptions: Iterable[RctPowerEntityDescription] = all_entity_descriptions,
+) -> list[int]:
+    """Collect all object_ids for an update_priority.
 
-def object_ids_for_update_priority(update_priority: EntityUpdatePriority) -> list[int]:
-    """Collect all object_ids for an update_priority."""
+    The learned update priorities take precedence over the ones of the entity
+    descriptions unless these are pinned.
+    """
     return list(
         {
             object_info.object_id
-            for entity_description in all_entity_descriptions
-            if entity_description.update_priority == update_priority
+            for entity_description in entity_descriptions
+            if hardware_topology is None
+            or entity_description.is_installed(hardware_topology)
             for object_info in resolve_object_infos(entity_description)
+            if (
+                entity_description.update_priority
+                if entity_description.update_priority_pinned
+                or learned_update_priorities is None
+                else learned_update_priorities.get(
+                    object_info.object_id, entity_description.update_priority
+                )
+            )
+            == update_priority
         }
     )
 
 
+def fixed_interval_object_ids(
+    entity_descriptions: Iterable[RctPowerEntityDescription] = all_entity_descriptions,
+) -> set[int]:
+    """Collect the object_ids that adaptive polling must not read less often.
+
+    These are the objects of pinned entity descriptions and of bitfields, e.g.
+    fault flags, which rarely change but need to be noticed quickly.
+    """
+    return {
+        object_info.object_id
+        for entity_description in entity_descriptions
+        if entity_description.update_priority_pinned
+        or isinstance(entity_description, RctPowerBitfieldSensorEntityDescription)
+        for object_info in resolve_object_infos(entity_description)
+    }
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: RctConfigEntry) -> bool:
     """Set up this integration using UI."""
     data = cast(RctConfEntryData, entry.data)
     options = cast(RctConfEntryOptions, entry.options)
+    push_updates = options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES)
+    passive_listening = options.get(CONF_PASSIVE_LISTENING, DEFAULT_PASSIVE_LISTENING)
 
     client = RctPowerApiClient(
         hostname=data[CONF_HOSTNAME],
         port=data[CONF_PORT],
+        # unrequested objects can only arrive while the connection is open
+        persistent_connection=push_updates
+        or passive_listening
+        or options.get(CONF_PERSISTENT_CONNECTION, DEFAULT_PERSISTENT_CONNECTION),
+        read_window=options.get(CONF_READ_WINDOW, DEFAULT_READ_WINDOW),
+        passive_listening=passive_listening,
+        min_read_timeout=options.get(CONF_MIN_READ_TIMEOUT, DEFAULT_MIN_READ_TIMEOUT),
+        max_read_timeout=options.get(CONF_MAX_READ_TIMEOUT, DEFAULT_MAX_READ_TIMEOUT),
+        retry_budget=options.get(CONF_RETRY_BUDGET, DEFAULT_RETRY_BUDGET),
+        create_background_task=lambda target, name: entry.async_create_background_task(
+            hass, target, name
+        ),
     )
+    entry.async_on_unload(client.close)
 
-    frequent_update_coordinator = RctPowerDataUpdateCoordinator(
-        hass=hass,
-        entry=entry,
-        client=client,
-        name_suffix="frequent",
-        object_ids=object_ids_for_update_priority(EntityUpdatePriority.FREQUENT),
-        update_interval=options.get(
+    try:
+        hardware_topology = await async_discover_hardware_topology(client)
+    except Exception as exc:
+        raise ConfigEntryNotReady(
+            f"Failed to discover the connected hardware: {exc}"
+        ) from exc
+
+    # the serial number identifies the inverter the capabilities and change
+    # rates belong to
+    capabilities: CapabilityMap | None = None
+    change_rates: ChangeRateMap | None = None
+
+    if entry.unique_id is not None:
+        capabilities = CapabilityMap(hass, entry.unique_id)
+        await capabilities.async_load()
+        change_rates = ChangeRateMap(hass, entry.unique_id)
+        await change_rates.async_load()
+
+    try:
+        derived_sensor_entity_descriptions = [
+            get_derived_sensor_entity_description(derived_sensor)
+            for derived_sensor in parse_derived_sensors(
+                options.get(CONF_DERIVED_SENSORS, DEFAULT_DERIVED_SENSORS)
+            )
+        ]
+    except InvalidFormulaError as exc:
+        LOGGER.error("Failed to set up the derived sensors: %s", exc)
+        derived_sensor_entity_descriptions = []
+
+    update_intervals = {
+        EntityUpdatePriority.FREQUENT: options.get(
             ConfScanInterval.FREQUENT, ScanIntervalDefault.FREQUENT
         ),
-    )
-
-    infrequent_update_coordinator = RctPowerDataUpdateCoordinator(
-        hass=hass,
-        entry=entry,
-        client=client,
-        name_suffix="infrequent",
-        object_ids=object_ids_for_update_priority(EntityUpdatePriority.INFREQUENT),
-        update_interval=options.get(
+        EntityUpdatePriority.INFREQUENT: options.get(
             ConfScanInterval.INFREQUENT, ScanIntervalDefault.INFREQUENT
         ),
+        EntityUpdatePriority.STATIC: options.get(
+            ConfScanInterval.STATIC, ScanIntervalDefault.STATIC
+        ),
+    }
+    # the learned update priorities are always proposed in the diagnostics,
+    # but only applied if enabled
+    learned_update_priorities = (
+        change_rates.get_update_priorities(update_intervals)
+        if change_rates is not None
+        and options.get(
+            CONF_LEARNED_UPDATE_PRIORITIES, DEFAULT_LEARNED_UPDATE_PRIORITIES
+        )
+        else None
     )
 
-    static_update_coordinator = RctPowerDataUpdateCoordinator(
+    update_coordinator = RctPowerDataUpdateCoordinator(
         hass=hass,
         entry=entry,
         client=client,
-        name_suffix="static",
-        object_ids=object_ids_for_update_priority(EntityUpdatePriority.STATIC),
-        update_interval=options.get(
-            ConfScanInterval.STATIC, ScanIntervalDefault.STATIC
-        ),
+        object_ids={
+            update_priority: object_ids_for_update_priority(
+                update_priority,
+                hardware_topology,
+                learned_update_priorities,
+                [*all_entity_descriptions, *derived_sensor_entity_descriptions],
+            )
+            for update_priority in EntityUpdatePriority
+        },
+        update_intervals=update_intervals,
+        push_updates=push_updates,
+        capabilities=capabilities,
+        change_rates=change_rates,
+        max_value_age=options.get(CONF_MAX_VALUE_AGE, DEFAULT_MAX_VALUE_AGE),
+        adaptive_polling=options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+        fixed_interval_object_ids=fixed_interval_object_ids(),
     )
 
-    await frequent_update_coordinator.async_config_entry_first_refresh()
-    await infrequent_update_coordinator.async_config_entry_first_refresh()
-    await static_update_coordinator.async_config_entry_first_refresh()
+    await update_coordinator.async_config_entry_first_refresh()
 
     entry.runtime_data = RctData(
-        {
-            EntityUpdatePriority.FREQUENT: frequent_update_coordinator,
-            EntityUpdatePriority.INFREQUENT: infrequent_update_coordinator,
-            EntityUpdatePriority.STATIC: static_update_coordinator,
-        }
+        update_coordinator, hardware_topology, derived_sensor_entity_descriptions
     )
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
@@ -117,6 +244,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: RctConfigEntry) -> bool
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: RctConfigEntry) -> None:
+    """Remove the capabilities and change rates learned for the inverter."""
+    if entry.unique_id is None:
+        return
+
+    await CapabilityMap(hass, entry.unique_id).async_remove()
+    await ChangeRateMap(hass, entry.unique_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: RctConfigEntry) -> None:
     """Reload config entry."""
     await hass.config_entries.async_reload(entry.entry_id)
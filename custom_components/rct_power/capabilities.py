@@ -0,0 +1,169 @@
+"""The objects an inverter supports, as learned by probing them."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from enum import StrEnum
+from typing import TypedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER
+from .lib.api import InvalidApiResponse, RctPowerData, ValidApiResponse
+
+STORAGE_VERSION = 1
+# delay writing the map to disk, so that consecutive classifications are
+# saved together
+STORAGE_SAVE_DELAY = 10  # in seconds
+# the number of reads after which an object that failed to be read is
+# classified
+PROBE_ATTEMPTS = 3
+# the cause of failed reads that means the object isn't implemented
+UNSUPPORTED_OBJECT_CAUSE = "INVALID_COMMAND"
+# the causes of failed reads that lead to an object being probed, unlike e.g.
+# corrupted frames; timeouts alone only make an object flaky, since they might
+# as well be caused by a bad connection
+PROBED_OBJECT_CAUSES = frozenset({UNSUPPORTED_OBJECT_CAUSE, "OBJECT_READ_TIMEOUT"})
+
+
+class ObjectCapability(StrEnum):
+    SUPPORTED = "supported"
+    UNSUPPORTED = "unsupported"
+    # objects that failed to be read, but answered at other times or timed out
+    FLAKY = "flaky"
+
+
+class CapabilityMapData(TypedDict):
+    firmware_version: str | None
+    # the capabilities by the hexadecimal object ids
+    objects: dict[str, str]
+
+
+class CapabilityMap:
+    """Track which objects the inverter answers to and persist the results.
+
+    Objects are classified as they are read. An object answering the first
+    read is supported, while objects that fail to be read are probed for a few
+    reads, during which they are read at every tick. Only objects the inverter
+    rejects at every probe are unsupported. The results are kept per
+    inverter until its firmware changes or the objects are probed again on
+    demand.
+    """
+
+    def __init__(self, hass: HomeAssistant, serial_number: str) -> None:
+        self._store: Store[CapabilityMapData] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.capabilities.{serial_number}"
+        )
+        self._firmware_version: str | None = None
+        self._capabilities: dict[int, ObjectCapability] = {}
+        # the causes of the failed reads of objects being probed, or None for
+        # valid reads
+        self._probes: dict[int, list[str | None]] = {}
+
+    @property
+    def capabilities(self) -> Mapping[int, ObjectCapability]:
+        return self._capabilities
+
+    @property
+    def probing_object_ids(self) -> Iterable[int]:
+        return self._probes.keys()
+
+    def is_unsupported(self, object_id: int) -> bool:
+        return self._capabilities.get(object_id) == ObjectCapability.UNSUPPORTED
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+
+        if data is None:
+            return
+
+        self._firmware_version = data["firmware_version"]
+        self._capabilities = {
+            int(object_id, 16): ObjectCapability(capability)
+            for object_id, capability in data["objects"].items()
+        }
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    def set_firmware_version(self, firmware_version: str) -> None:
+        """Forget the capabilities if the firmware changed since they were probed."""
+        if firmware_version == self._firmware_version:
+            return
+
+        if self._capabilities:
+            LOGGER.info(
+                "Firmware changed from %s to %s, probing all objects again",
+                self._firmware_version,
+                firmware_version,
+            )
+
+        self._firmware_version = firmware_version
+        self._capabilities.clear()
+        self._probes.clear()
+        self._schedule_save()
+
+    def reprobe(self, object_ids: Iterable[int]) -> None:
+        """Classify the given objects again the next time they are read."""
+        for object_id in object_ids:
+            if self._capabilities.pop(object_id, None) is not None:
+                self._schedule_save()
+            self._probes.pop(object_id, None)
+
+    def observe(self, data: RctPowerData) -> None:
+        """Classify the objects that aren't classified yet by their responses."""
+        changed = False
+
+        for object_id, response in data.items():
+            if isinstance(response, ValidApiResponse):
+                cause = None
+            elif (
+                isinstance(response, InvalidApiResponse)
+                and response.cause in PROBED_OBJECT_CAUSES
+            ):
+                cause = response.cause
+            else:
+                continue
+
+            capability = self._capabilities.get(object_id)
+
+            if capability is ObjectCapability.UNSUPPORTED and cause is None:
+                # e.g. pushed or harvested after all
+                self._capabilities[object_id] = ObjectCapability.FLAKY
+                changed = True
+                continue
+
+            if capability is not None:
+                continue
+
+            causes = self._probes.setdefault(object_id, [])
+            causes.append(cause)
+
+            if all(probe_cause is None for probe_cause in causes):
+                capability = ObjectCapability.SUPPORTED
+            elif len(causes) < PROBE_ATTEMPTS:
+                continue
+            elif all(probe_cause == UNSUPPORTED_OBJECT_CAUSE for probe_cause in causes):
+                capability = ObjectCapability.UNSUPPORTED
+            else:
+                capability = ObjectCapability.FLAKY
+
+            del self._probes[object_id]
+            self._capabilities[object_id] = capability
+            changed = True
+
+        if changed:
+            self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._get_data_to_save, STORAGE_SAVE_DELAY)
+
+    def _get_data_to_save(self) -> CapabilityMapData:
+        return {
+            "firmware_version": self._firmware_version,
+            "objects": {
+                f"{object_id:08X}": capability.value
+                for object_id, capability in sorted(self._capabilities.items())
+            },
+        }
@@ -0,0 +1,119 @@
+"""Test the classification and persistence of the inverter's capabilities."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+
+from custom_components.rct_power.capabilities import (
+    PROBE_ATTEMPTS,
+    CapabilityMap,
+    ObjectCapability,
+)
+from custom_components.rct_power.lib.api import (
+    ApiResponse,
+    InvalidApiResponse,
+    ValidApiResponse,
+)
+
+SUPPORTED_OID = 0x1
+UNSUPPORTED_OID = 0x2
+FLAKY_OID = 0x3
+TIMING_OUT_OID = 0x4
+
+
+def create_response(
+    object_id: int, is_valid: bool, cause: str = "INVALID_COMMAND"
+) -> ApiResponse:
+    if is_valid:
+        return ValidApiResponse(object_id=object_id, time=datetime.now(), value=0)
+    return InvalidApiResponse(object_id=object_id, time=datetime.now(), cause=cause)
+
+
+async def save_capabilities(hass: HomeAssistant) -> None:
+    """Write the delayed saves like Home Assistant does when stopping."""
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+
+async def test_classifies_objects_by_their_responses(hass: HomeAssistant) -> None:
+    """Test that failing objects are probed before they are classified."""
+    capabilities = CapabilityMap(hass, "SERIAL")
+    await capabilities.async_load()
+
+    for attempt in range(PROBE_ATTEMPTS):
+        capabilities.observe(
+            {
+                SUPPORTED_OID: create_response(SUPPORTED_OID, True),
+                UNSUPPORTED_OID: create_response(UNSUPPORTED_OID, False),
+                FLAKY_OID: create_response(FLAKY_OID, attempt > 0),
+                TIMING_OUT_OID: create_response(
+                    TIMING_OUT_OID, False, "OBJECT_READ_TIMEOUT"
+                ),
+            }
+        )
+
+        if attempt < PROBE_ATTEMPTS - 1:
+            assert set(capabilities.probing_object_ids) == {
+                UNSUPPORTED_OID,
+                FLAKY_OID,
+                TIMING_OUT_OID,
+            }
+
+    assert capabilities.capabilities == {
+        SUPPORTED_OID: ObjectCapability.SUPPORTED,
+        UNSUPPORTED_OID: ObjectCapability.UNSUPPORTED,
+        FLAKY_OID: ObjectCapability.FLAKY,
+        # e.g. due to a bad connection, so the object is still polled
+        TIMING_OUT_OID: ObjectCapability.FLAKY,
+    }
+    assert list(capabilities.probing_object_ids) == []
+    assert capabilities.is_unsupported(UNSUPPORTED_OID)
+    assert not capabilities.is_unsupported(TIMING_OUT_OID)
+
+
+async def test_persists_capabilities_per_firmware_version(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that the capabilities are kept until the firmware changes."""
+    capabilities = CapabilityMap(hass, "SERIAL")
+    await capabilities.async_load()
+    capabilities.set_firmware_version("1.0")
+
+    for _attempt in range(PROBE_ATTEMPTS):
+        capabilities.observe({UNSUPPORTED_OID: create_response(UNSUPPORTED_OID, False)})
+    await save_capabilities(hass)
+
+    assert hass_storage["rct_power.capabilities.SERIAL"]["data"] == {
+        "firmware_version": "1.0",
+        "objects": {"00000002": "unsupported"},
+    }
+
+    loaded_capabilities = CapabilityMap(hass, "SERIAL")
+    await loaded_capabilities.async_load()
+    loaded_capabilities.set_firmware_version("1.0")
+
+    assert loaded_capabilities.is_unsupported(UNSUPPORTED_OID)
+
+    loaded_capabilities.set_firmware_version("2.0")
+
+    assert not loaded_capabilities.is_unsupported(UNSUPPORTED_OID)
+
+
+async def test_reprobes_objects_on_demand(hass: HomeAssistant) -> None:
+    """Test that reprobed objects are classified again."""
+    capabilities = CapabilityMap(hass, "SERIAL")
+    await capabilities.async_load()
+
+    for _attempt in range(PROBE_ATTEMPTS):
+        capabilities.observe({UNSUPPORTED_OID: create_response(UNSUPPORTED_OID, False)})
+    capabilities.reprobe([UNSUPPORTED_OID])
+
+    assert not capabilities.is_unsupported(UNSUPPORTED_OID)
+
+    capabilities.observe({UNSUPPORTED_OID: create_response(UNSUPPORTED_OID, True)})
+
+    assert capabilities.capabilities == {UNSUPPORTED_OID: ObjectCapability.SUPPORTED}
@@ -0,0 +1,199 @@
+"""The rates at which the values of the objects change, as learned by polling them."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TypedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, EntityUpdatePriority
+from .lib.api import RctPowerData, ValidApiResponse
+
+STORAGE_VERSION = 1
+# the statistics change with every read, so they are written at most once in
+# this period after they changed
+STORAGE_SAVE_DELAY = 600  # in seconds
+# objects need to be observed this long, e.g. across a day and a night,
+# before an update priority is proposed for them
+MIN_OBSERVATION_PERIOD = 24 * 60 * 60  # in seconds
+# the statistics are halved once they span this period, so that more recent
+# observations weigh more
+MAX_OBSERVATION_PERIOD = 7 * 24 * 60 * 60  # in seconds
+# objects whose value changed at this fraction of their reads might change
+# more often than they are read, so they are proposed a more urgent priority
+PROMOTION_CHANGE_RATIO = 0.5
+
+
+class ObjectChangeRateData(TypedDict):
+    reads: float
+    changes: float
+    observed_seconds: float
+    # the name of the update priority the object was read with
+    update_priority: str
+
+
+class ChangeRateMapData(TypedDict):
+    # the statistics by the hexadecimal object ids
+    objects: dict[str, ObjectChangeRateData]
+
+
+@dataclass(slots=True)
+class ObjectChangeRate:
+    reads: float = 0
+    changes: float = 0
+    observed_seconds: float = 0
+    update_priority: EntityUpdatePriority = EntityUpdatePriority.FREQUENT
+
+
+class ChangeRateMap:
+    """Track how often the values of the objects change and persist the results.
+
+    Each read of a valid value following another one counts towards the
+    statistics of the object. Once an object was observed for long enough, the
+    least urgent update priority whose interval doesn't exceed the mean time
+    between the changes of its value is proposed for it. Objects whose value
+    changes at most of their reads are proposed a more urgent priority than
+    they are read with, since they might change more often than that.
+    """
+
+    def __init__(self, hass: HomeAssistant, serial_number: str) -> None:
+        self._store: Store[ChangeRateMapData] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.change_rates.{serial_number}"
+        )
+        self._change_rates: dict[int, ObjectChangeRate] = {}
+        # delaying the pending save again at every read would postpone it
+        # forever
+        self._save_pending = False
+
+    @property
+    def change_rates(self) -> Mapping[int, ObjectChangeRate]:
+        return self._change_rates
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+
+        if data is None:
+            return
+
+        self._change_rates = {
+            int(object_id, 16): ObjectChangeRate(
+                reads=change_rate["reads"],
+                changes=change_rate["changes"],
+                observed_seconds=change_rate["observed_seconds"],
+                update_priority=EntityUpdatePriority[change_rate["update_priority"]],
+            )
+            for object_id, change_rate in data["objects"].items()
+        }
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    def observe(
+        self,
+        latest_data: RctPowerData,
+        data: RctPowerData,
+        object_priorities: Mapping[int, EntityUpdatePriority],
+    ) -> None:
+        """Count the reads and changes of the objects since their latest responses."""
+        changed = False
+
+        for object_id, response in data.items():
+            latest_response = latest_data.get(object_id)
+
+            if (
+                not isinstance(response, ValidApiResponse)
+                or not isinstance(latest_response, ValidApiResponse)
+                # harvested responses are returned until they are polled again
+                or response.monotonic_time <= latest_response.monotonic_time
+            ):
+                continue
+
+            change_rate = self._change_rates.setdefault(object_id, ObjectChangeRate())
+            change_rate.reads += 1
+            change_rate.observed_seconds += (
+                response.monotonic_time - latest_response.monotonic_time
+            )
+            change_rate.update_priority = object_priorities.get(
+                object_id, change_rate.update_priority
+            )
+
+            if response.value != latest_response.value:
+                change_rate.changes += 1
+
+            if change_rate.observed_seconds > MAX_OBSERVATION_PERIOD:
+                change_rate.reads /= 2
+                change_rate.changes /= 2
+                change_rate.observed_seconds /= 2
+
+            changed = True
+
+        if changed and not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._get_data_to_save, STORAGE_SAVE_DELAY)
+
+    def get_update_priority(
+        self,
+        object_id: int,
+        update_intervals: Mapping[EntityUpdatePriority, int],
+    ) -> EntityUpdatePriority | None:
+        """Propose an update priority for an object if it was observed long enough."""
+        change_rate = self._change_rates.get(object_id)
+
+        if change_rate is None or change_rate.observed_seconds < MIN_OBSERVATION_PERIOD:
+            return None
+
+        mean_change_interval = (
+            change_rate.observed_seconds / change_rate.changes
+            if change_rate.changes
+            else float("inf")
+        )
+        # the priorities from the most to the least urgent one
+        update_priorities = sorted(
+            update_intervals, key=lambda update_priority: update_priority.value
+        )
+        update_priority = update_priorities[0]
+
+        for candidate in update_priorities:
+            if update_intervals[candidate] <= mean_change_interval:
+                update_priority = candidate
+
+        if change_rate.changes >= change_rate.reads * PROMOTION_CHANGE_RATIO:
+            current_index = update_priorities.index(change_rate.update_priority)
+            update_priority = min(
+                update_priority,
+                update_priorities[max(current_index - 1, 0)],
+                key=lambda update_priority: update_priority.value,
+            )
+
+        return update_priority
+
+    def get_update_priorities(
+        self, update_intervals: Mapping[EntityUpdatePriority, int]
+    ) -> dict[int, EntityUpdatePriority]:
+        """Propose update priorities for all objects observed long enough."""
+        return {
+            object_id: update_priority
+            for object_id in self._change_rates
+            if (
+                update_priority := self.get_update_priority(object_id, update_intervals)
+            )
+            is not None
+        }
+
+    def _get_data_to_save(self) -> ChangeRateMapData:
+        self._save_pending = False
+
+        return {
+            "objects": {
+                f"{object_id:08X}": {
+                    "reads": change_rate.reads,
+                    "changes": change_rate.changes,
+                    "observed_seconds": change_rate.observed_seconds,
+                    "update_priority": change_rate.update_priority.name,
+                }
+                for object_id, change_rate in sorted(self._change_rates.items())
+            },
+        }
@@ -0,0 +1,134 @@
+"""Test the learning and persistence of the change rates of the objects."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rct_power.change_rates import (
+    STORAGE_SAVE_DELAY,
+    ChangeRateMap,
+)
+from custom_components.rct_power.const import EntityUpdatePriority
+from custom_components.rct_power.lib.api import RctPowerData, ValidApiResponse
+
+CHANGING_OID = 0x1
+CONSTANT_OID = 0x2
+SLOW_OID = 0x3
+
+UPDATE_INTERVALS = {
+    EntityUpdatePriority.FREQUENT: 30,
+    EntityUpdatePriority.INFREQUENT: 180,
+    EntityUpdatePriority.STATIC: 3600,
+}
+
+
+def observe_hourly_reads(
+    change_rates: ChangeRateMap,
+    hours: int,
+    object_priorities: dict[int, EntityUpdatePriority],
+) -> None:
+    """Read the objects once per hour, the slow one changing every ten hours."""
+    start_time = datetime(2024, 1, 1)
+    latest_data: RctPowerData = {}
+
+    for hour in range(hours):
+        time = start_time + timedelta(hours=hour)
+        monotonic_time = hour * 60 * 60.0
+        data: RctPowerData = {
+            CHANGING_OID: ValidApiResponse(
+                object_id=CHANGING_OID,
+                time=time,
+                monotonic_time=monotonic_time,
+                value=float(hour),
+            ),
+            CONSTANT_OID: ValidApiResponse(
+                object_id=CONSTANT_OID,
+                time=time,
+                monotonic_time=monotonic_time,
+                value=1.0,
+            ),
+            SLOW_OID: ValidApiResponse(
+                object_id=SLOW_OID,
+                time=time,
+                monotonic_time=monotonic_time,
+                value=float(hour // 10),
+            ),
+        }
+        change_rates.observe(latest_data, data, object_priorities)
+        latest_data = data
+
+
+async def test_proposes_update_priorities_from_change_rates(
+    hass: HomeAssistant,
+) -> None:
+    """Test that the priorities follow how often the values change."""
+    change_rates = ChangeRateMap(hass, "SERIAL")
+    await change_rates.async_load()
+    object_priorities = {
+        CHANGING_OID: EntityUpdatePriority.STATIC,
+        CONSTANT_OID: EntityUpdatePriority.FREQUENT,
+        SLOW_OID: EntityUpdatePriority.FREQUENT,
+    }
+
+    observe_hourly_reads(change_rates, 12, object_priorities)
+
+    # not observed long enough
+    assert change_rates.get_update_priorities(UPDATE_INTERVALS) == {}
+
+    observe_hourly_reads(change_rates, 48, object_priorities)
+
+    assert change_rates.get_update_priorities(UPDATE_INTERVALS) == {
+        # changes at every read, so it might change more often than read
+        CHANGING_OID: EntityUpdatePriority.INFREQUENT,
+        CONSTANT_OID: EntityUpdatePriority.STATIC,
+        SLOW_OID: EntityUpdatePriority.STATIC,
+    }
+
+
+async def test_persists_change_rates(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that the change rates are kept across restarts."""
+    change_rates = ChangeRateMap(hass, "SERIAL")
+    await change_rates.async_load()
+    object_priorities = {CONSTANT_OID: EntityUpdatePriority.FREQUENT}
+
+    observe_hourly_reads(change_rates, 3, object_priorities)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    assert hass_storage["rct_power.change_rates.SERIAL"]["data"]["objects"][
+        "00000002"
+    ] == {
+        "reads": 2,
+        "changes": 0,
+        "observed_seconds": 7200,
+        "update_priority": "FREQUENT",
+    }
+
+    loaded_change_rates = ChangeRateMap(hass, "SERIAL")
+    await loaded_change_rates.async_load()
+
+    assert loaded_change_rates.change_rates == change_rates.change_rates
+
+
+async def test_saves_change_rates_while_observing(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that continued reads don't postpone saving the change rates."""
+    change_rates = ChangeRateMap(hass, "SERIAL")
+    await change_rates.async_load()
+    object_priorities = {CONSTANT_OID: EntityUpdatePriority.FREQUENT}
+
+    for minutes in range(0, STORAGE_SAVE_DELAY // 60 + 1, 5):
+        observe_hourly_reads(change_rates, 3, object_priorities)
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=minutes))
+        await hass.async_block_till_done()
+
+    assert "rct_power.change_rates.SERIAL" in hass_storage
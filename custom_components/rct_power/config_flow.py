@@ -10,17 +10,44 @@ from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntry, ConfigFlowResult
 from homeassistant.const import CONF_PORT
 from homeassistant.core import callback
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_DERIVED_SENSORS,
     CONF_ENTITY_PREFIX,
     CONF_HOSTNAME,
+    CONF_LEARNED_UPDATE_PRIORITIES,
+    CONF_MAX_READ_TIMEOUT,
+    CONF_MAX_VALUE_AGE,
+    CONF_MIN_READ_TIMEOUT,
+    CONF_PASSIVE_LISTENING,
+    CONF_PERSISTENT_CONNECTION,
+    CONF_PUSH_UPDATES,
+    CONF_READ_WINDOW,
+    CONF_RETRY_BUDGET,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_DERIVED_SENSORS,
     DEFAULT_ENTITY_PREFIX,
+    DEFAULT_LEARNED_UPDATE_PRIORITIES,
+    DEFAULT_MAX_READ_TIMEOUT,
+    DEFAULT_MAX_VALUE_AGE,
+    DEFAULT_MIN_READ_TIMEOUT,
+    DEFAULT_PASSIVE_LISTENING,
+    DEFAULT_PERSISTENT_CONNECTION,
     DEFAULT_PORT,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_READ_WINDOW,
+    DEFAULT_RETRY_BUDGET,
     DOMAIN,
+    MAX_READ_TIMEOUT,
+    MAX_READ_WINDOW,
+    MAX_RETRY_BUDGET,
     ConfScanInterval,
     ScanIntervalDefault,
 )
 from .lib.api import RctPowerApiClient
+from .lib.derived_sensors import InvalidFormulaError, parse_derived_sensors
 
 
 class RctPowerFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -85,14 +112,33 @@ class RctPowerOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
+        errors: dict[str, str] = {}
+        description_placeholders: dict[str, str] = {}
+
         if user_input is not None:
-            return self.async_create_entry(data=user_input)
+            if user_input.get(
+                CONF_MIN_READ_TIMEOUT, DEFAULT_MIN_READ_TIMEOUT
+            ) > user_input.get(CONF_MAX_READ_TIMEOUT, DEFAULT_MAX_READ_TIMEOUT):
+                errors[CONF_MAX_READ_TIMEOUT] = "max_read_timeout_below_min"
+
+            try:
+                parse_derived_sensors(
+                    user_input.get(CONF_DERIVED_SENSORS, DEFAULT_DERIVED_SENSORS)
+                )
+            except InvalidFormulaError as exc:
+                errors[CONF_DERIVED_SENSORS] = "invalid_derived_sensors"
+                description_placeholders["error"] = str(exc)
+
+            if not errors:
+                return self.async_create_entry(data=user_input)
 
         return self.async_show_form(
             step_id="user",
             data_schema=self.add_suggested_values_to_schema(
-                OPTIONS_SCHEMA, self.config_entry.options
+                OPTIONS_SCHEMA, user_input or self.config_entry.options
             ),
+            errors=errors,
+            description_placeholders=description_placeholders,
         )
 
 
@@ -116,5 +162,36 @@ OPTIONS_SCHEMA = vol.Schema(
         vol.Optional(
             ConfScanInterval.STATIC.value, default=ScanIntervalDefault.STATIC
         ): cv.positive_int,
+        vol.Optional(
+            CONF_PERSISTENT_CONNECTION, default=DEFAULT_PERSISTENT_CONNECTION
+        ): cv.boolean,
+        vol.Optional(CONF_READ_WINDOW, default=DEFAULT_READ_WINDOW): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_READ_WINDOW)
+        ),
+        vol.Optional(CONF_PUSH_UPDATES, default=DEFAULT_PUSH_UPDATES): cv.boolean,
+        vol.Optional(
+            CONF_PASSIVE_LISTENING, default=DEFAULT_PASSIVE_LISTENING
+        ): cv.boolean,
+        vol.Optional(CONF_MIN_READ_TIMEOUT, default=DEFAULT_MIN_READ_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0.01, max=MAX_READ_TIMEOUT)
+        ),
+        vol.Optional(CONF_MAX_READ_TIMEOUT, default=DEFAULT_MAX_READ_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0.01, max=MAX_READ_TIMEOUT)
+        ),
+        vol.Optional(CONF_RETRY_BUDGET, default=DEFAULT_RETRY_BUDGET): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=MAX_RETRY_BUDGET)
+        ),
+        vol.Optional(CONF_MAX_VALUE_AGE, default=DEFAULT_MAX_VALUE_AGE): vol.All(
+            vol.Coerce(int), vol.Range(min=0)
+        ),
+        vol.Optional(
+            CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING
+        ): cv.boolean,
+        vol.Optional(
+            CONF_LEARNED_UPDATE_PRIORITIES, default=DEFAULT_LEARNED_UPDATE_PRIORITIES
+        ): cv.boolean,
+        vol.Optional(
+            CONF_DERIVED_SENSORS, default=DEFAULT_DERIVED_SENSORS
+        ): TextSelector(TextSelectorConfig(multiline=True)),
     }
 )
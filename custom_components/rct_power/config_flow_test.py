@@ -0,0 +1,54 @@
+"""Test the options flow of RCT Power."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.rct_power.const import (
+    CONF_DERIVED_SENSORS,
+    CONF_MAX_READ_TIMEOUT,
+    CONF_MIN_READ_TIMEOUT,
+    DOMAIN,
+)
+
+
+async def test_rejects_inverted_read_timeouts(hass: HomeAssistant) -> None:
+    """Test that the minimum read timeout can't exceed the maximum."""
+    config_entry = MockConfigEntry(domain=DOMAIN)
+    config_entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_MIN_READ_TIMEOUT: 5.0, CONF_MAX_READ_TIMEOUT: 1.0},
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_MAX_READ_TIMEOUT: "max_read_timeout_below_min"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_MIN_READ_TIMEOUT: 1.0, CONF_MAX_READ_TIMEOUT: 5.0},
+    )
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert config_entry.options[CONF_MAX_READ_TIMEOUT] == 5.0
+
+
+async def test_rejects_colliding_derived_sensor_names(hass: HomeAssistant) -> None:
+    """Test that derived sensors whose ids would collide can't be saved."""
+    config_entry = MockConfigEntry(domain=DOMAIN)
+    config_entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_DERIVED_SENSORS: "PV Total = {battery.soc}\npv-total = {battery.soc}"
+        },
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_DERIVED_SENSORS: "invalid_derived_sensors"}
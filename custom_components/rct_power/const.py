@@ -26,9 +26,34 @@ class EntityUpdatePriority(Enum):
 # Configuration, options, defaults
 CONF_ENTITY_PREFIX: Final = "entity_prefix"
 CONF_HOSTNAME: Final = "hostname"
+CONF_PERSISTENT_CONNECTION: Final = "persistent_connection"
+CONF_READ_WINDOW: Final = "read_window"
+CONF_PUSH_UPDATES: Final = "push_updates"
+CONF_PASSIVE_LISTENING: Final = "passive_listening"
+CONF_MIN_READ_TIMEOUT: Final = "min_read_timeout"
+CONF_MAX_READ_TIMEOUT: Final = "max_read_timeout"
+CONF_RETRY_BUDGET: Final = "retry_budget"
+CONF_MAX_VALUE_AGE: Final = "max_value_age"
+CONF_ADAPTIVE_POLLING: Final = "adaptive_polling"
+CONF_LEARNED_UPDATE_PRIORITIES: Final = "learned_update_priorities"
+CONF_DERIVED_SENSORS: Final = "derived_sensors"
 
 DEFAULT_ENTITY_PREFIX: Final = "RCT Power Storage"
 DEFAULT_PORT: Final = 8899
+DEFAULT_PERSISTENT_CONNECTION: Final = False
+DEFAULT_READ_WINDOW: Final = 1
+MAX_READ_WINDOW: Final = 32
+DEFAULT_PUSH_UPDATES: Final = False
+DEFAULT_PASSIVE_LISTENING: Final = False
+DEFAULT_MIN_READ_TIMEOUT: Final = 0.2  # in seconds
+DEFAULT_MAX_READ_TIMEOUT: Final = 5.0  # in seconds
+MAX_READ_TIMEOUT: Final = 60.0  # in seconds
+DEFAULT_RETRY_BUDGET: Final = 2.0  # in seconds
+MAX_RETRY_BUDGET: Final = 60.0  # in seconds
+DEFAULT_MAX_VALUE_AGE: Final = 300  # in seconds
+DEFAULT_ADAPTIVE_POLLING: Final = False
+DEFAULT_LEARNED_UPDATE_PRIORITIES: Final = False
+DEFAULT_DERIVED_SENSORS: Final = ""
 
 
 class ConfScanInterval(StrEnum):
@@ -1,12 +1,28 @@
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+import math
+import time
+from collections.abc import Collection, Iterable, Mapping
+from datetime import datetime, timedelta
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+)
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, LOGGER
+from .capabilities import CapabilityMap
+from .change_rates import ChangeRateMap
+from .const import DEFAULT_MAX_VALUE_AGE, DOMAIN, LOGGER, EntityUpdatePriority
 from .lib.api import (
     ApiResponseValue,
     InvalidApiResponse,
@@ -14,10 +30,76 @@ from .lib.api import (
     RctPowerData,
     ValidApiResponse,
 )
+from .lib.object_index import OBJECT_INDEX
+
+# collect pushed values for this long before notifying the entities
+PUSH_DEBOUNCE_DELAY = 1  # in seconds
+# objects that arrived unrequested within this fraction of the update interval
+# aren't polled again
+HARVESTED_RESPONSE_MAX_AGE_FACTOR = 0.5
+# objects due within this fraction of the update interval after a tick are
+# read a little early instead of almost one update interval late
+DUE_TIME_TOLERANCE_FACTOR = 0.5
+# the cause of the failed responses of objects whose background read failed
+# as a whole
+BACKGROUND_READ_FAILED_CAUSE = "READ_FAILED"
+# the object whose changes indicate a firmware update
+FIRMWARE_VERSION_OID = OBJECT_INDEX.get_object_id("svnversion")
+# with adaptive polling, the interval of an object doubles with every read
+# that returns a stable value up to this factor, but not beyond the maximum
+# interval, so e.g. static objects aren't stretched to several hours
+MAX_ADAPTIVE_INTERVAL_FACTOR = 8
+MAX_ADAPTIVE_INTERVAL = 60 * 60  # in seconds
+# numeric values within the relative and absolute tolerances of the unit of
+# their object are considered stable, while the values of other units, e.g.
+# fractions like the state of charge, only need to be within a relative one
+DEFAULT_STABLE_VALUE_TOLERANCE = (0.01, 0.0)
+STABLE_VALUE_TOLERANCES: dict[str, tuple[float, float]] = {
+    "A": (0.01, 0.05),
+    "Hz": (0.0, 0.01),
+    "V": (0.01, 0.5),
+    "W": (0.01, 1.0),
+}
+# the values of the solar generators start moving when the sun rises
+SUN_ENTITY_ID = "sun.sun"
+SUN_STATE_ABOVE_HORIZON = "above_horizon"
 
 
 class RctPowerDataUpdateCoordinator(DataUpdateCoordinator[RctPowerData]):
-    """Class to manage fetching data from the rct power inverter API."""
+    """Class to manage fetching data from the rct power inverter API.
+
+    All objects are polled by a single coordinator, each one at the interval
+    of its update priority. The coordinator ticks at the shortest of these
+    intervals and reads all objects due at a tick, so the priorities don't
+    compete for the connection. The objects of the longer intervals are spread
+    across the ticks instead of being read all at once.
+
+    Only the frequently updated objects are read as part of the refresh. The
+    other objects are read in the background afterwards with a lower priority,
+    which means that the next refresh preempts them if they are slow to read.
+
+    Only the objects of the entities listening to the coordinator are polled
+    after the first refresh, so disabled entities don't cost any reads.
+
+    Objects the inverter doesn't support according to the capability map
+    aren't read at all, while objects being probed are read at every tick.
+
+    Failed reads don't replace the last valid response of an object until it
+    becomes stale, i.e. older than the object's interval plus the maximum
+    value age, so transient errors don't make entities flap.
+
+    Listeners registered with a set of object ids as their context are only
+    notified if the response of one of these objects changed.
+
+    The change rates of the objects are recorded to propose update priorities
+    that match how often their values actually change.
+
+    With adaptive polling, the interval of objects whose values are stable,
+    e.g. the solar generators at night, grows with every read. It returns to
+    the configured interval as soon as the value changes or the sun rises.
+    Objects with fixed intervals, e.g. fault flags, are always read at their
+    configured interval.
+    """
 
     config_entry: ConfigEntry
 
@@ -27,19 +109,70 @@ class RctPowerDataUpdateCoordinator(DataUpdateCoordinator[RctPowerData]):
         entry: ConfigEntry,
         *,
         client: RctPowerApiClient,
-        name_suffix: str,
-        object_ids: list[int],
-        update_interval: int,  # in seconds
+        object_ids: Mapping[EntityUpdatePriority, list[int]],
+        update_intervals: Mapping[EntityUpdatePriority, int],  # in seconds
+        push_updates: bool = False,
+        capabilities: CapabilityMap | None = None,
+        change_rates: ChangeRateMap | None = None,
+        max_value_age: float = DEFAULT_MAX_VALUE_AGE,  # in seconds
+        adaptive_polling: bool = False,
+        fixed_interval_object_ids: Collection[int] = frozenset(),
     ) -> None:
         self.client = client
-        self.object_ids = object_ids
+        self.capabilities = capabilities
+        self.change_rates = change_rates
+        self.max_value_age = max_value_age
+        self.adaptive_polling = adaptive_polling
+        self.fixed_interval_object_ids = frozenset(fixed_interval_object_ids)
+        self.push_updates = push_updates
+        self.update_intervals = update_intervals
+        self.object_intervals = _get_object_intervals(object_ids, update_intervals)
+        self.object_priorities = _get_object_priorities(object_ids)
+        # the objects ordered by their interval, so the frequently updated
+        # ones are read first at each tick
+        self.object_ids = sorted(
+            self.object_intervals,
+            key=lambda object_id: self.object_intervals[object_id],
+        )
+        self.pushed_object_ids = object_ids.get(EntityUpdatePriority.FREQUENT, [])
+
+        tick_interval = min(self.object_intervals.values(), default=60.0)
         super().__init__(
             hass=hass,
             config_entry=entry,
             logger=LOGGER,
-            name=f"{DOMAIN} {entry.unique_id} {name_suffix}",
-            update_interval=timedelta(seconds=update_interval),
+            name=f"{DOMAIN} {entry.unique_id}",
+            update_interval=timedelta(seconds=tick_interval),
+        )
+
+        # the monotonic times at which the objects need to be read again,
+        # objects without one are read at the next tick
+        self._due_times: dict[int, float] = {}
+        self._due_time_offsets = _get_due_time_offsets(
+            object_ids, update_intervals, tick_interval
         )
+        # the factors by which adaptive polling stretched the intervals
+        self._interval_factors: dict[int, int] = {}
+        self._unsub_sun_listener: CALLBACK_TYPE | None = None
+
+        if adaptive_polling:
+            self._unsub_sun_listener = async_track_state_change_event(
+                hass, SUN_ENTITY_ID, self._handle_sun_state_change
+            )
+
+        self._background_read_task: asyncio.Task[None] | None = None
+        # the failed reads of objects whose last valid response is still used
+        self.failed_responses: dict[int, InvalidApiResponse] = {}
+
+        # the objects whose listeners need to be notified of changes and the
+        # objects whose valid responses were stale at the last notification
+        self._changed_object_ids: set[int] = set()
+        self._stale_object_ids: set[int] = set()
+        self._notified_update_success = True
+
+        self._is_subscribed = False
+        self._pushed_responses: RctPowerData = {}
+        self._cancel_push_debounce: CALLBACK_TYPE | None = None
 
     def get_latest_response(
         self, object_id: int
@@ -58,5 +191,504 @@ class RctPowerDataUpdateCoordinator(DataUpdateCoordinator[RctPowerData]):
     def has_valid_value(self, object_id: int) -> bool:
         return isinstance(self.get_latest_response(object_id), ValidApiResponse)
 
+    def get_object_interval(self, object_id: int) -> float:
+        """Return the current interval of an object in seconds."""
+        interval = self.object_intervals.get(object_id, 0)
+
+        if (interval_factor := self._interval_factors.get(object_id)) is None:
+            return interval
+
+        return min(interval * interval_factor, max(interval, MAX_ADAPTIVE_INTERVAL))
+
+    def has_fresh_value(self, object_id: int) -> bool:
+        latest_response = self.get_latest_response(object_id)
+
+        return isinstance(latest_response, ValidApiResponse) and not self.is_stale(
+            latest_response
+        )
+
+    def is_stale(self, response: ValidApiResponse) -> bool:
+        """Whether a response is too old to be used in place of a newer one."""
+        max_age = self.get_object_interval(response.object_id) + self.max_value_age
+        return time.monotonic() - response.monotonic_time > max_age
+
+    def get_polled_object_ids(self) -> list[int]:
+        """Return the objects the listeners depend on.
+
+        Disabled entities aren't added to Home Assistant, so they don't listen
+        to the coordinator and their objects aren't polled. Enabling them
+        reloads the config entry, which adds their listeners. All objects are
+        polled if any listener didn't pass the objects it depends on or if
+        there are no listeners, e.g. for manual refreshes. The firmware version
+        is always polled along with the capabilities.
+        """
+        if not self._listeners:
+            return self.object_ids
+
+        # the firmware version is needed to keep the capabilities up to date
+        listened_object_ids: set[int] = (
+            {FIRMWARE_VERSION_OID} if self.capabilities is not None else set()
+        )
+
+        for _update_callback, context in self._listeners.values():
+            if not isinstance(context, frozenset):
+                return self.object_ids
+
+            listened_object_ids.update(context)
+
+        return [
+            object_id
+            for object_id in self.object_ids
+            if object_id in listened_object_ids
+        ]
+
+    def get_due_object_ids(self, now: float) -> list[int]:
+        """Return the objects to read at a tick at the given monotonic time."""
+        due_time_limit = now + self._tick_seconds * DUE_TIME_TOLERANCE_FACTOR
+        # the first refresh reads all objects, e.g. for the device infos of
+        # the entities added afterwards
+        object_ids = (
+            self.object_ids if self.data is None else self.get_polled_object_ids()
+        )
+
+        if self.capabilities is None:
+            return [
+                object_id
+                for object_id in object_ids
+                if object_id not in self._due_times
+                or self._due_times[object_id] < due_time_limit
+            ]
+
+        probing_object_ids = set(self.capabilities.probing_object_ids)
+
+        return [
+            object_id
+            for object_id in object_ids
+            if object_id in probing_object_ids
+            or (
+                not self.capabilities.is_unsupported(object_id)
+                and (
+                    object_id not in self._due_times
+                    or self._due_times[object_id] < due_time_limit
+                )
+            )
+        ]
+
+    def schedule_now(self, object_ids: Iterable[int]) -> None:
+        """Read the given objects at the next refresh regardless of their interval.
+
+        Objects that turned out to be unsupported are probed again.
+        """
+        object_ids = list(object_ids)
+
+        for object_id in object_ids:
+            self._due_times.pop(object_id, None)
+
+        if self.capabilities is not None:
+            self.capabilities.reprobe(object_ids)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners of the objects that changed since the last call.
+
+        Listeners without a context are always notified, while all listeners
+        are notified if the success of the updates changed.
+        """
+        changed_object_ids = self._changed_object_ids | self._update_stale_object_ids()
+        self._changed_object_ids = set()
+        notify_all = self.last_update_success != self._notified_update_success
+        self._notified_update_success = self.last_update_success
+
+        for update_callback, context in list(self._listeners.values()):
+            if (
+                notify_all
+                or context is None
+                or not changed_object_ids.isdisjoint(context)
+            ):
+                update_callback()
+
+    async def async_shutdown(self) -> None:
+        if self._unsub_sun_listener is not None:
+            self._unsub_sun_listener()
+            self._unsub_sun_listener = None
+
+        if self._background_read_task is not None:
+            self._background_read_task.cancel()
+            self._background_read_task = None
+
+        if self._cancel_push_debounce is not None:
+            self._cancel_push_debounce()
+            self._cancel_push_debounce = None
+
+        await super().async_shutdown()
+
+    @property
+    def _tick_seconds(self) -> float:
+        return (
+            self.update_interval.total_seconds()
+            if self.update_interval is not None
+            else 0
+        )
+
     async def _async_update_data(self) -> RctPowerData:
-        return await self.client.async_get_data(object_ids=self.object_ids)
+        now = time.monotonic()
+        due_object_ids = self.get_due_object_ids(now)
+
+        if self.data is None:
+            # the first refresh reads everything at once, so all entities
+            # have their values and device infos right from the start
+            data = await self._async_read_objects(
+                due_object_ids, EntityUpdatePriority.FREQUENT, now
+            )
+        else:
+            data = await self._async_read_objects(
+                [
+                    object_id
+                    for object_id in due_object_ids
+                    if self.object_priorities[object_id]
+                    == EntityUpdatePriority.FREQUENT
+                ],
+                EntityUpdatePriority.FREQUENT,
+                now,
+            )
+            self._start_background_read(
+                [
+                    object_id
+                    for object_id in due_object_ids
+                    if self.object_priorities[object_id]
+                    != EntityUpdatePriority.FREQUENT
+                ],
+                now,
+            )
+
+        if self.push_updates and not self._is_subscribed:
+            await self.client.async_subscribe(
+                self.pushed_object_ids, self._handle_pushed_response
+            )
+            self._is_subscribed = True
+
+        return self._merge_data(data)
+
+    async def _async_read_objects(
+        self, object_ids: list[int], priority: EntityUpdatePriority, now: float
+    ) -> RctPowerData:
+        if not object_ids:
+            return {}
+
+        # objects that were pushed or harvested recently aren't polled, which
+        # means all of them are if the firmware doesn't support periodic reads
+        data = await self.client.async_get_data(
+            object_ids=object_ids,
+            max_age=timedelta(
+                seconds=self._tick_seconds * HARVESTED_RESPONSE_MAX_AGE_FACTOR
+            ),
+            priority=priority,
+        )
+
+        if retries := sum(response.retries for response in data.values()):
+            LOGGER.debug(
+                "Needed %d retries to read %d objects", retries, len(object_ids)
+            )
+
+        self._update_capabilities(data)
+
+        if self.change_rates is not None:
+            self.change_rates.observe(self.data or {}, data, self.object_priorities)
+
+        if self.adaptive_polling:
+            self._update_interval_factors(data)
+
+        for object_id in object_ids:
+            interval = self.get_object_interval(object_id)
+
+            if object_id in self._due_times:
+                self._due_times[object_id] += interval * max(
+                    (now - self._due_times[object_id]) // interval + 1, 1
+                )
+            else:
+                self._due_times[object_id] = (
+                    now + interval - self._due_time_offsets.get(object_id, 0)
+                )
+
+        return data
+
+    def _update_interval_factors(self, data: RctPowerData) -> None:
+        for object_id, response in data.items():
+            if object_id in self.fixed_interval_object_ids:
+                continue
+
+            latest_response = (self.data or {}).get(object_id)
+
+            if (
+                isinstance(response, ValidApiResponse)
+                and isinstance(latest_response, ValidApiResponse)
+                and _is_stable(
+                    latest_response.value,
+                    response.value,
+                    _get_stable_value_tolerance(object_id),
+                )
+            ):
+                self._interval_factors[object_id] = min(
+                    self._interval_factors.get(object_id, 1) * 2,
+                    MAX_ADAPTIVE_INTERVAL_FACTOR,
+                )
+            elif self._interval_factors.pop(object_id, None) is not None:
+                LOGGER.debug(
+                    "Polling object %x at its configured interval again", object_id
+                )
+
+    @callback
+    def _handle_sun_state_change(self, event: Event[EventStateChangedData]) -> None:
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+
+        if (
+            new_state is None
+            or new_state.state != SUN_STATE_ABOVE_HORIZON
+            or (old_state is not None and old_state.state == SUN_STATE_ABOVE_HORIZON)
+        ):
+            return
+
+        # the values start moving in the morning, so the stretched objects
+        # are read at the next tick
+        for object_id in self._interval_factors:
+            self._due_times.pop(object_id, None)
+
+        self._interval_factors.clear()
+
+    def _update_capabilities(self, data: RctPowerData) -> None:
+        if self.capabilities is None:
+            return
+
+        firmware_version_response = data.get(FIRMWARE_VERSION_OID)
+
+        if isinstance(firmware_version_response, ValidApiResponse) and isinstance(
+            firmware_version_response.value, str
+        ):
+            self.capabilities.set_firmware_version(firmware_version_response.value)
+
+        self.capabilities.observe(data)
+
+    def _start_background_read(self, object_ids: list[int], now: float) -> None:
+        if not object_ids or (
+            self._background_read_task is not None
+            and not self._background_read_task.done()
+        ):
+            # objects that are still due are read by the next background read
+            return
+
+        self._background_read_task = self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_read_in_background(object_ids, now),
+            name=f"{self.name} background read",
+        )
+
+    async def _async_read_in_background(
+        self, object_ids: list[int], now: float
+    ) -> None:
+        priority = min(
+            (self.object_priorities[object_id] for object_id in object_ids),
+            key=lambda update_priority: update_priority.value,
+        )
+
+        data: RctPowerData
+
+        try:
+            data = await self._async_read_objects(object_ids, priority, now)
+        except Exception as exc:
+            # e.g. connection errors and timeouts, which would otherwise get
+            # lost in the background task
+            LOGGER.debug(
+                "Failed to read %d objects in the background: %s",
+                len(object_ids),
+                str(exc),
+            )
+            failure_time = datetime.now()
+            data = {
+                object_id: InvalidApiResponse(
+                    object_id=object_id,
+                    time=failure_time,
+                    cause=BACKGROUND_READ_FAILED_CAUSE,
+                )
+                for object_id in object_ids
+            }
+
+        self.data = self._merge_data(data)
+        self.async_update_listeners()
+
+    def _merge_data(self, data: RctPowerData) -> RctPowerData:
+        if not data and self.data is not None:
+            # nothing was due, so there's no need to copy the data
+            return self.data
+
+        merged_data = {**(self.data or {})}
+
+        for object_id, response in data.items():
+            latest_response = merged_data.get(object_id)
+
+            if (
+                isinstance(response, InvalidApiResponse)
+                and isinstance(latest_response, ValidApiResponse)
+                and not self.is_stale(latest_response)
+            ):
+                LOGGER.debug(
+                    "Keeping the last value of object %x after a failed read: %s",
+                    object_id,
+                    response.cause,
+                )
+                self.failed_responses[object_id] = response
+                continue
+
+            self.failed_responses.pop(object_id, None)
+            merged_data[object_id] = response
+
+            # kept values don't change anything for the listeners
+            if _has_changed(latest_response, response):
+                self._changed_object_ids.add(object_id)
+
+            if object_id in self._stale_object_ids:
+                # the entities become available again
+                self._stale_object_ids.discard(object_id)
+                self._changed_object_ids.add(object_id)
+
+        return merged_data
+
+    def _update_stale_object_ids(self) -> set[int]:
+        """Return the objects whose valid responses became stale."""
+        stale_object_ids = {
+            object_id
+            for object_id, response in (self.data or {}).items()
+            if isinstance(response, ValidApiResponse) and self.is_stale(response)
+        }
+        newly_stale_object_ids = stale_object_ids - self._stale_object_ids
+        self._stale_object_ids = stale_object_ids
+
+        return newly_stale_object_ids
+
+    @callback
+    def _async_refresh_finished(self) -> None:
+        # the listeners aren't notified of repeatedly failing refreshes, but
+        # values still become stale in the meantime
+        if not self.last_update_success:
+            self.async_update_listeners()
+
+    @callback
+    def _handle_pushed_response(self, response: ValidApiResponse) -> None:
+        self._pushed_responses[response.object_id] = response
+
+        if self._cancel_push_debounce is None:
+            self._cancel_push_debounce = async_call_later(
+                self.hass, PUSH_DEBOUNCE_DELAY, self._async_apply_pushed_responses
+            )
+
+    @callback
+    def _async_apply_pushed_responses(self, _now: datetime) -> None:
+        self._cancel_push_debounce = None
+
+        # unlike `async_set_updated_data` this doesn't postpone the next poll,
+        # which is still needed for objects that aren't pushed
+        self.data = self._merge_data(self._pushed_responses)
+        self._pushed_responses = {}
+        self.async_update_listeners()
+
+
+def _has_changed(
+    latest_response: ValidApiResponse | InvalidApiResponse | None,
+    response: ValidApiResponse | InvalidApiResponse,
+) -> bool:
+    """Whether a response changes the state of the entities using the object."""
+    if isinstance(response, ValidApiResponse):
+        return (
+            not isinstance(latest_response, ValidApiResponse)
+            or latest_response.value != response.value
+        )
+
+    return not isinstance(latest_response, InvalidApiResponse)
+
+
+def _get_stable_value_tolerance(object_id: int) -> tuple[float, float]:
+    if object_id not in OBJECT_INDEX:
+        return DEFAULT_STABLE_VALUE_TOLERANCE
+
+    return STABLE_VALUE_TOLERANCES.get(
+        OBJECT_INDEX.get_by_id(object_id).object_info.unit or "",
+        DEFAULT_STABLE_VALUE_TOLERANCE,
+    )
+
+
+def _is_stable(
+    latest_value: ApiResponseValue,
+    value: ApiResponseValue,
+    tolerance: tuple[float, float],
+) -> bool:
+    if isinstance(latest_value, float | int) and isinstance(value, float | int):
+        relative_tolerance, absolute_tolerance = tolerance
+        return math.isclose(
+            latest_value,
+            value,
+            rel_tol=relative_tolerance,
+            abs_tol=absolute_tolerance,
+        )
+
+    return latest_value == value
+
+
+def _get_object_intervals(
+    object_ids: Mapping[EntityUpdatePriority, list[int]],
+    update_intervals: Mapping[EntityUpdatePriority, int],
+) -> dict[int, float]:
+    """Map each object to the shortest interval of the priorities it belongs to."""
+    object_intervals: dict[int, float] = {}
+
+    for update_priority, priority_object_ids in object_ids.items():
+        interval = float(update_intervals[update_priority])
+
+        for object_id in priority_object_ids:
+            object_intervals[object_id] = min(
+                object_intervals.get(object_id, interval), interval
+            )
+
+    return object_intervals
+
+
+def _get_object_priorities(
+    object_ids: Mapping[EntityUpdatePriority, list[int]],
+) -> dict[int, EntityUpdatePriority]:
+    """Map each object to the most urgent priority it belongs to."""
+    object_priorities: dict[int, EntityUpdatePriority] = {}
+
+    for update_priority, priority_object_ids in object_ids.items():
+        for object_id in priority_object_ids:
+            if (
+                object_id not in object_priorities
+                or update_priority.value < object_priorities[object_id].value
+            ):
+                object_priorities[object_id] = update_priority
+
+    return object_priorities
+
+
+def _get_due_time_offsets(
+    object_ids: Mapping[EntityUpdatePriority, list[int]],
+    update_intervals: Mapping[EntityUpdatePriority, int],
+    tick_interval: float,
+) -> dict[int, float]:
+    """Distribute the objects of longer intervals evenly across the ticks.
+
+    Each object is read that many ticks early the second time, after which it
+    keeps its place in the rotation.
+    """
+    due_time_offsets: dict[int, float] = {}
+
+    for update_priority, priority_object_ids in object_ids.items():
+        ticks_per_interval = int(update_intervals[update_priority] // tick_interval)
+
+        if ticks_per_interval <= 1:
+            continue
+
+        for index, object_id in enumerate(sorted(priority_object_ids)):
+            due_time_offsets.setdefault(
+                object_id, (index % ticks_per_interval) * tick_interval
+            )
+
+    return due_time_offsets
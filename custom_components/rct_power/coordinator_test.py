@@ -0,0 +1,495 @@
+"""Test the scheduling of the RCT Power update coordinator."""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.rct_power.capabilities import PROBE_ATTEMPTS, CapabilityMap
+from custom_components.rct_power.const import DOMAIN, EntityUpdatePriority
+from custom_components.rct_power.coordinator import (
+    FIRMWARE_VERSION_OID,
+    RctPowerDataUpdateCoordinator,
+)
+from custom_components.rct_power.lib.api import (
+    InvalidApiResponse,
+    RctPowerApiClient,
+    RctPowerData,
+    ValidApiResponse,
+)
+from custom_components.rct_power.lib.object_index import OBJECT_INDEX
+
+FREQUENT_OBJECT_IDS = [1, 2]
+INFREQUENT_OBJECT_IDS = [10, 11, 12, 13, 14, 15]
+STATIC_OBJECT_IDS = [20, 21]
+
+
+async def get_data(object_ids: list[int], **_kwargs: object) -> RctPowerData:
+    return {
+        object_id: ValidApiResponse(object_id=object_id, time=datetime.now(), value=0)
+        for object_id in object_ids
+    }
+
+
+@pytest.fixture(name="client")
+def client_fixture() -> MagicMock:
+    client = MagicMock(spec=RctPowerApiClient)
+    client.async_get_data = AsyncMock(side_effect=get_data)
+    return client
+
+
+@pytest.fixture(name="coordinator")
+def coordinator_fixture(
+    hass: HomeAssistant, client: MagicMock
+) -> RctPowerDataUpdateCoordinator:
+    return RctPowerDataUpdateCoordinator(
+        hass,
+        MockConfigEntry(domain=DOMAIN),
+        client=client,
+        object_ids={
+            EntityUpdatePriority.FREQUENT: FREQUENT_OBJECT_IDS,
+            EntityUpdatePriority.INFREQUENT: INFREQUENT_OBJECT_IDS,
+            EntityUpdatePriority.STATIC: STATIC_OBJECT_IDS,
+        },
+        update_intervals={
+            EntityUpdatePriority.FREQUENT: 30,
+            EntityUpdatePriority.INFREQUENT: 180,
+            EntityUpdatePriority.STATIC: 3600,
+        },
+    )
+
+
+async def test_reads_all_objects_in_one_session_at_first(
+    coordinator: RctPowerDataUpdateCoordinator, client: MagicMock
+) -> None:
+    """Test that the first refresh reads the objects of all priorities."""
+    await coordinator.async_refresh()
+
+    client.async_get_data.assert_awaited_once()
+    assert client.async_get_data.await_args.kwargs["object_ids"] == [
+        *FREQUENT_OBJECT_IDS,
+        *INFREQUENT_OBJECT_IDS,
+        *STATIC_OBJECT_IDS,
+    ]
+    assert coordinator.update_interval is not None
+    assert coordinator.update_interval.total_seconds() == 30
+
+
+async def test_spreads_infrequent_objects_across_ticks(
+    coordinator: RctPowerDataUpdateCoordinator,
+) -> None:
+    """Test that each tick reads the frequent objects and a share of the others."""
+    await coordinator.async_refresh()
+    now = time.monotonic()
+
+    due_object_ids = [
+        coordinator.get_due_object_ids(now + 30 * tick) for tick in range(1, 7)
+    ]
+    # without reading them, the objects stay due at the following ticks
+    newly_due_object_ids = [
+        set(object_ids) - set(previous_object_ids)
+        for previous_object_ids, object_ids in zip(
+            [FREQUENT_OBJECT_IDS, *due_object_ids], due_object_ids, strict=False
+        )
+    ]
+
+    assert all(
+        object_ids[: len(FREQUENT_OBJECT_IDS)] == FREQUENT_OBJECT_IDS
+        for object_ids in due_object_ids
+    )
+    assert (
+        sorted(
+            object_id for object_ids in newly_due_object_ids for object_id in object_ids
+        )
+        == INFREQUENT_OBJECT_IDS
+    )
+    assert all(len(object_ids) == 1 for object_ids in newly_due_object_ids)
+
+
+async def test_reads_scheduled_objects_immediately(
+    hass: HomeAssistant,
+    coordinator: RctPowerDataUpdateCoordinator,
+    client: MagicMock,
+) -> None:
+    """Test that objects scheduled for now are read even if they aren't due."""
+    await coordinator.async_refresh()
+    client.async_get_data.reset_mock()
+
+    coordinator.schedule_now([STATIC_OBJECT_IDS[0]])
+    await coordinator.async_refresh()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    client.async_get_data.assert_awaited_once()
+    assert client.async_get_data.await_args.kwargs["object_ids"] == [
+        STATIC_OBJECT_IDS[0]
+    ]
+    assert (
+        client.async_get_data.await_args.kwargs["priority"]
+        == EntityUpdatePriority.STATIC
+    )
+    assert set(coordinator.data) == {
+        *FREQUENT_OBJECT_IDS,
+        *INFREQUENT_OBJECT_IDS,
+        *STATIC_OBJECT_IDS,
+    }
+
+
+async def test_marks_objects_of_failed_background_reads(
+    hass: HomeAssistant,
+    coordinator: RctPowerDataUpdateCoordinator,
+    client: MagicMock,
+) -> None:
+    """Test that errors of background reads mark the objects as failed."""
+    await coordinator.async_refresh()
+
+    async def get_data_or_fail(object_ids: list[int], **kwargs: object) -> RctPowerData:
+        if kwargs["priority"] != EntityUpdatePriority.FREQUENT:
+            raise OSError("Connection reset")
+        return await get_data(object_ids)
+
+    client.async_get_data.side_effect = get_data_or_fail
+    coordinator.schedule_now(STATIC_OBJECT_IDS)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.last_update_success
+    # the last valid values are kept until they become stale
+    assert set(coordinator.failed_responses) == set(STATIC_OBJECT_IDS)
+    assert all(
+        coordinator.has_valid_value(object_id) for object_id in STATIC_OBJECT_IDS
+    )
+    await coordinator.async_shutdown()
+
+
+async def test_polls_only_the_objects_of_listeners(
+    coordinator: RctPowerDataUpdateCoordinator, client: MagicMock
+) -> None:
+    """Test that objects without listening entities aren't polled."""
+    coordinator.async_add_listener(MagicMock(), frozenset({FREQUENT_OBJECT_IDS[0]}))
+    remove_listener = coordinator.async_add_listener(
+        MagicMock(), frozenset({FREQUENT_OBJECT_IDS[0], STATIC_OBJECT_IDS[0]})
+    )
+    await coordinator.async_refresh()
+
+    # the first refresh still reads all objects
+    assert len(client.async_get_data.await_args.kwargs["object_ids"]) == len(
+        [*FREQUENT_OBJECT_IDS, *INFREQUENT_OBJECT_IDS, *STATIC_OBJECT_IDS]
+    )
+
+    coordinator.schedule_now(coordinator.object_ids)
+
+    assert coordinator.get_due_object_ids(time.monotonic()) == [
+        FREQUENT_OBJECT_IDS[0],
+        STATIC_OBJECT_IDS[0],
+    ]
+
+    # e.g. the entity was disabled
+    remove_listener()
+
+    assert coordinator.get_due_object_ids(time.monotonic()) == [FREQUENT_OBJECT_IDS[0]]
+    await coordinator.async_shutdown()
+
+
+async def test_skips_unsupported_objects(
+    hass: HomeAssistant, client: MagicMock
+) -> None:
+    """Test that unsupported objects aren't read, while probed ones are."""
+    capabilities = CapabilityMap(hass, "SERIAL")
+    await capabilities.async_load()
+
+    for _attempt in range(PROBE_ATTEMPTS):
+        capabilities.observe(
+            {
+                FREQUENT_OBJECT_IDS[1]: InvalidApiResponse(
+                    object_id=FREQUENT_OBJECT_IDS[1],
+                    time=datetime.now(),
+                    cause="INVALID_COMMAND",
+                )
+            }
+        )
+    capabilities.observe(
+        {
+            STATIC_OBJECT_IDS[0]: InvalidApiResponse(
+                object_id=STATIC_OBJECT_IDS[0],
+                time=datetime.now(),
+                cause="INVALID_COMMAND",
+            )
+        }
+    )
+    coordinator = RctPowerDataUpdateCoordinator(
+        hass,
+        MockConfigEntry(domain=DOMAIN),
+        client=client,
+        object_ids={
+            EntityUpdatePriority.FREQUENT: FREQUENT_OBJECT_IDS,
+            EntityUpdatePriority.STATIC: STATIC_OBJECT_IDS,
+        },
+        update_intervals={
+            EntityUpdatePriority.FREQUENT: 30,
+            EntityUpdatePriority.STATIC: 3600,
+        },
+        capabilities=capabilities,
+    )
+
+    await coordinator.async_refresh()
+
+    assert client.async_get_data.await_args.kwargs["object_ids"] == [
+        FREQUENT_OBJECT_IDS[0],
+        *STATIC_OBJECT_IDS,
+    ]
+    # the probed object is read again at the next tick despite its interval
+    assert coordinator.get_due_object_ids(time.monotonic() + 30) == [
+        FREQUENT_OBJECT_IDS[0],
+        STATIC_OBJECT_IDS[0],
+    ]
+
+
+async def test_polls_the_firmware_version_without_listeners(
+    hass: HomeAssistant, client: MagicMock
+) -> None:
+    """Test that firmware updates are noticed even if no entity uses the version."""
+    capabilities = CapabilityMap(hass, "SERIAL")
+    await capabilities.async_load()
+    coordinator = RctPowerDataUpdateCoordinator(
+        hass,
+        MockConfigEntry(domain=DOMAIN),
+        client=client,
+        object_ids={
+            EntityUpdatePriority.FREQUENT: FREQUENT_OBJECT_IDS,
+            EntityUpdatePriority.STATIC: [FIRMWARE_VERSION_OID],
+        },
+        update_intervals={
+            EntityUpdatePriority.FREQUENT: 30,
+            EntityUpdatePriority.STATIC: 3600,
+        },
+        capabilities=capabilities,
+    )
+    coordinator.async_add_listener(MagicMock(), frozenset({FREQUENT_OBJECT_IDS[0]}))
+    await coordinator.async_refresh()
+
+    assert coordinator.get_polled_object_ids() == [
+        FREQUENT_OBJECT_IDS[0],
+        FIRMWARE_VERSION_OID,
+    ]
+    await coordinator.async_shutdown()
+
+
+async def test_keeps_last_valid_value_until_stale(
+    coordinator: RctPowerDataUpdateCoordinator, client: MagicMock
+) -> None:
+    """Test that a failed read doesn't replace a recent valid value."""
+    await coordinator.async_refresh()
+    listener = MagicMock()
+    remove_listener = coordinator.async_add_listener(
+        listener, frozenset(FREQUENT_OBJECT_IDS)
+    )
+    client.async_get_data.side_effect = lambda object_ids, **_kwargs: {
+        object_id: InvalidApiResponse(
+            object_id=object_id, time=datetime.now(), cause="CRC_ERROR"
+        )
+        for object_id in object_ids
+    }
+
+    coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+    await coordinator.async_refresh()
+
+    assert coordinator.has_fresh_value(FREQUENT_OBJECT_IDS[0])
+    assert set(coordinator.failed_responses) == set(FREQUENT_OBJECT_IDS)
+    # the kept value didn't change
+    listener.assert_not_called()
+
+    # the value is older than the interval plus the maximum value age
+    coordinator.data[FREQUENT_OBJECT_IDS[0]].monotonic_time -= (
+        30 + coordinator.max_value_age + 1
+    )
+
+    assert not coordinator.has_fresh_value(FREQUENT_OBJECT_IDS[0])
+
+    coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+    await coordinator.async_refresh()
+
+    assert isinstance(coordinator.data[FREQUENT_OBJECT_IDS[0]], InvalidApiResponse)
+    assert set(coordinator.failed_responses) == {FREQUENT_OBJECT_IDS[1]}
+    listener.assert_called()
+    remove_listener()
+
+
+async def test_measures_ages_independently_of_the_clock(
+    coordinator: RctPowerDataUpdateCoordinator,
+) -> None:
+    """Test that e.g. a DST change doesn't make recent values stale."""
+    response = ValidApiResponse(
+        object_id=FREQUENT_OBJECT_IDS[0],
+        time=datetime.now() - timedelta(hours=1),
+        value=0,
+    )
+
+    assert not coordinator.is_stale(response)
+
+    response.monotonic_time -= 30 + coordinator.max_value_age + 1
+
+    assert coordinator.is_stale(response)
+
+
+async def test_notifies_listeners_of_changed_objects(
+    coordinator: RctPowerDataUpdateCoordinator, client: MagicMock
+) -> None:
+    """Test that listeners are only notified if their objects changed."""
+    listeners = {object_id: MagicMock() for object_id in FREQUENT_OBJECT_IDS}
+    listener_without_context = MagicMock()
+
+    for object_id, listener in listeners.items():
+        coordinator.async_add_listener(listener, frozenset({object_id}))
+    coordinator.async_add_listener(listener_without_context)
+
+    await coordinator.async_refresh()
+
+    assert all(listener.call_count == 1 for listener in listeners.values())
+
+    client.async_get_data.side_effect = lambda object_ids, **_kwargs: {
+        object_id: ValidApiResponse(
+            object_id=object_id,
+            time=datetime.now(),
+            value=1 if object_id == FREQUENT_OBJECT_IDS[0] else 0,
+        )
+        for object_id in object_ids
+    }
+    coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+    await coordinator.async_refresh()
+
+    assert listeners[FREQUENT_OBJECT_IDS[0]].call_count == 2
+    assert listeners[FREQUENT_OBJECT_IDS[1]].call_count == 1
+    assert listener_without_context.call_count == 2
+
+    client.async_get_data.side_effect = UpdateFailed
+    coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+    await coordinator.async_refresh()
+
+    # all listeners learn about the failed update
+    assert listeners[FREQUENT_OBJECT_IDS[1]].call_count == 2
+    await coordinator.async_shutdown()
+
+
+async def test_does_not_consider_changing_fractions_stable(
+    hass: HomeAssistant, client: MagicMock
+) -> None:
+    """Test that values like the state of charge aren't stable at any scale."""
+    soc_object_id = OBJECT_INDEX.get_object_id("battery.soc")
+    soc_values = iter([0.8, 0.35, 0.35])
+    client.async_get_data.side_effect = lambda object_ids, **_kwargs: {
+        object_id: ValidApiResponse(
+            object_id=object_id, time=datetime.now(), value=next(soc_values)
+        )
+        for object_id in object_ids
+    }
+    coordinator = RctPowerDataUpdateCoordinator(
+        hass,
+        MockConfigEntry(domain=DOMAIN),
+        client=client,
+        object_ids={EntityUpdatePriority.FREQUENT: [soc_object_id]},
+        update_intervals={EntityUpdatePriority.FREQUENT: 30},
+        adaptive_polling=True,
+    )
+
+    for _tick in range(2):
+        coordinator.schedule_now([soc_object_id])
+        await coordinator.async_refresh()
+
+    assert coordinator.get_object_interval(soc_object_id) == 30
+
+    coordinator.schedule_now([soc_object_id])
+    await coordinator.async_refresh()
+
+    assert coordinator.get_object_interval(soc_object_id) == 60
+    await coordinator.async_shutdown()
+
+
+async def test_stretches_intervals_of_stable_objects(
+    hass: HomeAssistant, client: MagicMock
+) -> None:
+    """Test that adaptive polling reads stable objects less often."""
+    hass.states.async_set("sun.sun", "below_horizon")
+    coordinator = RctPowerDataUpdateCoordinator(
+        hass,
+        MockConfigEntry(domain=DOMAIN),
+        client=client,
+        object_ids={EntityUpdatePriority.FREQUENT: FREQUENT_OBJECT_IDS},
+        update_intervals={EntityUpdatePriority.FREQUENT: 30},
+        adaptive_polling=True,
+    )
+
+    for _tick in range(3):
+        coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+        await coordinator.async_refresh()
+
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[0]) == 120
+
+    client.async_get_data.side_effect = lambda object_ids, **_kwargs: {
+        object_id: ValidApiResponse(
+            object_id=object_id,
+            time=datetime.now(),
+            value=100 if object_id == FREQUENT_OBJECT_IDS[0] else 0,
+        )
+        for object_id in object_ids
+    }
+    coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+    await coordinator.async_refresh()
+
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[0]) == 30
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[1]) == 240
+
+    hass.states.async_set("sun.sun", "above_horizon")
+    await hass.async_block_till_done()
+
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[1]) == 30
+    assert coordinator.get_due_object_ids(time.monotonic()) == [FREQUENT_OBJECT_IDS[1]]
+
+    for _tick in range(2):
+        coordinator.schedule_now(FREQUENT_OBJECT_IDS)
+        await coordinator.async_refresh()
+
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[1]) == 120
+
+    # only rising, not the changing attributes of the sun, resets the intervals
+    hass.states.async_set("sun.sun", "above_horizon", {"elevation": 10.0})
+    await hass.async_block_till_done()
+
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[1]) == 120
+    await coordinator.async_shutdown()
+
+
+async def test_keeps_fixed_and_caps_long_intervals(
+    hass: HomeAssistant, client: MagicMock
+) -> None:
+    """Test that fault flags aren't stretched and static objects are capped."""
+    coordinator = RctPowerDataUpdateCoordinator(
+        hass,
+        MockConfigEntry(domain=DOMAIN),
+        client=client,
+        object_ids={
+            EntityUpdatePriority.FREQUENT: FREQUENT_OBJECT_IDS,
+            EntityUpdatePriority.STATIC: STATIC_OBJECT_IDS,
+        },
+        update_intervals={
+            EntityUpdatePriority.FREQUENT: 30,
+            EntityUpdatePriority.STATIC: 3600,
+        },
+        adaptive_polling=True,
+        fixed_interval_object_ids={FREQUENT_OBJECT_IDS[1]},
+    )
+    object_ids = FREQUENT_OBJECT_IDS + STATIC_OBJECT_IDS
+
+    for _tick in range(4):
+        coordinator.schedule_now(object_ids)
+        await coordinator.async_refresh()
+
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[0]) == 240
+    assert coordinator.get_object_interval(FREQUENT_OBJECT_IDS[1]) == 30
+    assert coordinator.get_object_interval(STATIC_OBJECT_IDS[0]) == 3600
+    await coordinator.async_shutdown()
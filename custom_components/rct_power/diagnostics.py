@@ -0,0 +1,71 @@
+"""Diagnostics support for RCT Power."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from . import RctConfigEntry
+from .lib.object_index import OBJECT_INDEX
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: RctConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    update_coordinator = entry.runtime_data.update_coordinator
+    capabilities = update_coordinator.capabilities
+    change_rates = update_coordinator.change_rates
+    now = time.monotonic()
+
+    return {
+        "options": dict(entry.options),
+        "capabilities": {
+            OBJECT_INDEX.get_name(object_id): capability.value
+            for object_id, capability in sorted(capabilities.capabilities.items())
+        }
+        if capabilities is not None
+        else None,
+        # the retries needed by the latest read of each object
+        "retries": {
+            OBJECT_INDEX.get_name(object_id): response.retries
+            for object_id, response in sorted((update_coordinator.data or {}).items())
+            if response.retries
+        },
+        # the objects whose last valid value is kept despite failed reads
+        "kept_values": {
+            OBJECT_INDEX.get_name(object_id): {
+                "cause": failed_response.cause,
+                "age": now - response.monotonic_time,
+            }
+            for object_id, failed_response in sorted(
+                update_coordinator.failed_responses.items()
+            )
+            if (response := update_coordinator.get_latest_response(object_id))
+            is not None
+        },
+        # the learned update priorities that differ from the current ones
+        "update_priorities": {
+            OBJECT_INDEX.get_name(object_id): {
+                "current": update_coordinator.object_priorities[object_id].name,
+                "proposed": update_priority.name,
+            }
+            for object_id, update_priority in sorted(
+                change_rates.get_update_priorities(
+                    update_coordinator.update_intervals
+                ).items()
+            )
+            if object_id in update_coordinator.object_priorities
+            and update_priority != update_coordinator.object_priorities[object_id]
+        }
+        if change_rates is not None
+        else None,
+        "read_timeouts": {
+            OBJECT_INDEX.get_name(object_id): timeout
+            for object_id, timeout in sorted(
+                update_coordinator.client.read_timeouts.items()
+            )
+        },
+    }
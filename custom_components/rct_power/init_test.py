@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import CONF_PORT
@@ -9,7 +11,12 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.rct_power import RctData, async_setup_entry
+from custom_components.rct_power import (
+    RctData,
+    async_remove_entry,
+    async_setup_entry,
+    fixed_interval_object_ids,
+)
 from custom_components.rct_power.const import (
     CONF_ENTITY_PREFIX,
     CONF_HOSTNAME,
@@ -17,6 +24,7 @@ from custom_components.rct_power.const import (
     DEFAULT_PORT,
     DOMAIN,
 )
+from custom_components.rct_power.lib.object_index import OBJECT_INDEX
 
 
 # We can pass fixtures as defined in conftest.py to tell pytest to use the fixture
@@ -71,3 +79,26 @@ async def test_setup_entry_exception(hass: HomeAssistant) -> None:
     # an error.
     with pytest.raises(ConfigEntryNotReady):
         assert await async_setup_entry(hass, config_entry)
+
+
+def test_fixes_intervals_of_bitfields_and_pinned_objects() -> None:
+    """Test that adaptive polling doesn't stretch the fault flags."""
+    object_ids = fixed_interval_object_ids()
+
+    assert OBJECT_INDEX.get_object_id("fault[0].flt") in object_ids
+    assert OBJECT_INDEX.get_object_id("battery.bat_status") in object_ids
+    assert OBJECT_INDEX.get_object_id("battery.soc") not in object_ids
+
+
+async def test_remove_entry_removes_learned_data(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that the stores of the inverter are removed along with the entry."""
+    for key in ("rct_power.capabilities.SERIAL", "rct_power.change_rates.SERIAL"):
+        hass_storage[key] = {"version": 1, "key": key, "data": {"objects": {}}}
+    config_entry = MockConfigEntry(domain=DOMAIN, unique_id="SERIAL")
+
+    await async_remove_entry(hass, config_entry)
+
+    assert "rct_power.capabilities.SERIAL" not in hass_storage
+    assert "rct_power.change_rates.SERIAL" not in hass_storage
@@ -4,23 +4,47 @@ from __future__ import annotations
 
 import asyncio
 import struct
+import time
 from asyncio import StreamReader, StreamWriter, open_connection
-from asyncio.locks import Lock
-from dataclasses import dataclass
-from datetime import datetime
+from collections import deque
+from collections.abc import Callable, Coroutine, Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any
 
 from homeassistant.helpers.update_coordinator import UpdateFailed
-from rctclient.exceptions import FrameCRCMismatch, FrameLengthExceeded, InvalidCommand
-from rctclient.frame import ReceiveFrame, SendFrame
-from rctclient.registry import REGISTRY
+from rctclient.exceptions import FrameCRCMismatch, InvalidCommand
+from rctclient.frame import make_frame
 from rctclient.types import Command, EventEntry
-from rctclient.utils import decode_value
 
-from ..const import LOGGER
+from ..const import (
+    DEFAULT_MAX_READ_TIMEOUT,
+    DEFAULT_MIN_READ_TIMEOUT,
+    DEFAULT_READ_WINDOW,
+    DEFAULT_RETRY_BUDGET,
+    LOGGER,
+    EntityUpdatePriority,
+)
+from .frame_decoder import DecodedFrame, FrameDecoder
+from .object_index import OBJECT_INDEX
+from .priority_lock import PriorityLock
+from .read_timeouts import ReadTimeoutEstimator
 
 CONNECTION_TIMEOUT = 20
+# the time a request may take beyond the read timeouts of its objects and the
+# retry budget, e.g. to write to a congested stream
+REQUEST_TIMEOUT_MARGIN = 10
+# the read timeout of objects whose latency hasn't been observed yet
 READ_TIMEOUT = 2
+READ_CHUNK_SIZE = 4096
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 300
 INVERTER_SN_OID = 0x7924ABD9
+# how often a failed object is requested again within the same request
+MAX_RETRY_ATTEMPTS = 2
+# the causes of failed reads that are likely to succeed when retried
+RETRIED_CAUSES = frozenset({"CRC_ERROR", "INCOMPLETE", "OBJECT_READ_TIMEOUT"})
 
 type ApiResponseValue = (
     bool
@@ -33,24 +57,36 @@ type ApiResponseValue = (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseApiResponse:
     object_id: int
+    # the wall-clock time is only for display, while ages are measured with
+    # the monotonic time, which isn't affected by clock changes
     time: datetime
+    # the field named `time` shadows the module within the class
+    monotonic_time: float = field(default_factory=monotonic, kw_only=True)
+    # how often the object was requested again after failing
+    retries: int = field(default=0, kw_only=True)
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidApiResponse(BaseApiResponse):
     value: ApiResponseValue
 
 
-@dataclass
+@dataclass(slots=True)
 class InvalidApiResponse(BaseApiResponse):
     cause: str
 
 
 type ApiResponse = ValidApiResponse | InvalidApiResponse
 type RctPowerData = dict[int, ApiResponse]
+type ApiResponseListener = Callable[[ValidApiResponse], None]
+# creates the tasks running alongside the requests, e.g. to have them tracked
+# by Home Assistant
+type BackgroundTaskFactory = Callable[
+    [Coroutine[Any, Any, None], str], asyncio.Task[None]
+]
 
 
 def get_valid_response_value_or[_R](
@@ -62,15 +98,100 @@ def get_valid_response_value_or[_R](
         return defaultValue
 
 
+@dataclass
+class RctPowerConnection:
+    reader: StreamReader
+    writer: StreamWriter
+    decoder: FrameDecoder = field(default_factory=FrameDecoder)
+    # frames that were decoded, but not yet read
+    frames: deque[DecodedFrame] = field(default_factory=deque[DecodedFrame])
+
+    @property
+    def is_usable(self) -> bool:
+        """Whether the connection can still be used for requests.
+
+        A stream that was half-closed by the inverter reports an eof on the
+        reading side, while a locally closed or broken transport reports that
+        it's closing on the writing side.
+        """
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self) -> None:
+        self.writer.close()
+
+    async def read_frame(self) -> DecodedFrame | None:
+        """Read the next frame from the stream or `None` if the stream ended.
+
+        All data available on the stream is read at once and decoded in one
+        pass. Frames beyond the first one are kept for subsequent calls.
+        """
+        while not self.frames:
+            raw_response = await self.reader.read(READ_CHUNK_SIZE)
+
+            if len(raw_response) <= 0:
+                return None
+
+            self.frames.extend(self.decoder.feed(raw_response))
+
+        return self.frames.popleft()
+
+
 class RctPowerApiClient:
-    def __init__(self, hostname: str, port: int) -> None:
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        *,
+        persistent_connection: bool = False,
+        read_window: int = DEFAULT_READ_WINDOW,
+        passive_listening: bool = False,
+        min_read_timeout: float = DEFAULT_MIN_READ_TIMEOUT,
+        max_read_timeout: float = DEFAULT_MAX_READ_TIMEOUT,
+        retry_budget: float = DEFAULT_RETRY_BUDGET,
+        create_background_task: BackgroundTaskFactory | None = None,
+    ) -> None:
         """Sample API Client."""
         self._hostname = hostname
         self._port = port
+        self._persistent_connection = persistent_connection
+        self._passive_listening = passive_listening
+        # the number of read requests that may be awaiting a response at once
+        self._read_window = max(read_window, 1)
+        # how long to wait for each object's response based on its latency,
+        # so lost frames don't stall the connection for long
+        self._read_timeouts = ReadTimeoutEstimator(
+            initial_timeout=READ_TIMEOUT,
+            min_timeout=min_read_timeout,
+            max_timeout=max_read_timeout,
+        )
+        # the time failed objects may be retried for after each request
+        self._retry_budget = retry_budget
+        self._create_background_task = create_background_task or _create_background_task
 
         # ensure only one connection at a time is established because the
-        # inverter's firmware doesn't handle it well at the time of writing
-        self._connection_lock = Lock()
+        # inverter's firmware doesn't handle it well at the time of writing,
+        # requests of higher priority preempt the ones holding the lock
+        self._connection_lock = PriorityLock()
+
+        # the connection kept open across requests in persistent mode
+        self._connection: RctPowerConnection | None = None
+        self._reconnect_backoff: float = 0
+        self._reconnect_not_before: float = 0
+
+        # objects the inverter is asked to send periodically on the
+        # persistent connection and the listener receiving them
+        self._subscribed_object_ids: frozenset[int] = frozenset()
+        self._subscription_listener: ApiResponseListener | None = None
+        self._listener_task: asyncio.Task[None] | None = None
+
+        # valid responses that arrived without being requested, e.g. because
+        # they were pushed or requested by another client of the inverter
+        self._harvested_responses: dict[int, ValidApiResponse] = {}
+
+    @property
+    def read_timeouts(self) -> Mapping[int, float]:
+        """The current read timeouts of the objects read so far in seconds."""
+        return self._read_timeouts.timeouts
 
     async def get_serial_number(self) -> str | None:
         inverter_data = await self.async_get_data([INVERTER_SN_OID])
@@ -84,31 +205,379 @@ class RctPowerApiClient:
         else:
             return None
 
-    async def async_get_data(self, object_ids: list[int]) -> RctPowerData:
-        async with self._connection_lock:
+    async def async_get_data(
+        self,
+        object_ids: list[int],
+        *,
+        max_age: timedelta | None = None,
+        priority: EntityUpdatePriority = EntityUpdatePriority.FREQUENT,
+    ) -> RctPowerData:
+        """Read the given objects from the inverter.
+
+        If `max_age` is given, objects that arrived unrequested within that
+        period aren't requested again, but the harvested responses are
+        returned instead.
+
+        A request of a lower `priority` yields the connection to waiting
+        requests of a higher priority between two objects and resumes once
+        they are done.
+
+        Objects that failed to be read for transient reasons are requested
+        again on the same connection as long as the retry budget allows.
+        """
+        harvested_responses = (
+            self._get_harvested_responses(object_ids, max_age)
+            if max_age is not None
+            else {}
+        )
+        requested_object_ids = [
+            object_id
+            for object_id in object_ids
+            if object_id not in harvested_responses
+        ]
+
+        if not requested_object_ids:
+            return harvested_responses
+
+        requested_responses: RctPowerData = {}
+        queued_object_ids = deque(requested_object_ids)
+
+        while queued_object_ids:
+            async with self._connection_lock.hold(priority.value):
+                # the request reads from the stream itself while it's running
+                await self._async_stop_listening()
+
+                try:
+                    requested_responses |= await self._async_get_data(
+                        queued_object_ids, priority
+                    )
+                finally:
+                    self._start_listening()
+
+            if queued_object_ids:
+                LOGGER.debug(
+                    "Yielding the connection with %d objects left to read",
+                    len(queued_object_ids),
+                )
+
+        if harvested_responses:
+            LOGGER.debug(
+                "Skipped requesting %d recently harvested objects",
+                len(harvested_responses),
+            )
+
+        # preserve the order of the requested object ids
+        return {
+            object_id: harvested_responses.get(object_id)
+            or requested_responses[object_id]
+            for object_id in object_ids
+        }
+
+    async def async_subscribe(
+        self, object_ids: list[int], listener: ApiResponseListener
+    ) -> None:
+        """Ask the inverter to periodically send the values of the given objects.
+
+        The subscription is bound to the persistent connection and is renewed
+        whenever the connection is re-established. Responses arriving between
+        requests are passed to the listener. If the firmware doesn't support
+        periodic reads, the listener is simply never called.
+        """
+        if not self._persistent_connection:
+            raise ValueError("Subscriptions require a persistent connection")
+
+        async with self._connection_lock.hold(EntityUpdatePriority.FREQUENT.value):
+            self._subscribed_object_ids = frozenset(object_ids)
+            self._subscription_listener = listener
+
+            if self._connection is not None and self._connection.is_usable:
+                self._write_subscription(self._connection)
+                await self._connection.writer.drain()
+
+            self._start_listening()
+
+    async def _async_get_data(
+        self, object_ids: deque[int], priority: EntityUpdatePriority
+    ) -> RctPowerData:
+        """Read objects from the queue until it's empty or the request is preempted.
+
+        The request may take as long as its objects can take to time out, so
+        large requests, e.g. the first one reading all objects, aren't limited
+        by a fixed timeout. If it still times out, the objects read so far are
+        returned and the remaining ones are failed.
+        """
+        connection = await self._async_get_connection()
+        requested_object_ids = list(object_ids)
+        data: RctPowerData = {}
+
+        try:
+            async with asyncio.timeout(self._get_request_timeout(object_ids)):
+                await self._read_objects(connection, object_ids, priority, data)
+
+                if not object_ids:
+                    await self._retry_failed_objects(connection, data, priority)
+        except TimeoutError as exc:
+            LOGGER.debug(
+                "Request timed out with %d objects left to read",
+                len(set(requested_object_ids) - data.keys()),
+            )
+            self._close_connection()
+            object_ids.clear()
+            request_time = datetime.now()
+
+            for object_id in requested_object_ids:
+                if object_id not in data:
+                    data[object_id] = _create_error_response(
+                        object_id, request_time, exc
+                    )
+
+            return data
+        except BaseException:
+            # the state of the stream is unknown after an interrupted request,
+            # so it can't be reused safely
+            self._close_connection()
+            raise
+
+        # waiting requests can reuse the connection even if it's not
+        # persistent
+        if not connection.is_usable or (
+            not self._persistent_connection and not self._connection_lock.has_waiters()
+        ):
+            self._close_connection()
+
+        return data
+
+    def _get_request_timeout(self, object_ids: Iterable[int]) -> float:
+        return (
+            sum(self._read_timeouts.get_timeout(object_id) for object_id in object_ids)
+            + self._retry_budget
+            + REQUEST_TIMEOUT_MARGIN
+        )
+
+    async def _read_objects(
+        self,
+        connection: RctPowerConnection,
+        object_ids: deque[int],
+        priority: EntityUpdatePriority,
+        data: RctPowerData,
+    ) -> None:
+        """Read objects from the queue into `data`, which keeps them on timeouts."""
+        if self._read_window > 1:
+            await self._read_objects_pipelined(
+                connection=connection,
+                object_ids=object_ids,
+                priority=priority,
+                responses=data,
+            )
+            return
+
+        while object_ids and not self._is_preempted(priority):
+            object_id = object_ids.popleft()
+            data[object_id] = await self._read_object(
+                connection=connection, object_id=object_id
+            )
+
+    async def _retry_failed_objects(
+        self,
+        connection: RctPowerConnection,
+        data: RctPowerData,
+        priority: EntityUpdatePriority,
+    ) -> None:
+        """Request objects that failed for transient reasons again.
+
+        Only as many objects are retried as can time out within the remaining
+        budget, so the retries can't delay the request by more than that.
+        """
+        retry_deadline = time.monotonic() + self._retry_budget
+
+        for _attempt in range(MAX_RETRY_ATTEMPTS):
+            remaining_budget = retry_deadline - time.monotonic()
+            retried_object_ids: deque[int] = deque()
+
+            for object_id, response in data.items():
+                if (
+                    not isinstance(response, InvalidApiResponse)
+                    or response.cause not in RETRIED_CAUSES
+                ):
+                    continue
+
+                remaining_budget -= self._read_timeouts.get_timeout(object_id)
+
+                if remaining_budget < 0:
+                    break
+
+                retried_object_ids.append(object_id)
+
+            if (
+                not retried_object_ids
+                or not connection.is_usable
+                or self._is_preempted(priority)
+            ):
+                return
+
+            LOGGER.debug("Retrying %d failed objects", len(retried_object_ids))
+            retried_data: RctPowerData = {}
+            await self._read_objects(
+                connection, retried_object_ids, priority, retried_data
+            )
+
+            for object_id, response in retried_data.items():
+                response.retries = data[object_id].retries + 1
+                data[object_id] = response
+
+    def _is_preempted(self, priority: EntityUpdatePriority) -> bool:
+        return self._connection_lock.is_contended(priority.value)
+
+    def close(self) -> None:
+        """Close the connection kept open in persistent mode, if any."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+
+        self._close_connection()
+
+    async def _async_get_connection(self) -> RctPowerConnection:
+        if self._connection is not None:
+            if self._connection.is_usable:
+                return self._connection
+
+            LOGGER.debug("Discarding closed connection to the inverter")
+            self._close_connection()
+
+        if self._persistent_connection:
+            backoff_remaining = self._reconnect_not_before - time.monotonic()
+
+            if backoff_remaining > 0:
+                raise UpdateFailed(
+                    f"Waiting {backoff_remaining:.0f}s before reconnecting"
+                )
+
+        try:
             async with asyncio.timeout(CONNECTION_TIMEOUT):
                 reader, writer = await open_connection(
                     host=self._hostname, port=self._port
                 )
+        except TimeoutError as exc:
+            # e.g. a host that doesn't answer, which must not be retried at
+            # every request either
+            self._register_failed_connection_attempt()
+            raise UpdateFailed("Timed out connecting") from exc
+        except OSError as exc:
+            self._register_failed_connection_attempt()
+            raise UpdateFailed(f"Failed to connect: {exc}") from exc
 
-                try:
-                    if reader.at_eof():
-                        raise UpdateFailed("Read stream closed")
+        connection = RctPowerConnection(reader=reader, writer=writer)
 
-                    return {
-                        object_id: await self._read_object(
-                            reader=reader, writer=writer, object_id=object_id
-                        )
-                        for object_id in object_ids
-                    }
-                finally:
-                    writer.close()
+        if not connection.is_usable:
+            connection.close()
+            self._register_failed_connection_attempt()
+            raise UpdateFailed("Read stream closed")
+
+        self._reconnect_backoff = 0
+        self._connection = connection
+
+        if self._subscribed_object_ids:
+            self._write_subscription(connection)
+
+        return connection
+
+    def _register_failed_connection_attempt(self) -> None:
+        if not self._persistent_connection:
+            return
+
+        self._reconnect_backoff = min(
+            max(self._reconnect_backoff * 2, RECONNECT_BACKOFF_MIN),
+            RECONNECT_BACKOFF_MAX,
+        )
+        self._reconnect_not_before = time.monotonic() + self._reconnect_backoff
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _write_subscription(self, connection: RctPowerConnection) -> None:
+        LOGGER.debug(
+            "Subscribing to periodic updates of %d objects",
+            len(self._subscribed_object_ids),
+        )
+
+        for object_id in self._subscribed_object_ids:
+            connection.writer.write(make_frame(Command.READ_PERIODICALLY, object_id))
+
+    def _get_harvested_responses(
+        self, object_ids: list[int], max_age: timedelta
+    ) -> RctPowerData:
+        min_monotonic_time = time.monotonic() - max_age.total_seconds()
+
+        return {
+            object_id: response
+            for object_id in object_ids
+            if (response := self._harvested_responses.get(object_id)) is not None
+            and response.monotonic_time >= min_monotonic_time
+        }
+
+    def _start_listening(self) -> None:
+        if (
+            not (self._passive_listening or self._subscription_listener is not None)
+            or self._connection is None
+            or not self._connection.is_usable
+            or (self._listener_task is not None and not self._listener_task.done())
+        ):
+            return
+
+        self._listener_task = self._create_background_task(
+            self._async_listen(self._connection), "rct_power listener"
+        )
+        self._listener_task.add_done_callback(_log_listener_error)
+
+    async def _async_stop_listening(self) -> None:
+        if self._listener_task is None:
+            return
+
+        self._listener_task.cancel()
+        await asyncio.wait([self._listener_task])
+        self._listener_task = None
+
+    async def _async_listen(self, connection: RctPowerConnection) -> None:
+        try:
+            while (response_frame := await connection.read_frame()) is not None:
+                self._handle_unsolicited_frame(response_frame)
+        except OSError as exc:
+            LOGGER.debug("Error while listening for unrequested objects: %s", str(exc))
+
+        LOGGER.debug("Stopped listening for unrequested objects")
+
+    def _handle_unsolicited_frame(self, response_frame: DecodedFrame) -> None:
+        """Handle a frame that doesn't belong to a pending request."""
+        is_subscribed = response_frame.object_id in self._subscribed_object_ids
+
+        if response_frame.error is not None or not (
+            self._passive_listening or is_subscribed
+        ):
+            return
+
+        try:
+            response = _decode_response(response_frame, datetime.now())
+        except Exception as exc:
+            LOGGER.debug(
+                "Error decoding unrequested object %x (%s): %s",
+                response_frame.object_id,
+                OBJECT_INDEX.get_name(response_frame.object_id),
+                str(exc),
+            )
+            return
+
+        self._harvested_responses[response.object_id] = response
+
+        if is_subscribed and self._subscription_listener is not None:
+            self._subscription_listener(response)
 
     async def _read_object(
-        self, reader: StreamReader, writer: StreamWriter, object_id: int
+        self, connection: RctPowerConnection, object_id: int
     ) -> ApiResponse:
-        object_name = REGISTRY.get_by_id(object_id).name
-        read_command_frame = SendFrame(command=Command.READ, id=object_id)
+        indexed_object = OBJECT_INDEX.get_by_id(object_id)
+        object_name = indexed_object.name
 
         LOGGER.debug(
             "Requesting RCT Power data for object %x (%s)...", object_id, object_name
@@ -116,105 +585,259 @@ class RctPowerApiClient:
         request_time = datetime.now()
 
         try:
-            async with asyncio.timeout(READ_TIMEOUT):
-                await writer.drain()
-                writer.write(read_command_frame.data)
+            async with asyncio.timeout(self._read_timeouts.get_timeout(object_id)):
+                await connection.writer.drain()
+                connection.writer.write(indexed_object.read_frame)
+                sent_time = time.monotonic()
 
                 # loop until we return or time out
                 while True:
-                    response_frame = ReceiveFrame()
-
-                    while not response_frame.complete() and not reader.at_eof():
-                        raw_response = await reader.read(1)
-
-                        if len(raw_response) > 0:
-                            response_frame.consume(raw_response)
-
-                    if response_frame.complete():
-                        response_object_info = REGISTRY.get_by_id(response_frame.id)
-                        data_type = response_object_info.response_data_type
-                        received_object_name = response_object_info.name
-
-                        # ignore, if this is not the answer to the latest request
-                        if object_id != response_frame.id:
-                            LOGGER.debug(
-                                "Mismatch of requested and received object ids: requested %x (%s), but received %x (%s)",
-                                object_id,
-                                object_name,
-                                response_frame.id,
-                                received_object_name,
-                            )
-                            continue
-
-                        decoded_value: ApiResponseValue = decode_value(
-                            data_type,  # type: ignore
-                            response_frame.data,
-                        )  # type: ignore
+                    response_frame = await connection.read_frame()
 
+                    if response_frame is None:
                         LOGGER.debug(
-                            "Decoded data for object %x (%s): %s",
-                            response_frame.id,
-                            received_object_name,
-                            decoded_value,
+                            "Error decoding object %x (%s): stream ended",
+                            object_id,
+                            object_name,
+                        )
+                        return InvalidApiResponse(
+                            object_id=object_id, time=request_time, cause="INCOMPLETE"
                         )
 
-                        return ValidApiResponse(
-                            object_id=object_id,
-                            time=request_time,
-                            value=decoded_value,
+                    if response_frame.error is not None:
+                        return _create_error_response(
+                            object_id, request_time, response_frame.error
                         )
-                    else:
+
+                    # ignore, if this is not the answer to the latest request
+                    if object_id != response_frame.object_id:
                         LOGGER.debug(
-                            "Error decoding object %x (%s): %s",
+                            "Mismatch of requested and received object ids: requested %x (%s), but received %x (%s)",
                             object_id,
                             object_name,
-                            response_frame.data,
-                        )
-                        return InvalidApiResponse(
-                            object_id=object_id, time=request_time, cause="INCOMPLETE"
+                            response_frame.object_id,
+                            OBJECT_INDEX.get_name(response_frame.object_id),
                         )
+                        self._handle_unsolicited_frame(response_frame)
+                        continue
+
+                    self._read_timeouts.add_sample(
+                        object_id, time.monotonic() - sent_time
+                    )
+                    return _decode_response(response_frame, request_time)
 
         except TimeoutError as exc:
-            LOGGER.debug(
-                "Error reading object %x (%s): %s", object_id, object_name, str(exc)
-            )
-            return InvalidApiResponse(
-                object_id=object_id,
-                time=request_time,
-                cause="OBJECT_READ_TIMEOUT",
-            )
-        except FrameCRCMismatch as exc:
-            LOGGER.debug(
-                "Error reading object %x (%s): %s", object_id, object_name, str(exc)
-            )
-            return InvalidApiResponse(
-                object_id=object_id, time=request_time, cause="CRC_ERROR"
-            )
-        except FrameLengthExceeded as exc:
-            LOGGER.debug(
-                "Error reading object %x (%s): %s", object_id, object_name, str(exc)
-            )
-            return InvalidApiResponse(
-                object_id=object_id, time=request_time, cause="FRAME_LENGTH_EXCEEDED"
-            )
-        except InvalidCommand as exc:
-            LOGGER.debug(
-                "Error reading object %x (%s): %s", object_id, object_name, str(exc)
-            )
-            return InvalidApiResponse(
-                object_id=object_id, time=request_time, cause="INVALID_COMMAND"
-            )
-        except struct.error as exc:
-            LOGGER.debug(
-                "Error reading object %x (%s): %s", object_id, object_name, str(exc)
-            )
-            return InvalidApiResponse(
-                object_id=object_id, time=request_time, cause="PARSING_ERROR"
-            )
+            self._read_timeouts.add_timeout(object_id)
+            return _create_error_response(object_id, request_time, exc)
         except Exception as exc:
-            LOGGER.debug(
-                "Error reading object %x (%s): %s", object_id, object_name, str(exc)
-            )
-            return InvalidApiResponse(
-                object_id=object_id, time=request_time, cause="UNKNOWN_ERROR"
+            return _create_error_response(object_id, request_time, exc)
+
+    async def _read_objects_pipelined(
+        self,
+        connection: RctPowerConnection,
+        object_ids: deque[int],
+        priority: EntityUpdatePriority,
+        responses: RctPowerData,
+    ) -> None:
+        """Read objects with several requests in flight at the same time.
+
+        Up to `read_window` requests are written back-to-back and the responses
+        are matched to the pending requests by their object id, so the order in
+        which the inverter answers doesn't matter. When preempted, no further
+        requests are written and the requests in flight are completed.
+
+        Error frames without an object id can't be matched to one of several
+        pending requests, so these requests are read again one at a time if
+        they don't get an answer, instead of reporting them as timed out.
+        """
+        queued_object_ids = object_ids
+        # the request times, monotonic send times and monotonic deadlines of
+        # the requests in flight
+        request_times: dict[int, datetime] = {}
+        sent_times: dict[int, float] = {}
+        deadlines: dict[int, float] = {}
+        # the requests that were in flight when an unattributable error frame
+        # arrived
+        ambiguous_object_ids: set[int] = set()
+
+        while deadlines or (queued_object_ids and not self._is_preempted(priority)):
+            while (
+                queued_object_ids
+                and len(deadlines) < self._read_window
+                and not self._is_preempted(priority)
+            ):
+                object_id = queued_object_ids.popleft()
+
+                if object_id in deadlines or object_id in responses:
+                    continue
+
+                indexed_object = OBJECT_INDEX.get_by_id(object_id)
+                LOGGER.debug(
+                    "Requesting RCT Power data for object %x (%s)...",
+                    object_id,
+                    indexed_object.name,
+                )
+                connection.writer.write(indexed_object.read_frame)
+                request_times[object_id] = datetime.now()
+                sent_times[object_id] = time.monotonic()
+                deadlines[object_id] = sent_times[
+                    object_id
+                ] + self._read_timeouts.get_timeout(object_id)
+
+            if not deadlines:
+                continue
+
+            try:
+                await connection.writer.drain()
+
+                async with asyncio.timeout(
+                    max(min(deadlines.values()) - time.monotonic(), 0)
+                ):
+                    response_frame = await connection.read_frame()
+            except TimeoutError as exc:
+                now = time.monotonic()
+
+                for object_id, deadline in list(deadlines.items()):
+                    if deadline <= now:
+                        del deadlines[object_id]
+
+                        if object_id in ambiguous_object_ids:
+                            continue
+
+                        self._read_timeouts.add_timeout(object_id)
+                        responses[object_id] = _create_error_response(
+                            object_id, request_times[object_id], exc
+                        )
+                continue
+
+            if response_frame is None:
+                LOGGER.debug("Stream ended with %d pending requests", len(deadlines))
+
+                for object_id in deadlines:
+                    responses[object_id] = InvalidApiResponse(
+                        object_id=object_id,
+                        time=request_times[object_id],
+                        cause="INCOMPLETE",
+                    )
+                deadlines.clear()
+
+                while queued_object_ids:
+                    object_id = queued_object_ids.popleft()
+                    responses.setdefault(
+                        object_id,
+                        InvalidApiResponse(
+                            object_id=object_id, time=datetime.now(), cause="INCOMPLETE"
+                        ),
+                    )
+                break
+
+            if response_frame.error is not None:
+                # attribute the error to the pending request it belongs to if
+                # possible, otherwise it can't be told apart from noise
+                if response_frame.object_id in deadlines:
+                    object_id = response_frame.object_id
+                elif len(deadlines) == 1:
+                    object_id = next(iter(deadlines))
+                else:
+                    LOGGER.debug(
+                        "Error reading unattributable frame: %s",
+                        str(response_frame.error),
+                    )
+                    ambiguous_object_ids.update(deadlines)
+                    continue
+
+                del deadlines[object_id]
+                responses[object_id] = _create_error_response(
+                    object_id, request_times[object_id], response_frame.error
+                )
+                continue
+
+            object_id = response_frame.object_id
+
+            if object_id not in deadlines:
+                LOGGER.debug(
+                    "Received object %x (%s) without a pending request",
+                    object_id,
+                    OBJECT_INDEX.get_name(object_id),
+                )
+                self._handle_unsolicited_frame(response_frame)
+                continue
+
+            del deadlines[object_id]
+            self._read_timeouts.add_sample(
+                object_id, time.monotonic() - sent_times[object_id]
             )
+            try:
+                responses[object_id] = _decode_response(
+                    response_frame, request_times[object_id]
+                )
+            except Exception as exc:
+                responses[object_id] = _create_error_response(
+                    object_id, request_times[object_id], exc
+                )
+
+        for object_id in ambiguous_object_ids - responses.keys():
+            if connection.is_usable:
+                responses[object_id] = await self._read_object(connection, object_id)
+            else:
+                responses[object_id] = InvalidApiResponse(
+                    object_id=object_id,
+                    time=request_times[object_id],
+                    cause="INCOMPLETE",
+                )
+
+
+def _create_background_task(
+    target: Coroutine[Any, Any, None], name: str
+) -> asyncio.Task[None]:
+    return asyncio.get_running_loop().create_task(target, name=name)
+
+
+def _log_listener_error(task: asyncio.Task[None]) -> None:
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        LOGGER.error("Stopped listening for unrequested objects: %s", exc, exc_info=exc)
+
+
+def _decode_response(
+    response_frame: DecodedFrame, request_time: datetime
+) -> ValidApiResponse:
+    indexed_object = OBJECT_INDEX.get_by_id(response_frame.object_id)
+    decoded_value = indexed_object.decode(response_frame.payload)
+
+    LOGGER.debug(
+        "Decoded data for object %x (%s): %s",
+        response_frame.object_id,
+        indexed_object.name,
+        decoded_value,
+    )
+
+    return ValidApiResponse(
+        object_id=response_frame.object_id,
+        time=request_time,
+        value=decoded_value,
+    )
+
+
+def _create_error_response(
+    object_id: int, request_time: datetime, exc: Exception
+) -> InvalidApiResponse:
+    LOGGER.debug(
+        "Error reading object %x (%s): %s",
+        object_id,
+        OBJECT_INDEX.get_name(object_id),
+        str(exc),
+    )
+
+    match exc:
+        case TimeoutError():
+            cause = "OBJECT_READ_TIMEOUT"
+        case FrameCRCMismatch():
+            cause = "CRC_ERROR"
+        case InvalidCommand():
+            cause = "INVALID_COMMAND"
+        case struct.error():
+            cause = "PARSING_ERROR"
+        case _:
+            cause = "UNKNOWN_ERROR"
+
+    return InvalidApiResponse(object_id=object_id, time=request_time, cause=cause)
@@ -0,0 +1,420 @@
+"""Test the RCT Power API client against a simulated inverter."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from rctclient.registry import REGISTRY
+
+from custom_components.rct_power.const import EntityUpdatePriority
+from custom_components.rct_power.lib import api
+from custom_components.rct_power.lib.api import (
+    InvalidApiResponse,
+    RctPowerApiClient,
+    ValidApiResponse,
+)
+from tests.simulator import RctPowerSimulator
+
+INVERTER_SN_OID = REGISTRY.get_by_name("inverter_sn").object_id
+BATTERY_SOC_OID = REGISTRY.get_by_name("battery.soc").object_id
+GRID_POWER_OID = REGISTRY.get_by_name("g_sync.p_ac_grid_sum_lp").object_id
+
+
+@pytest.fixture(autouse=True)
+def short_read_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Avoid waiting for the full timeout for unanswered requests."""
+    monkeypatch.setattr(api, "READ_TIMEOUT", 0.2)
+
+
+@pytest.fixture(name="frequent_object_ids")
+def frequent_object_ids_fixture(rct_simulator: RctPowerSimulator) -> list[int]:
+    """Set up a handful of objects with distinct values."""
+    rct_simulator.set_value_by_name("inverter_sn", "SIMULATED")
+    rct_simulator.set_value_by_name("battery.soc", 0.5)
+    rct_simulator.set_value_by_name("g_sync.p_ac_grid_sum_lp", -1234.5)
+
+    return [INVERTER_SN_OID, BATTERY_SOC_OID, GRID_POWER_OID]
+
+
+def get_values(data: api.RctPowerData) -> dict[int, api.ApiResponseValue | None]:
+    return {
+        object_id: response.value if isinstance(response, ValidApiResponse) else None
+        for object_id, response in data.items()
+    }
+
+
+@pytest.mark.parametrize("read_window", [1, 8])
+async def test_reads_objects(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    read_window: int,
+) -> None:
+    """Test that responses are matched to the requests even if reordered."""
+    rct_simulator.config.latency = 0.02
+    rct_simulator.config.jitter = 0.02
+    client = RctPowerApiClient("127.0.0.1", rct_simulator.port, read_window=read_window)
+
+    data = await client.async_get_data(frequent_object_ids)
+
+    assert list(data) == frequent_object_ids
+    assert get_values(data) == {
+        INVERTER_SN_OID: "SIMULATED",
+        BATTERY_SOC_OID: 0.5,
+        GRID_POWER_OID: -1234.5,
+    }
+
+
+@pytest.mark.parametrize("read_window", [1, 8])
+async def test_reports_failed_objects(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    read_window: int,
+) -> None:
+    """Test that unanswered and corrupted objects are reported as invalid."""
+    del rct_simulator.objects[BATTERY_SOC_OID]
+    client = RctPowerApiClient("127.0.0.1", rct_simulator.port, read_window=read_window)
+
+    data = await client.async_get_data(frequent_object_ids)
+
+    assert isinstance(data[INVERTER_SN_OID], ValidApiResponse)
+    assert isinstance(timed_out_response := data[BATTERY_SOC_OID], InvalidApiResponse)
+    assert timed_out_response.cause == "OBJECT_READ_TIMEOUT"
+
+    rct_simulator.config.crc_error_rate = 1
+
+    data = await client.async_get_data([INVERTER_SN_OID])
+
+    assert isinstance(corrupted_response := data[INVERTER_SN_OID], InvalidApiResponse)
+    assert corrupted_response.cause == "CRC_ERROR"
+
+
+async def test_reuses_persistent_connection(
+    rct_simulator: RctPowerSimulator, frequent_object_ids: list[int]
+) -> None:
+    """Test that only one connection is opened in persistent mode."""
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, persistent_connection=True
+    )
+
+    await client.async_get_data(frequent_object_ids)
+    await client.async_get_data(frequent_object_ids)
+    client.close()
+
+    assert rct_simulator.statistics.connections == 1
+
+
+async def test_reconnects_after_connection_was_closed(
+    rct_simulator: RctPowerSimulator, frequent_object_ids: list[int]
+) -> None:
+    """Test that a connection closed by the inverter is replaced."""
+    rct_simulator.config.close_after_requests = len(frequent_object_ids)
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, persistent_connection=True
+    )
+
+    await client.async_get_data(frequent_object_ids)
+    # give the client a chance to notice the closed stream
+    await asyncio.sleep(0.05)
+    data = await client.async_get_data(frequent_object_ids)
+    client.close()
+
+    assert rct_simulator.statistics.connections == 2
+    assert all(isinstance(response, ValidApiResponse) for response in data.values())
+
+
+async def test_backs_off_after_connection_timeouts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a host that doesn't answer isn't connected to at every request."""
+    connection_attempts = 0
+
+    async def open_connection(**_kwargs: Any) -> None:
+        nonlocal connection_attempts
+        connection_attempts += 1
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(api, "open_connection", open_connection)
+    monkeypatch.setattr(api, "CONNECTION_TIMEOUT", 0.05)
+    client = RctPowerApiClient("192.0.2.1", 8899, persistent_connection=True)
+
+    with pytest.raises(UpdateFailed, match="Timed out connecting"):
+        await client.async_get_data([INVERTER_SN_OID])
+
+    with pytest.raises(UpdateFailed, match="before reconnecting"):
+        await client.async_get_data([INVERTER_SN_OID])
+
+    assert connection_attempts == 1
+
+
+async def test_harvests_responses_requested_by_other_clients(
+    rct_simulator: RctPowerSimulator, frequent_object_ids: list[int]
+) -> None:
+    """Test that recently harvested objects aren't requested again."""
+    rct_simulator.config.broadcast_responses = True
+    listening_client = RctPowerApiClient(
+        "127.0.0.1",
+        rct_simulator.port,
+        persistent_connection=True,
+        passive_listening=True,
+    )
+    other_client = RctPowerApiClient("127.0.0.1", rct_simulator.port)
+
+    await listening_client.async_get_data([INVERTER_SN_OID])
+    await other_client.async_get_data([BATTERY_SOC_OID, GRID_POWER_OID])
+    await asyncio.sleep(0.05)
+    data = await listening_client.async_get_data(
+        frequent_object_ids, max_age=timedelta(minutes=1)
+    )
+    listening_client.close()
+
+    assert get_values(data)[BATTERY_SOC_OID] == 0.5
+    assert rct_simulator.statistics.requests[BATTERY_SOC_OID] == 1
+    assert rct_simulator.statistics.requests[INVERTER_SN_OID] == 2
+
+
+async def test_receives_pushed_objects(
+    rct_simulator: RctPowerSimulator, frequent_object_ids: list[int]
+) -> None:
+    """Test that objects pushed after subscribing are passed to the listener."""
+    rct_simulator.config.periodic_read_interval = 0.02
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, persistent_connection=True
+    )
+    pushed_responses: list[ValidApiResponse] = []
+
+    await client.async_subscribe([BATTERY_SOC_OID], pushed_responses.append)
+    await client.async_get_data([INVERTER_SN_OID])
+    await asyncio.sleep(0.1)
+    client.close()
+
+    assert len(pushed_responses) > 1
+    assert {response.value for response in pushed_responses} == {0.5}
+
+
+@pytest.mark.parametrize("read_window", [1, 8])
+async def test_preempts_requests_of_lower_priority(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    read_window: int,
+) -> None:
+    """Test that frequent objects don't wait for a slow request to finish."""
+    rct_simulator.config.latency = 0.03
+    static_object_ids = [
+        object_id
+        for object_id in rct_simulator.objects
+        if object_id not in frequent_object_ids
+    ][:24]
+    client = RctPowerApiClient("127.0.0.1", rct_simulator.port, read_window=read_window)
+    completed_priorities: list[EntityUpdatePriority] = []
+
+    async def get_data(
+        object_ids: list[int], priority: EntityUpdatePriority
+    ) -> api.RctPowerData:
+        data = await client.async_get_data(object_ids, priority=priority)
+        completed_priorities.append(priority)
+        return data
+
+    static_request = asyncio.create_task(
+        get_data(static_object_ids, EntityUpdatePriority.STATIC)
+    )
+    await asyncio.sleep(0.04)
+    frequent_data = await get_data(frequent_object_ids, EntityUpdatePriority.FREQUENT)
+    static_data = await static_request
+
+    assert completed_priorities == [
+        EntityUpdatePriority.FREQUENT,
+        EntityUpdatePriority.STATIC,
+    ]
+    assert list(static_data) == static_object_ids
+    assert all(
+        isinstance(response, ValidApiResponse)
+        for response in [*frequent_data.values(), *static_data.values()]
+    )
+    # the connection is handed over instead of being reopened
+    assert rct_simulator.statistics.connections == 1
+
+
+@pytest.mark.parametrize("read_window", [1, 8])
+async def test_adapts_read_timeouts_to_latency(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    read_window: int,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that lost responses only cost as long as the usual latency."""
+    monkeypatch.setattr(api, "READ_TIMEOUT", 2)
+    rct_simulator.config.latency = 0.01
+    client = RctPowerApiClient(
+        "127.0.0.1",
+        rct_simulator.port,
+        persistent_connection=True,
+        read_window=read_window,
+        min_read_timeout=0.05,
+        retry_budget=0,
+    )
+
+    for _ in range(5):
+        await client.async_get_data(frequent_object_ids)
+
+    assert set(client.read_timeouts) == set(frequent_object_ids)
+    assert all(timeout < 0.5 for timeout in client.read_timeouts.values())
+
+    del rct_simulator.objects[BATTERY_SOC_OID]
+    started = asyncio.get_running_loop().time()
+    data = await client.async_get_data(frequent_object_ids)
+
+    assert asyncio.get_running_loop().time() - started < 0.5
+    assert isinstance(data[BATTERY_SOC_OID], InvalidApiResponse)
+    assert client.read_timeouts[BATTERY_SOC_OID] > 0.05
+    client.close()
+
+
+@pytest.mark.parametrize("read_window", [1, 8])
+async def test_retries_failed_objects(
+    rct_simulator: RctPowerSimulator, read_window: int
+) -> None:
+    """Test that corrupted responses are requested again within the request."""
+    rct_simulator.config.crc_error_rate = 0.5
+    object_ids = list(rct_simulator.objects)[:24]
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, read_window=read_window, retry_budget=10
+    )
+
+    data = await client.async_get_data(object_ids)
+
+    assert list(data) == object_ids
+    assert any(response.retries for response in data.values())
+    assert all(
+        isinstance(response, ValidApiResponse)
+        or response.retries == api.MAX_RETRY_ATTEMPTS
+        for response in data.values()
+    )
+
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, read_window=read_window, retry_budget=0
+    )
+
+    data = await client.async_get_data(object_ids)
+
+    assert not any(response.retries for response in data.values())
+
+
+@pytest.mark.parametrize("read_window", [1, 8])
+async def test_scales_request_timeout_with_object_count(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    read_window: int,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that many unanswered objects don't time out the whole request."""
+    monkeypatch.setattr(api, "CONNECTION_TIMEOUT", 0.5)
+    unanswered_object_ids = list(rct_simulator.objects)[-6:]
+
+    for object_id in unanswered_object_ids:
+        del rct_simulator.objects[object_id]
+
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, read_window=read_window, retry_budget=0
+    )
+
+    data = await client.async_get_data(frequent_object_ids + unanswered_object_ids)
+
+    assert get_values(data) == {
+        INVERTER_SN_OID: "SIMULATED",
+        BATTERY_SOC_OID: 0.5,
+        GRID_POWER_OID: -1234.5,
+        **dict.fromkeys(unanswered_object_ids),
+    }
+
+
+async def test_returns_partial_data_of_timed_out_requests(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the objects read before a request timed out are kept."""
+    monkeypatch.setattr(
+        RctPowerApiClient, "_get_request_timeout", lambda _self, _object_ids: 0.3
+    )
+    unanswered_object_ids = list(rct_simulator.objects)[-6:]
+
+    for object_id in unanswered_object_ids:
+        del rct_simulator.objects[object_id]
+
+    client = RctPowerApiClient("127.0.0.1", rct_simulator.port, retry_budget=0)
+
+    data = await client.async_get_data(frequent_object_ids + unanswered_object_ids)
+
+    assert list(data) == frequent_object_ids + unanswered_object_ids
+    assert get_values(data) == {
+        INVERTER_SN_OID: "SIMULATED",
+        BATTERY_SOC_OID: 0.5,
+        GRID_POWER_OID: -1234.5,
+        **dict.fromkeys(unanswered_object_ids),
+    }
+    assert all(
+        isinstance(response := data[object_id], InvalidApiResponse)
+        and response.cause == "OBJECT_READ_TIMEOUT"
+        for object_id in unanswered_object_ids
+    )
+
+
+async def test_attributes_invalid_command_frames_of_pipelined_reads(
+    rct_simulator: RctPowerSimulator, frequent_object_ids: list[int]
+) -> None:
+    """Test that rejected objects aren't reported as timed out."""
+    del rct_simulator.objects[BATTERY_SOC_OID]
+    rct_simulator.rejected_object_ids.add(BATTERY_SOC_OID)
+    client = RctPowerApiClient(
+        "127.0.0.1", rct_simulator.port, read_window=8, retry_budget=0
+    )
+
+    data = await client.async_get_data(frequent_object_ids)
+
+    assert get_values(data) == {
+        INVERTER_SN_OID: "SIMULATED",
+        BATTERY_SOC_OID: None,
+        GRID_POWER_OID: -1234.5,
+    }
+    assert isinstance(rejected_response := data[BATTERY_SOC_OID], InvalidApiResponse)
+    assert rejected_response.cause == "INVALID_COMMAND"
+
+
+async def test_logs_errors_of_the_listener(
+    rct_simulator: RctPowerSimulator,
+    frequent_object_ids: list[int],
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that the listener runs as a background task whose errors are logged."""
+    tasks: list[asyncio.Task[None]] = []
+
+    def create_background_task(
+        target: Coroutine[Any, Any, None], name: str
+    ) -> asyncio.Task[None]:
+        tasks.append(asyncio.get_running_loop().create_task(target, name=name))
+        return tasks[-1]
+
+    async def listen(_connection: api.RctPowerConnection) -> None:
+        raise RuntimeError("Listener failed")
+
+    client = RctPowerApiClient(
+        "127.0.0.1",
+        rct_simulator.port,
+        persistent_connection=True,
+        passive_listening=True,
+        create_background_task=create_background_task,
+    )
+    monkeypatch.setattr(client, "_async_listen", listen)
+
+    await client.async_get_data(frequent_object_ids)
+    await asyncio.wait(tasks)
+    await asyncio.sleep(0)
+
+    assert "Stopped listening for unrequested objects: Listener failed" in caplog.text
+    client.close()
@@ -0,0 +1,37 @@
+"""Filtering of insignificant changes of numeric sensor states."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import SensorDeviceClass
+
+# the time after which a change is written even if it's insignificant
+DEFAULT_DEADBAND_MAX_INTERVAL = 600  # in seconds
+
+
+@dataclass(frozen=True, kw_only=True)
+class Deadband:
+    """The changes of a state that are too small to be written.
+
+    A change is significant if it reaches the absolute threshold or the
+    relative threshold in relation to the last written state, whichever is
+    larger. Without thresholds, all changes are significant.
+    """
+
+    absolute: float = 0
+    relative: float = 0
+    max_interval: float = DEFAULT_DEADBAND_MAX_INTERVAL  # in seconds
+
+    def is_significant(self, last_value: float, value: float) -> bool:
+        threshold = max(self.absolute, abs(last_value) * self.relative)
+        return threshold <= 0 or abs(value - last_value) >= threshold
+
+
+DEFAULT_DEADBANDS: dict[SensorDeviceClass, Deadband] = {
+    SensorDeviceClass.CURRENT: Deadband(absolute=0.05),
+    SensorDeviceClass.FREQUENCY: Deadband(absolute=0.01),
+    SensorDeviceClass.POWER: Deadband(absolute=10, relative=0.01),
+    SensorDeviceClass.TEMPERATURE: Deadband(absolute=0.2),
+    SensorDeviceClass.VOLTAGE: Deadband(absolute=0.5),
+}
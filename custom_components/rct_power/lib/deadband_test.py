@@ -0,0 +1,101 @@
+"""Test the filtering of insignificant state changes."""
+
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rct_power.lib.deadband import Deadband
+from custom_components.rct_power.lib.entities import inverter_sensor_entity_descriptions
+from custom_components.rct_power.lib.entity import RctPowerSensorEntity
+
+
+def test_detects_significant_changes() -> None:
+    """Test that the larger of the absolute and relative thresholds applies."""
+    deadband = Deadband(absolute=10, relative=0.01)
+
+    assert not deadband.is_significant(100, 109)
+    assert deadband.is_significant(100, 90)
+    assert not deadband.is_significant(5000, 5049)
+    assert deadband.is_significant(5000, 4950)
+    assert Deadband().is_significant(100, 100.1)
+
+
+def create_entity(hass: HomeAssistant) -> RctPowerSensorEntity:
+    entity_description = next(
+        entity_description
+        for entity_description in inverter_sensor_entity_descriptions
+        if entity_description.key == "g_sync.p_ac_sum"
+    )
+    entity = RctPowerSensorEntity([], MagicMock(), entity_description)
+    entity.hass = hass
+    return entity
+
+
+async def test_suppresses_insignificant_state_writes(hass: HomeAssistant) -> None:
+    """Test that jitter isn't written until the maximum interval passed."""
+    entity = create_entity(hass)
+    values = iter([1000.0, 1005.0, 1100.0, 1101.0])
+    written_values: list[float] = []
+
+    with (
+        patch.object(
+            RctPowerSensorEntity,
+            "native_value",
+            property(lambda _entity: next(values)),
+        ),
+        patch.object(RctPowerSensorEntity, "available", True),
+        patch.object(
+            RctPowerSensorEntity,
+            "async_write_ha_state",
+            lambda entity: written_values.append(entity._last_written_value),
+        ),
+    ):
+        for _update in range(3):
+            entity._handle_coordinator_update()
+
+        assert written_values == [1000.0, 1100.0]
+
+        entity._last_write_time = time.monotonic() - entity.deadband.max_interval
+        entity._handle_coordinator_update()
+
+        assert written_values == [1000.0, 1100.0, 1101.0]
+
+
+async def test_writes_suppressed_state_after_max_interval(
+    hass: HomeAssistant,
+) -> None:
+    """Test that a suppressed value is written even if it stops changing."""
+    entity = create_entity(hass)
+    value = 9.0
+    written_values: list[float] = []
+
+    with (
+        patch.object(
+            RctPowerSensorEntity, "native_value", property(lambda _entity: value)
+        ),
+        patch.object(RctPowerSensorEntity, "available", True),
+        patch.object(
+            RctPowerSensorEntity,
+            "async_write_ha_state",
+            lambda entity: written_values.append(entity._last_written_value),
+        ),
+    ):
+        entity._handle_coordinator_update()
+        value = 0.0
+        entity._handle_coordinator_update()
+
+        assert written_values == [9.0]
+
+        async_fire_time_changed(
+            hass,
+            dt_util.utcnow() + timedelta(seconds=entity.deadband.max_interval + 1),
+        )
+        await hass.async_block_till_done()
+
+        assert written_values == [9.0, 0.0]
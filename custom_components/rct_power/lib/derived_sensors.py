@@ -0,0 +1,235 @@
+"""Sensors whose values are computed from the values of other objects."""
+
+from __future__ import annotations
+
+import ast
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.util import slugify
+
+from .api import ApiResponseValue
+from .const import NUMERIC_STATE_DECIMAL_DIGITS
+from .device_info_helpers import get_inverter_device_info
+from .entity import RctPowerSensorEntityDescription
+from .object_index import OBJECT_INDEX
+
+# e.g. `House Load [W] = {g_sync.p_ac_load_sum_lp} + {g_sync.p_acc_lp}` or
+# `Solar Energy [Wh] (total_increasing) = {energy.e_dc_total[0]} +
+# {energy.e_dc_total[1]}`
+DEFINITION_PATTERN = re.compile(
+    r"^(?P<name>[^=\[\]]+?)\s*(?:\[(?P<unit>[^\]]*)\])?"
+    r"\s*(?:\((?P<state_class>measurement|total|total_increasing)\))?"
+    r"\s*=\s*(?P<formula>.+)$"
+)
+REFERENCE_PATTERN = re.compile(r"\{([^{}]+)\}")
+FORMULA_FUNCTIONS = {"abs": abs, "min": min, "max": max}
+# the minimum and maximum numbers of the arguments of the functions
+FORMULA_FUNCTION_ARITIES: dict[str, tuple[int, int | None]] = {
+    "abs": (1, 1),
+    "min": (2, None),
+    "max": (2, None),
+}
+FORMULA_NODE_TYPES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.UAdd,
+    ast.USub,
+    ast.Constant,
+    ast.Name,
+    ast.Load,
+    ast.Call,
+)
+
+
+class InvalidFormulaError(ValueError):
+    pass
+
+
+class Formula:
+    """An arithmetic expression over the values of objects, compiled once.
+
+    Objects are referenced by their names in braces and the expression may use
+    the four basic arithmetic operations as well as `abs`, `min` and `max`.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        # the referenced objects in the order of their first reference
+        self.object_names = list(dict.fromkeys(REFERENCE_PATTERN.findall(expression)))
+
+        if not self.object_names:
+            raise InvalidFormulaError(f"No objects in formula: {expression}")
+
+        for object_name in self.object_names:
+            if not OBJECT_INDEX.has_name(object_name):
+                raise InvalidFormulaError(f"Unknown object: {object_name}")
+
+        variables = {
+            object_name: f"_{index}"
+            for index, object_name in enumerate(self.object_names)
+        }
+        python_expression = REFERENCE_PATTERN.sub(
+            lambda match: variables[match.group(1)], expression
+        )
+
+        try:
+            tree = ast.parse(python_expression.strip(), mode="eval")
+        except SyntaxError as exc:
+            raise InvalidFormulaError(f"Invalid formula: {expression}") from exc
+
+        for node in ast.walk(tree):
+            if (
+                not isinstance(node, FORMULA_NODE_TYPES)
+                or (
+                    isinstance(node, ast.Constant)
+                    and (
+                        isinstance(node.value, bool)
+                        or not isinstance(node.value, int | float)
+                    )
+                )
+                or (
+                    isinstance(node, ast.Name)
+                    and node.id not in FORMULA_FUNCTIONS
+                    and node.id not in variables.values()
+                )
+                or (isinstance(node, ast.Call) and not _is_valid_call(node))
+            ):
+                raise InvalidFormulaError(f"Unsupported formula: {expression}")
+
+        self._code = compile(tree, "<formula>", "eval")
+
+    def evaluate(self, values: Sequence[ApiResponseValue | None]) -> float | None:
+        """Evaluate the formula with the values of the objects in their order.
+
+        The result is unknown if a value is missing or not numeric, or if the
+        formula can't be evaluated for the values, e.g. due to a division by
+        zero.
+        """
+        variables: dict[str, object] = {"__builtins__": {}, **FORMULA_FUNCTIONS}
+
+        for index, value in enumerate(values):
+            if not isinstance(value, int | float) or isinstance(value, bool):
+                return None
+
+            variables[f"_{index}"] = value
+
+        try:
+            return float(eval(self._code, variables))
+        except ArithmeticError:
+            return None
+
+
+def _is_valid_call(node: ast.Call) -> bool:
+    if not isinstance(node.func, ast.Name) or node.func.id not in FORMULA_FUNCTIONS:
+        return False
+
+    min_arguments, max_arguments = FORMULA_FUNCTION_ARITIES[node.func.id]
+
+    return (
+        not node.keywords
+        and not any(isinstance(argument, ast.Starred) for argument in node.args)
+        and len(node.args) >= min_arguments
+        and (max_arguments is None or len(node.args) <= max_arguments)
+    )
+
+
+@dataclass(frozen=True)
+class DerivedSensor:
+    name: str
+    unit: str | None
+    state_class: SensorStateClass
+    formula: Formula
+
+
+def parse_derived_sensors(definitions: str) -> list[DerivedSensor]:
+    """Parse the definitions of the derived sensors, one per line.
+
+    Each definition consists of a name, an optional unit in brackets, an
+    optional state class in parentheses, which defaults to `measurement`, and
+    the formula, e.g. `Solar Power [W] = {dc_conv.dc_conv_struct[0].p_dc} +
+    {dc_conv.dc_conv_struct[1].p_dc}`. Formulas may refer to sensors defined
+    in earlier lines by their name in braces, which are expanded into their
+    formulas, so the sensors only depend on objects. Names must differ in
+    more than case and punctuation, since the sensors are identified by their
+    slugified names.
+    """
+    derived_sensors: list[DerivedSensor] = []
+    # the expressions of the sensors defined so far by their name
+    expressions: dict[str, str] = {}
+    # the names of the sensors defined so far by their slug
+    names: dict[str, str] = {}
+
+    for line in definitions.splitlines():
+        line = line.strip()
+
+        if not line or line.startswith("#"):
+            continue
+
+        match = DEFINITION_PATTERN.match(line)
+
+        if match is None:
+            raise InvalidFormulaError(f"Invalid definition: {line}")
+
+        name = match.group("name")
+
+        if name in expressions:
+            raise InvalidFormulaError(f"Duplicate name: {name}")
+
+        if (other_name := names.setdefault(slugify(name), name)) != name:
+            raise InvalidFormulaError(f"Name {name} collides with {other_name}")
+
+        expression = REFERENCE_PATTERN.sub(
+            lambda reference: (
+                f"({expressions[reference.group(1)]})"
+                if reference.group(1) in expressions
+                and not OBJECT_INDEX.has_name(reference.group(1))
+                else reference.group(0)
+            ),
+            match.group("formula"),
+        )
+        expressions[name] = expression
+        derived_sensors.append(
+            DerivedSensor(
+                name=name,
+                unit=match.group("unit") or None,
+                state_class=SensorStateClass(
+                    match.group("state_class") or SensorStateClass.MEASUREMENT
+                ),
+                formula=Formula(expression),
+            )
+        )
+
+    return derived_sensors
+
+
+def get_derived_sensor_entity_description(
+    derived_sensor: DerivedSensor,
+) -> RctPowerSensorEntityDescription:
+    formula = derived_sensor.formula
+
+    def get_native_value(
+        entity: object, values: list[ApiResponseValue | None]
+    ) -> float | None:
+        value = formula.evaluate(values)
+        return round(value, NUMERIC_STATE_DECIMAL_DIGITS) if value is not None else None
+
+    return RctPowerSensorEntityDescription(
+        get_device_info=get_inverter_device_info,
+        key=f"derived.{slugify(derived_sensor.name)}",
+        # the objects are only used to resolve the values of the formula, so
+        # neither their units nor their device classes apply to the sensor
+        object_names=formula.object_names,
+        name=derived_sensor.name,
+        unique_id=f"derived-{slugify(derived_sensor.name)}",
+        native_unit_of_measurement=derived_sensor.unit,
+        state_class=derived_sensor.state_class,
+        get_native_value=get_native_value,
+    )
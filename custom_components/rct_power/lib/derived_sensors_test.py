@@ -0,0 +1,122 @@
+"""Test the parsing and evaluation of the derived sensors."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.components.sensor import SensorStateClass
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.rct_power.const import DOMAIN
+from custom_components.rct_power.coordinator import RctPowerDataUpdateCoordinator
+from custom_components.rct_power.lib.derived_sensors import (
+    Formula,
+    InvalidFormulaError,
+    get_derived_sensor_entity_description,
+    parse_derived_sensors,
+)
+from custom_components.rct_power.lib.entity import RctPowerDerivedSensorEntity
+
+DEFINITIONS = """
+# the power of both solar generators
+Solar Power [W] = {dc_conv.dc_conv_struct[0].p_dc} + {dc_conv.dc_conv_struct[1].p_dc}
+Self Consumption = min({Solar Power}, {g_sync.p_ac_load_sum_lp}) / {Solar Power}
+Solar Energy [kWh] (total_increasing) = ({energy.e_dc_total[0]} + {energy.e_dc_total[1]}) / 1000
+Power (AC) = {g_sync.p_ac_load_sum_lp}
+"""
+
+
+def test_parses_derived_sensors() -> None:
+    """Test that sensors can be defined in terms of objects and earlier sensors."""
+    solar_power, self_consumption, solar_energy, ac_power = parse_derived_sensors(
+        DEFINITIONS
+    )
+
+    assert solar_power.name == "Solar Power"
+    assert solar_power.unit == "W"
+    assert solar_power.state_class == SensorStateClass.MEASUREMENT
+    assert solar_power.formula.evaluate([100.0, 200]) == 300
+
+    assert self_consumption.unit is None
+    assert self_consumption.formula.object_names == [
+        "dc_conv.dc_conv_struct[0].p_dc",
+        "dc_conv.dc_conv_struct[1].p_dc",
+        "g_sync.p_ac_load_sum_lp",
+    ]
+    assert self_consumption.formula.evaluate([100.0, 200.0, 150.0]) == 0.5
+    # unknown values and divisions by zero make the result unknown
+    assert self_consumption.formula.evaluate([0.0, 0.0, 150.0]) is None
+    assert self_consumption.formula.evaluate([100.0, None, 150.0]) is None
+
+    assert solar_energy.unit == "kWh"
+    assert solar_energy.state_class == SensorStateClass.TOTAL_INCREASING
+    # parentheses in names aren't taken for state classes
+    assert ac_power.name == "Power (AC)"
+    assert ac_power.state_class == SensorStateClass.MEASUREMENT
+
+
+def test_creates_entity_descriptions() -> None:
+    """Test that the derived sensors read the objects of their formulas."""
+    solar_power, _self_consumption, solar_energy, _ac_power = parse_derived_sensors(
+        DEFINITIONS
+    )
+    entity_description = get_derived_sensor_entity_description(solar_power)
+
+    assert entity_description.object_names == solar_power.formula.object_names
+    assert entity_description.unique_id == "derived-solar_power"
+    assert entity_description.native_unit_of_measurement == "W"
+    assert (
+        get_derived_sensor_entity_description(solar_energy).state_class
+        == SensorStateClass.TOTAL_INCREASING
+    )
+
+
+def test_doesnt_inherit_unit_and_device_class_of_objects() -> None:
+    """Test that derived sensors without a unit don't take that of an object."""
+    (derived_sensor,) = parse_derived_sensors("Load = {g_sync.p_ac_load_sum_lp}")
+    coordinator = MagicMock(spec=RctPowerDataUpdateCoordinator)
+    entity = RctPowerDerivedSensorEntity(
+        coordinators=[coordinator],
+        config_entry=MockConfigEntry(domain=DOMAIN),
+        entity_description=get_derived_sensor_entity_description(derived_sensor),
+    )
+
+    assert entity.native_unit_of_measurement is None
+    assert entity.device_class is None
+    assert entity.deadband is None
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "{unknown.object} + 1",
+        "1 + 2",
+        "{battery.soc} +",
+        "{battery.soc}.__class__",
+        "__import__('os')",
+        "{battery.soc} ** 2",
+        "'text'",
+        "abs() + {battery.soc}",
+        "abs({battery.soc}, 1)",
+        "min({battery.soc})",
+        "max({battery.soc})",
+        "min(*{battery.soc})",
+        "max({battery.soc}, key=1)",
+    ],
+)
+def test_rejects_invalid_formulas(expression: str) -> None:
+    """Test that formulas are restricted to arithmetic over known objects."""
+    with pytest.raises(InvalidFormulaError):
+        Formula(expression)
+
+
+def test_rejects_duplicate_names() -> None:
+    with pytest.raises(InvalidFormulaError):
+        parse_derived_sensors("A = {battery.soc}\nA = {battery.soc} * 100")
+
+
+def test_rejects_names_with_colliding_slugs() -> None:
+    """Test that names must differ in more than what is lost in their ids."""
+    with pytest.raises(InvalidFormulaError, match="collides with PV Total"):
+        parse_derived_sensors("PV Total = {battery.soc}\npv-total = {battery.soc}")
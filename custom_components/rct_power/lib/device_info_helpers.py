@@ -1,14 +1,56 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from homeassistant.helpers.device_registry import DeviceInfo
 
 from ..const import BATTERY_MODEL, DOMAIN, INVERTER_MODEL, NAME
 from .entity import RctPowerEntity
+from .object_index import OBJECT_INDEX
+
+INVERTER_SN_OID = OBJECT_INDEX.get_object_id("inverter_sn")
+ANDROID_DESCRIPTION_OID = OBJECT_INDEX.get_object_id("android_description")
+SVNVERSION_OID = OBJECT_INDEX.get_object_id("svnversion")
+BMS_SN_OID = OBJECT_INDEX.get_object_id("battery.bms_sn")
+BMS_SOFTWARE_VERSION_OID = OBJECT_INDEX.get_object_id("battery.bms_software_version")
+# the device infos of a few inverters and batteries, which are only created
+# again if the values they are made of change
+DEVICE_INFO_CACHE_SIZE = 16
 
 
 def get_inverter_device_info(entity: RctPowerEntity) -> DeviceInfo:
-    inverter_sn = str(entity.get_valid_api_response_value_by_name("inverter_sn", None))
+    return _create_inverter_device_info(
+        inverter_sn=str(
+            entity.get_valid_api_response_value_by_id(INVERTER_SN_OID, None)
+        ),
+        android_description=str(
+            entity.get_valid_api_response_value_by_id(ANDROID_DESCRIPTION_OID, "")
+        ),
+        svnversion=str(entity.get_valid_api_response_value_by_id(SVNVERSION_OID, "")),
+    )
 
+
+def get_battery_device_info(entity: RctPowerEntity) -> DeviceInfo:
+    return _create_battery_device_info(
+        bms_sn=str(entity.get_valid_api_response_value_by_id(BMS_SN_OID, None)),
+        android_description=str(
+            entity.get_valid_api_response_value_by_id(ANDROID_DESCRIPTION_OID, "")
+        ),
+        bms_software_version=str(
+            entity.get_valid_api_response_value_by_id(BMS_SOFTWARE_VERSION_OID, "")
+        ),
+        inverter_sn=str(
+            entity.get_valid_api_response_value_by_id(INVERTER_SN_OID, None)
+        ),
+    )
+
+
+# the device infos are shared by all entities of a device, so they must not be
+# modified
+@lru_cache(maxsize=DEVICE_INFO_CACHE_SIZE)
+def _create_inverter_device_info(
+    *, inverter_sn: str, android_description: str, svnversion: str
+) -> DeviceInfo:
     return DeviceInfo(
         identifiers={
             (
@@ -21,18 +63,21 @@ def get_inverter_device_info(entity: RctPowerEntity) -> DeviceInfo:
                 inverter_sn,
             ),
         },  # type: ignore
-        name=str(
-            entity.get_valid_api_response_value_by_name("android_description", ""),
-        ),
-        sw_version=str(entity.get_valid_api_response_value_by_name("svnversion", "")),
+        name=android_description,
+        sw_version=svnversion,
         model=INVERTER_MODEL,
         manufacturer=NAME,
     )
 
 
-def get_battery_device_info(entity: RctPowerEntity) -> DeviceInfo:
-    bms_sn = str(entity.get_valid_api_response_value_by_name("battery.bms_sn", None))
-
+@lru_cache(maxsize=DEVICE_INFO_CACHE_SIZE)
+def _create_battery_device_info(
+    *,
+    bms_sn: str,
+    android_description: str,
+    bms_software_version: str,
+    inverter_sn: str,
+) -> DeviceInfo:
     return DeviceInfo(
         identifiers={
             (
@@ -45,16 +90,12 @@ def get_battery_device_info(entity: RctPowerEntity) -> DeviceInfo:
                 bms_sn,
             ),
         },  # type: ignore
-        name=f"Battery at {entity.get_valid_api_response_value_by_name('android_description', '')}",
-        sw_version=str(
-            entity.get_valid_api_response_value_by_name(
-                "battery.bms_software_version", ""
-            )
-        ),
+        name=f"Battery at {android_description}",
+        sw_version=bms_software_version,
         model=BATTERY_MODEL,
         manufacturer=NAME,
         via_device=(
             DOMAIN,
-            str(entity.get_valid_api_response_value_by_name("inverter_sn", None)),
+            inverter_sn,
         ),
     )
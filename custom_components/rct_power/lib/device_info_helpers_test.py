@@ -0,0 +1,43 @@
+"""Test the device infos of the RCT Power entities."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from custom_components.rct_power.lib.api import ApiResponseValue
+from custom_components.rct_power.lib.device_info_helpers import (
+    ANDROID_DESCRIPTION_OID,
+    INVERTER_SN_OID,
+    SVNVERSION_OID,
+    get_inverter_device_info,
+)
+from custom_components.rct_power.lib.entity import RctPowerEntity
+
+
+def create_entity(values: dict[int, ApiResponseValue]) -> MagicMock:
+    entity = MagicMock(spec=RctPowerEntity)
+    entity.get_valid_api_response_value_by_id.side_effect = lambda object_id, default: (
+        values.get(object_id, default)
+    )
+    return entity
+
+
+def test_shares_device_infos_until_their_values_change() -> None:
+    """Test that the entities of a device share its device info."""
+    values: dict[int, ApiResponseValue] = {
+        INVERTER_SN_OID: "SERIAL",
+        ANDROID_DESCRIPTION_OID: "Inverter",
+        SVNVERSION_OID: "1.0",
+    }
+
+    device_info = get_inverter_device_info(create_entity(values))
+
+    assert get_inverter_device_info(create_entity(values)) is device_info
+    assert device_info["name"] == "Inverter"
+
+    updated_device_info = get_inverter_device_info(
+        create_entity({**values, SVNVERSION_OID: "2.0"})
+    )
+
+    assert updated_device_info is not device_info
+    assert updated_device_info["sw_version"] == "2.0"
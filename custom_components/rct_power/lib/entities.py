@@ -6,6 +6,7 @@ from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from rctclient.registry import REGISTRY
 
 from ..const import EntityUpdatePriority
+from .deadband import Deadband
 from .device_info_helpers import get_battery_device_info, get_inverter_device_info
 from .entity import (
     RctPowerBitfieldSensorEntityDescription,
@@ -18,6 +19,7 @@ from .state_helpers import (
     get_first_api_response_value_as_timestamp,
     sum_api_response_values_as_state,
 )
+from .topology import has_battery_module, has_phase, has_solar_generator
 
 
 def get_matching_names(expression: str) -> list[str]:
@@ -29,6 +31,10 @@ def get_matching_names(expression: str) -> list[str]:
     ]
 
 
+# the insulation resistances fluctuate by kiloohms while they're in the megaohms
+INSULATION_RESISTANCE_DEADBAND = Deadband(relative=0.05)
+
+
 battery_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
@@ -45,36 +51,42 @@ battery_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
         key="battery.module_sn[0]",
+        is_installed=has_battery_module(0),
         name="Battery Module 1 Serial Number",
         update_priority=EntityUpdatePriority.STATIC,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
         key="battery.module_sn[1]",
+        is_installed=has_battery_module(1),
         name="Battery Module 2 Serial Number",
         update_priority=EntityUpdatePriority.STATIC,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
         key="battery.module_sn[2]",
+        is_installed=has_battery_module(2),
         name="Battery Module 3 Serial Number",
         update_priority=EntityUpdatePriority.STATIC,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
         key="battery.module_sn[3]",
+        is_installed=has_battery_module(3),
         name="Battery Module 4 Serial Number",
         update_priority=EntityUpdatePriority.STATIC,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
         key="battery.module_sn[4]",
+        is_installed=has_battery_module(4),
         name="Battery Module 5 Serial Number",
         update_priority=EntityUpdatePriority.STATIC,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_battery_device_info,
         key="battery.module_sn[5]",
+        is_installed=has_battery_module(5),
         name="Battery Module 6 Serial Number",
         update_priority=EntityUpdatePriority.STATIC,
     ),
@@ -282,30 +294,35 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[0].mpp.fixed_voltage",
+        is_installed=has_solar_generator(0),
         name="Generator A MPP Fixed Voltage",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[0].mpp.mpp_step",
+        is_installed=has_solar_generator(0),
         name="Generator A MPP Search Step",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[0].p_dc",
+        is_installed=has_solar_generator(0),
         name="Generator A Power",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[0].rescan_correction",
+        is_installed=has_solar_generator(0),
         name="Generator A MPP Rescan Correction",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[0].u_sg_lp",
+        is_installed=has_solar_generator(0),
         name="Generator A Voltage",
         state_class=SensorStateClass.MEASUREMENT,
     ),
@@ -318,29 +335,34 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[1].mpp.fixed_voltage",
+        is_installed=has_solar_generator(1),
         name="Generator B MPP Fixed Voltage",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[1].mpp.mpp_step",
+        is_installed=has_solar_generator(1),
         name="Generator B MPP Search Step",
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[1].p_dc",
+        is_installed=has_solar_generator(1),
         name="Generator B Power",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[1].rescan_correction",
+        is_installed=has_solar_generator(1),
         name="Generator B MPP Rescan Correction",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="dc_conv.dc_conv_struct[1].u_sg_lp",
+        is_installed=has_solar_generator(1),
         name="Generator B Voltage",
         state_class=SensorStateClass.MEASUREMENT,
     ),
@@ -366,24 +388,28 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
         get_device_info=get_inverter_device_info,
         key="iso_struct.Riso",
         name="Insulation Resistance",
+        deadband=INSULATION_RESISTANCE_DEADBAND,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="iso_struct.r_min",
         name="Minimum Insulation Resistance",
+        deadband=INSULATION_RESISTANCE_DEADBAND,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="iso_struct.Rn",
         name="Insulation Resistance Negative Input",
+        deadband=INSULATION_RESISTANCE_DEADBAND,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="iso_struct.Rp",
         name="Insulation Resistance Positive Input",
+        deadband=INSULATION_RESISTANCE_DEADBAND,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
@@ -420,6 +446,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="g_sync.p_ac[1]",
+        is_installed=has_phase(1),
         name="Inverter Power P2",
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="W",
@@ -427,6 +454,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="g_sync.p_ac[2]",
+        is_installed=has_phase(2),
         name="Inverter Power P3",
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="W",
@@ -446,12 +474,14 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="g_sync.p_ac_load[1]",
+        is_installed=has_phase(1),
         name="Consumer Power P2",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="g_sync.p_ac_load[2]",
+        is_installed=has_phase(2),
         name="Consumer Power P3",
         state_class=SensorStateClass.MEASUREMENT,
     ),
@@ -476,12 +506,14 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="g_sync.p_ac_sc[1]",
+        is_installed=has_phase(1),
         name="Grid Power P2",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="g_sync.p_ac_sc[2]",
+        is_installed=has_phase(2),
         name="Grid Power P3",
         state_class=SensorStateClass.MEASUREMENT,
     ),
@@ -500,12 +532,14 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="rb485.f_grid[1]",
+        is_installed=has_phase(1),
         name="Grid Frequency P2",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="rb485.f_grid[2]",
+        is_installed=has_phase(2),
         name="Grid Frequency P3",
         state_class=SensorStateClass.MEASUREMENT,
     ),
@@ -518,12 +552,14 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="rb485.u_l_grid[1]",
+        is_installed=has_phase(1),
         name="Grid Voltage P2",
         state_class=SensorStateClass.MEASUREMENT,
     ),
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="rb485.u_l_grid[2]",
+        is_installed=has_phase(2),
         name="Grid Voltage P3",
         state_class=SensorStateClass.MEASUREMENT,
     ),
@@ -680,6 +716,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_day[0]",
+        is_installed=has_solar_generator(0),
         name="Generator A Energy Production Day",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -687,6 +724,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_month[0]",
+        is_installed=has_solar_generator(0),
         name="Generator A Energy Production Month",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -694,6 +732,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_year[0]",
+        is_installed=has_solar_generator(0),
         name="Generator A Energy Production Year",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -701,6 +740,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_total[0]",
+        is_installed=has_solar_generator(0),
         name="Generator A Energy Production Total",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -708,6 +748,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_day[1]",
+        is_installed=has_solar_generator(1),
         name="Generator B Energy Production Day",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -715,6 +756,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_month[1]",
+        is_installed=has_solar_generator(1),
         name="Generator B Energy Production Month",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -722,6 +764,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_year[1]",
+        is_installed=has_solar_generator(1),
         name="Generator B Energy Production Year",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -729,6 +772,7 @@ inverter_sensor_entity_descriptions: list[RctPowerSensorEntityDescription] = [
     RctPowerSensorEntityDescription(
         get_device_info=get_inverter_device_info,
         key="energy.e_dc_total[1]",
+        is_installed=has_solar_generator(1),
         name="Generator B Energy Production Total",
         update_priority=EntityUpdatePriority.INFREQUENT,
         state_class=SensorStateClass.TOTAL_INCREASING,
@@ -763,6 +807,7 @@ bitfield_sensor_entity_descriptions: list[RctPowerBitfieldSensorEntityDescriptio
         ],
         name="Faults",
         update_priority=EntityUpdatePriority.FREQUENT,
+        update_priority_pinned=True,
         unique_id=f"{0x37F9D5CA}",  # for backwards-compatibility
     ),
     RctPowerBitfieldSensorEntityDescription(
@@ -770,6 +815,7 @@ bitfield_sensor_entity_descriptions: list[RctPowerBitfieldSensorEntityDescriptio
         key="battery.bat_status",
         name="Battery Status",
         update_priority=EntityUpdatePriority.FREQUENT,
+        update_priority_pinned=True,
         get_native_value=get_first_api_response_value_as_battery_status,
         options=available_battery_status,
     ),
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import date, datetime
@@ -11,33 +12,47 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import UNDEFINED, StateType, UndefinedType
-from rctclient.registry import REGISTRY, ObjectInfo
+from rctclient.registry import ObjectInfo
 
 from ..const import CONF_ENTITY_PREFIX, ICON, EntityUpdatePriority
 from ..coordinator import RctPowerDataUpdateCoordinator
 from .api import (
     ApiResponse,
     ApiResponseValue,
+    RctPowerData,
     ValidApiResponse,
     get_valid_response_value_or,
 )
+from .deadband import DEFAULT_DEADBANDS, Deadband
 from .device_class_helpers import guess_device_class_from_unit
 from .multi_coordinator_entity import MultiCoordinatorEntity
+from .object_index import OBJECT_INDEX
 from .state_helpers import (
     get_api_response_values_as_bitfield,
     get_first_api_response_value_as_state,
 )
+from .topology import HardwareTopology
+
+type LatestResponse = tuple[RctPowerDataUpdateCoordinator | None, ApiResponse | None]
 
 
 class RctPowerEntity(MultiCoordinatorEntity):
     entity_description: RctPowerEntityDescription
     object_infos: list[ObjectInfo]
 
+    # the latest responses of the objects along with the coordinator they came
+    # from, looked up again only when the data of a coordinator changed
+    _latest_responses: list[LatestResponse] | None = None
+    _latest_responses_data: list[RctPowerData] | None = None
+
     def __init__(
         self,
         coordinators: list[RctPowerDataUpdateCoordinator],
@@ -50,23 +65,65 @@ class RctPowerEntity(MultiCoordinatorEntity):
             entity_description
         )
         self.object_infos = resolve_object_infos(self.entity_description)
+        # the index of each object in the latest responses
+        self._object_slots = {
+            object_info.object_id: slot
+            for slot, object_info in enumerate(self.object_infos)
+        }
+        # the entity is only updated if one of its objects changed
+        self.coordinator_context = frozenset(self._object_slots)
+
+    def get_latest_responses(self) -> list[LatestResponse]:
+        """Return the latest responses of the entity's objects.
+
+        The coordinators replace their data with every update, so the responses
+        are only looked up once per update instead of at every evaluation of
+        the entity's properties.
+        """
+        data = [coordinator.data for coordinator in self.coordinators]
+
+        if (
+            self._latest_responses is None
+            or self._latest_responses_data is None
+            or any(
+                coordinator_data is not cached_coordinator_data
+                for coordinator_data, cached_coordinator_data in zip(
+                    data, self._latest_responses_data, strict=True
+                )
+            )
+        ):
+            self._latest_responses = [
+                self._look_up_latest_response(object_info.object_id)
+                for object_info in self.object_infos
+            ]
+            self._latest_responses_data = data
+
+        return self._latest_responses
 
     def get_api_response_by_id(
         self, object_id: int, default: ApiResponse | None = None
     ) -> ApiResponse | None:
+        if (slot := self._object_slots.get(object_id)) is not None:
+            _coordinator, latest_response = self.get_latest_responses()[slot]
+        else:
+            _coordinator, latest_response = self._look_up_latest_response(object_id)
+
+        return latest_response if latest_response is not None else default
+
+    def _look_up_latest_response(self, object_id: int) -> LatestResponse:
         for coordinator in self.coordinators:
             latest_response = coordinator.get_latest_response(object_id)
 
             if latest_response is not None:
-                return latest_response
+                return coordinator, latest_response
 
-        return default
+        return None, None
 
     def get_api_response_by_name(
         self, object_name: str, default: ApiResponse | None = None
     ) -> ApiResponse | None:
         return self.get_api_response_by_id(
-            REGISTRY.get_by_name(object_name).object_id, default
+            OBJECT_INDEX.get_object_id(object_name), default
         )
 
     def get_valid_api_response_value_by_id[R: ApiResponseValue](
@@ -108,10 +165,10 @@ class RctPowerEntity(MultiCoordinatorEntity):
     @property
     def available(self) -> bool:
         return all(
-            isinstance(
-                self.get_api_response_by_id(object_info.object_id), ValidApiResponse
-            )
-            for object_info in self.object_infos
+            coordinator is not None
+            and isinstance(latest_response, ValidApiResponse)
+            and not coordinator.is_stale(latest_response)
+            for coordinator, latest_response in self.get_latest_responses()
         )
 
     @cached_property
@@ -129,14 +186,47 @@ class RctPowerEntity(MultiCoordinatorEntity):
     def device_info(self) -> DeviceInfo | None:
         return self.entity_description.get_device_info(self)
 
+    async def async_update(self) -> None:
+        # a manual update reads the objects even if they aren't due yet
+        if self.enabled:
+            object_ids = [object_info.object_id for object_info in self.object_infos]
+
+            for coordinator in self.coordinators:
+                coordinator.schedule_now(object_ids)
+
+        await super().async_update()
+
 
 class RctPowerSensorEntity(SensorEntity, RctPowerEntity):
     entity_description: RctPowerSensorEntityDescription  # pyright: ignore [reportIncompatibleVariableOverride]
 
+    # the state written last and when it was written, to filter out
+    # insignificant changes
+    _last_written_value: StateType | date | datetime | Decimal = None
+    _last_written_available: bool = False
+    _last_write_time: float = 0
+    # writes the latest state once the maximum interval of the deadband passed,
+    # since the value might not change again to trigger a write
+    _unsub_deferred_write: CALLBACK_TYPE | None = None
+    # the native value of the latest responses it was computed from, since it's
+    # evaluated several times per state write
+    _native_value: StateType | date | datetime | Decimal = None
+    _native_value_responses: list[LatestResponse] | None = None
+
+    @cached_property
+    def deadband(self) -> Deadband | None:
+        if self.entity_description.deadband is not None:
+            return self.entity_description.deadband
+
+        if self.state_class != SensorStateClass.MEASUREMENT:
+            return None
+
+        return DEFAULT_DEADBANDS.get(self.device_class)  # type: ignore[arg-type]
+
     def get_valid_api_responses(self) -> list[ApiResponseValue | None]:
         return [
-            self.get_valid_api_response_value_by_id(object_info.object_id, None)
-            for object_info in self.object_infos
+            get_valid_response_value_or(latest_response, None)
+            for _coordinator, latest_response in self.get_latest_responses()
         ]
 
     @property
@@ -152,9 +242,76 @@ class RctPowerSensorEntity(SensorEntity, RctPowerEntity):
 
     @property
     def native_value(self) -> StateType | date | datetime | Decimal:
-        return self.entity_description.get_native_value(
-            self, self.get_valid_api_responses()
-        )
+        latest_responses = self.get_latest_responses()
+
+        if latest_responses is not self._native_value_responses:
+            self._native_value = self.entity_description.get_native_value(
+                self, self.get_valid_api_responses()
+            )
+            self._native_value_responses = latest_responses
+
+        return self._native_value
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        self._cancel_deferred_write()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        value = self.native_value
+        available = self.available
+
+        if self._is_insignificant_change(value, available):
+            if self._unsub_deferred_write is None and self.deadband is not None:
+                self._unsub_deferred_write = async_call_later(
+                    self.hass,
+                    self._last_write_time
+                    + self.deadband.max_interval
+                    - time.monotonic(),
+                    self._async_write_deferred_state,
+                )
+
+            return
+
+        self._write_state(value, available)
+
+    @callback
+    def _async_write_deferred_state(self, _now: datetime) -> None:
+        self._unsub_deferred_write = None
+        self._write_state(self.native_value, self.available)
+
+    def _write_state(
+        self, value: StateType | date | datetime | Decimal, available: bool
+    ) -> None:
+        self._cancel_deferred_write()
+        self._last_written_value = value
+        self._last_written_available = available
+        self._last_write_time = time.monotonic()
+        super()._handle_coordinator_update()
+
+    def _cancel_deferred_write(self) -> None:
+        if self._unsub_deferred_write is not None:
+            self._unsub_deferred_write()
+            self._unsub_deferred_write = None
+
+    def _is_insignificant_change(
+        self, value: StateType | date | datetime | Decimal, available: bool
+    ) -> bool:
+        deadband = self.deadband
+
+        if (
+            deadband is None
+            or available != self._last_written_available
+            or time.monotonic() - self._last_write_time >= deadband.max_interval
+        ):
+            return False
+
+        last_value = self._last_written_value
+
+        if not _is_number(value) or not _is_number(last_value):
+            return False
+
+        return not deadband.is_significant(float(last_value), float(value))  # type: ignore[arg-type]
 
     @cached_property
     def native_unit_of_measurement(self) -> str | None:
@@ -165,10 +322,18 @@ class RctPowerSensorEntity(SensorEntity, RctPowerEntity):
 
 
 class RctPowerBitfieldSensorEntity(RctPowerSensorEntity):
+    # the bitfield of the latest responses it was computed from
+    _bitfield: str = ""
+    _bitfield_responses: list[LatestResponse] | None = None
+
     @cached_property
     def native_unit_of_measurement(self) -> str | None:
         return None
 
+    @cached_property
+    def deadband(self) -> Deadband | None:
+        return None
+
     @property
     def device_class(self) -> SensorDeviceClass | None:
         """Return the device class of the sensor."""
@@ -184,11 +349,37 @@ class RctPowerBitfieldSensorEntity(RctPowerSensorEntity):
     def extra_state_attributes(self) -> dict[str, Any]:
         return {
             **(super().extra_state_attributes or {}),
-            "bitfield": get_api_response_values_as_bitfield(
-                self, self.get_valid_api_responses()
-            ),
+            "bitfield": self._get_bitfield(),
         }
 
+    def _get_bitfield(self) -> str:
+        latest_responses = self.get_latest_responses()
+
+        if latest_responses is not self._bitfield_responses:
+            self._bitfield = get_api_response_values_as_bitfield(
+                self, self.get_valid_api_responses()
+            )
+            self._bitfield_responses = latest_responses
+
+        return self._bitfield
+
+
+class RctPowerDerivedSensorEntity(RctPowerSensorEntity):
+    """A sensor computed from several objects, whose units don't apply to it."""
+
+    @cached_property
+    def native_unit_of_measurement(self) -> str | None:
+        return self.entity_description.native_unit_of_measurement
+
+    @cached_property
+    def deadband(self) -> Deadband | None:
+        return self.entity_description.deadband
+
+    @property
+    def device_class(self) -> SensorDeviceClass | None:
+        """Return the device class of the sensor."""
+        return self.entity_description.device_class
+
 
 @dataclass(frozen=True, kw_only=True)
 class RctPowerEntityDescription(EntityDescription):
@@ -197,7 +388,12 @@ class RctPowerEntityDescription(EntityDescription):
     # to allow for stable entity identities even if the object ids change
     unique_id: str | None = None
     update_priority: EntityUpdatePriority = EntityUpdatePriority.FREQUENT
+    # whether the update priority is kept regardless of the learned one, e.g.
+    # for values that rarely change but need to be noticed quickly
+    update_priority_pinned: bool = False
     get_device_info: Callable[[RctPowerEntity], DeviceInfo | None] = lambda e: None
+    # whether the hardware the entity belongs to is connected to the inverter
+    is_installed: Callable[[HardwareTopology], bool] = lambda topology: True
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -208,6 +404,9 @@ class RctPowerSensorEntityDescription(
         [RctPowerSensorEntity, list[ApiResponseValue | None]],
         StateType | date | datetime | Decimal,
     ] = get_first_api_response_value_as_state
+    # the changes too small to be written, defaults to a deadband depending on
+    # the device class of measurements
+    deadband: Deadband | None = None
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -220,6 +419,10 @@ class RctPowerBitfieldSensorEntityDescription(
     ] = get_api_response_values_as_bitfield
 
 
+def _is_number(value: object) -> bool:
+    return isinstance(value, int | float | Decimal) and not isinstance(value, bool)
+
+
 def slugify_entity_name(name: str) -> str:
     return name.replace(".", "_").replace("[", "_").replace("]", "_").replace("?", "_")
 
@@ -228,7 +431,10 @@ def resolve_object_infos(
     entity_description: RctPowerEntityDescription,
 ) -> list[ObjectInfo]:
     object_names = entity_description.object_names or [entity_description.key]
-    return [REGISTRY.get_by_name(object_name) for object_name in object_names]
+    return [
+        OBJECT_INDEX.get_by_name(object_name).object_info
+        for object_name in object_names
+    ]
 
 
 known_faults: list[str] = [
@@ -0,0 +1,84 @@
+"""Test the lookup and conversion of the responses of the RCT Power entities."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.rct_power.const import DOMAIN
+from custom_components.rct_power.coordinator import RctPowerDataUpdateCoordinator
+from custom_components.rct_power.lib.api import RctPowerData, ValidApiResponse
+from custom_components.rct_power.lib.entity import (
+    RctPowerSensorEntity,
+    RctPowerSensorEntityDescription,
+)
+from custom_components.rct_power.lib.object_index import OBJECT_INDEX
+
+OBJECT_ID = OBJECT_INDEX.get_object_id("battery.soc")
+
+
+def create_data(value: float) -> RctPowerData:
+    return {
+        OBJECT_ID: ValidApiResponse(
+            object_id=OBJECT_ID, time=datetime.now(), value=value
+        )
+    }
+
+
+def create_entity(
+    coordinator: RctPowerDataUpdateCoordinator,
+) -> RctPowerSensorEntity:
+    return RctPowerSensorEntity(
+        coordinators=[coordinator],
+        config_entry=MockConfigEntry(domain=DOMAIN),
+        entity_description=RctPowerSensorEntityDescription(key="battery.soc"),
+    )
+
+
+def test_looks_up_responses_once_per_update() -> None:
+    """Test that the responses are looked up again only if the data changed."""
+    coordinator = MagicMock(spec=RctPowerDataUpdateCoordinator)
+    coordinator.data = create_data(0.5)
+    coordinator.get_latest_response.side_effect = lambda object_id: (
+        coordinator.data.get(object_id)
+    )
+    coordinator.is_stale.return_value = False
+    entity = create_entity(coordinator)
+
+    assert entity.get_valid_api_responses() == [0.5]
+    assert entity.available
+    assert entity.get_api_response_by_id(OBJECT_ID) is coordinator.data[OBJECT_ID]
+    coordinator.get_latest_response.assert_called_once_with(OBJECT_ID)
+
+    coordinator.data = create_data(0.6)
+
+    assert entity.get_valid_api_responses() == [0.6]
+    assert coordinator.get_latest_response.call_count == 2
+
+
+def test_computes_native_value_once_per_update() -> None:
+    """Test that the native value is only computed again if the data changed."""
+    coordinator = MagicMock(spec=RctPowerDataUpdateCoordinator)
+    coordinator.data = create_data(0.5)
+    coordinator.get_latest_response.side_effect = lambda object_id: (
+        coordinator.data.get(object_id)
+    )
+    get_native_value = MagicMock(side_effect=lambda entity, values: values[0])
+    entity = RctPowerSensorEntity(
+        coordinators=[coordinator],
+        config_entry=MockConfigEntry(domain=DOMAIN),
+        entity_description=RctPowerSensorEntityDescription(
+            key="battery.soc", get_native_value=get_native_value
+        ),
+    )
+
+    assert entity.native_value == 0.5
+    assert entity.native_value == 0.5
+    get_native_value.assert_called_once()
+
+    coordinator.data = create_data(0.6)
+
+    assert entity.native_value == 0.6
+    assert get_native_value.call_count == 2
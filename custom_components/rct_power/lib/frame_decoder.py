@@ -0,0 +1,219 @@
+"""Incremental decoder for the frame stream sent by the inverter."""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+
+from rctclient.exceptions import FrameCRCMismatch, InvalidCommand, ReceiveFrameError
+from rctclient.types import Command
+
+START_TOKEN: int = ord("+")
+ESCAPE_TOKEN: int = ord("-")
+FRAME_LENGTH_CRC16 = 2
+
+
+def _create_crc16_table() -> list[int]:
+    table: list[int] = []
+
+    for byte in range(256):
+        crc = byte << 8
+        for _bit in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+
+    return table
+
+
+_CRC16_TABLE = _create_crc16_table()
+
+
+def crc16(data: bytes | bytearray) -> int:
+    """Calculate the CRC-CCITT checksum the same way `rctclient.utils.CRC16` does.
+
+    Just like the reference implementation, data of uneven length is padded
+    with a zero byte.
+    """
+    crc = 0xFFFF
+
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+
+    if len(data) & 0x01:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[crc >> 8]
+
+    return crc
+
+
+@dataclass(slots=True, frozen=True)
+class DecodedFrame:
+    command: Command | None
+    object_id: int
+    payload: bytes
+    address: int = 0
+    # set if the frame was received completely, but is not usable
+    error: ReceiveFrameError | None = None
+
+
+class _IncompleteFrame(Exception):
+    """More data is needed to decode the frame at the start of the buffer."""
+
+
+class _UnexpectedStartToken(Exception):
+    """An unescaped start token was found in the middle of a frame."""
+
+    def __init__(self, position: int) -> None:
+        super().__init__(position)
+        self.position = position
+
+
+class FrameDecoder:
+    """Decode frames from a byte stream that arrives in arbitrary chunks.
+
+    Unlike `rctclient.frame.ReceiveFrame`, which has to be fed byte by byte to
+    not consume data beyond the end of a frame, this consumes whole chunks,
+    returns all frames completed by them and keeps the remainder for the next
+    chunk. Truncated frames are dropped when the next start token arrives.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes | bytearray) -> list[DecodedFrame]:
+        self._buffer += data
+        frames: list[DecodedFrame] = []
+
+        while True:
+            start = self._buffer.find(START_TOKEN)
+
+            if start < 0:
+                # nothing but noise
+                self._buffer.clear()
+                break
+
+            del self._buffer[:start]
+
+            try:
+                frame, consumed_bytes = self._decode_frame()
+            except _IncompleteFrame:
+                break
+            except _UnexpectedStartToken as exc:
+                del self._buffer[: exc.position]
+                continue
+
+            del self._buffer[:consumed_bytes]
+            frames.append(frame)
+
+        return frames
+
+    def _decode_frame(self) -> tuple[DecodedFrame, int]:
+        header, position = self._unescape(1, 1)
+        command_value = header[0]
+
+        try:
+            command = Command(command_value)
+        except ValueError:
+            command = None
+
+        if command is None or command == Command.EXTENSION:
+            return (
+                DecodedFrame(
+                    command=None,
+                    object_id=0,
+                    payload=b"",
+                    error=InvalidCommand(
+                        f"Invalid command 0x{command_value:x}", command_value, position
+                    ),
+                ),
+                position,
+            )
+
+        is_plant = Command.is_plant(command)
+        is_long = Command.is_long(command)
+
+        # command, length, optional address and the object id
+        header_length = 1 + (2 if is_long else 1) + (4 if is_plant else 0) + 4
+        rest_of_header, position = self._unescape(position, header_length - 1)
+        header += rest_of_header
+
+        if is_long:
+            (data_length,) = struct.unpack_from(">H", header, 1)
+            address_index = 3
+        else:
+            data_length = header[1]
+            address_index = 2
+
+        if is_plant:
+            (address,) = struct.unpack_from(">I", header, address_index)
+            object_id_index = address_index + 4
+            # the length includes the address and the object id
+            payload_length = data_length - 8
+        else:
+            address = 0
+            object_id_index = address_index
+            # the length includes the object id
+            payload_length = data_length - 4
+
+        (object_id,) = struct.unpack_from(">I", header, object_id_index)
+
+        rest_of_frame, position = self._unescape(
+            position, max(payload_length, 0) + FRAME_LENGTH_CRC16
+        )
+        payload = bytes(rest_of_frame[:-FRAME_LENGTH_CRC16])
+        (received_crc,) = struct.unpack_from(
+            ">H", rest_of_frame, len(rest_of_frame) - FRAME_LENGTH_CRC16
+        )
+        calculated_crc = crc16(header + payload)
+
+        return (
+            DecodedFrame(
+                command=command,
+                object_id=object_id,
+                payload=payload,
+                address=address,
+                error=(
+                    None
+                    if received_crc == calculated_crc
+                    else FrameCRCMismatch(
+                        "CRC mismatch", received_crc, calculated_crc, position
+                    )
+                ),
+            ),
+            position,
+        )
+
+    def _unescape(self, position: int, length: int) -> tuple[bytearray, int]:
+        """Read `length` unescaped bytes from the buffer starting at `position`.
+
+        Returns the unescaped bytes and the position after them.
+        """
+        buffer = self._buffer
+        buffer_length = len(buffer)
+        result = bytearray()
+
+        while len(result) < length:
+            segment_end = min(position + length - len(result), buffer_length)
+            escape_position = buffer.find(ESCAPE_TOKEN, position, segment_end)
+            if escape_position >= 0:
+                segment_end = escape_position
+
+            start_position = buffer.find(START_TOKEN, position, segment_end)
+            if start_position >= 0:
+                raise _UnexpectedStartToken(start_position)
+
+            result += buffer[position:segment_end]
+            position = segment_end
+
+            if escape_position >= 0:
+                if escape_position + 1 >= buffer_length:
+                    raise _IncompleteFrame
+                result.append(buffer[escape_position + 1])
+                position = escape_position + 2
+            elif len(result) < length and position >= buffer_length:
+                raise _IncompleteFrame
+
+        return result, position
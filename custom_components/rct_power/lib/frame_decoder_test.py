@@ -0,0 +1,105 @@
+"""Test the incremental frame decoder."""
+
+from __future__ import annotations
+
+import pytest
+from rctclient.exceptions import FrameCRCMismatch, InvalidCommand
+from rctclient.frame import make_frame
+from rctclient.types import Command, FrameType
+from rctclient.utils import CRC16
+
+from custom_components.rct_power.lib.frame_decoder import FrameDecoder, crc16
+
+# object ids and payloads containing start and escape tokens need escaping
+FRAMES: list[tuple[Command, int, bytes]] = [
+    (Command.RESPONSE, 0x7924ABD9, b"ABCDEFG"),
+    (Command.RESPONSE, 0x2B2D2B2D, b"+-+-"),
+    (Command.LONG_RESPONSE, 0x12345678, bytes(range(256)) * 2),
+    (Command.RESPONSE, 0x959930BF, b""),
+]
+
+
+def create_stream() -> bytes:
+    return b"\x00noise".join(
+        make_frame(command, object_id, payload)
+        for command, object_id, payload in FRAMES
+    )
+
+
+@pytest.mark.parametrize("data", [b"", b"+", b"\x05\x2b\x2d", bytes(range(255))])
+def test_crc16_matches_reference_implementation(data: bytes) -> None:
+    """Test that the table-driven checksum matches the one of rctclient."""
+    assert crc16(data) == CRC16(data)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 64, 4096])
+def test_decodes_frames_split_into_arbitrary_chunks(chunk_size: int) -> None:
+    """Test that frames are decoded regardless of how the stream is split."""
+    stream = create_stream()
+    decoder = FrameDecoder()
+
+    frames = [
+        frame
+        for offset in range(0, len(stream), chunk_size)
+        for frame in decoder.feed(stream[offset : offset + chunk_size])
+    ]
+
+    assert [
+        (frame.command, frame.object_id, frame.payload, frame.error) for frame in frames
+    ] == [(command, object_id, payload, None) for command, object_id, payload in FRAMES]
+    assert decoder.buffered_bytes == 0
+
+
+def test_decodes_plant_frames() -> None:
+    """Test that the address of plant frames is decoded."""
+    (frame,) = FrameDecoder().feed(
+        make_frame(
+            Command.PLANT_RESPONSE,
+            0x7924ABD9,
+            b"\x01",
+            address=0x2B,
+            frame_type=FrameType.PLANT,
+        )
+    )
+
+    assert frame.address == 0x2B
+    assert frame.object_id == 0x7924ABD9
+    assert frame.payload == b"\x01"
+
+
+def test_reports_crc_mismatch() -> None:
+    """Test that corrupted frames are reported without losing the next frame."""
+    corrupted_frame = bytearray(make_frame(Command.RESPONSE, 0x7924ABD9, b"ABC"))
+    corrupted_frame[-1] ^= 0x01
+
+    frames = FrameDecoder().feed(
+        bytes(corrupted_frame) + make_frame(Command.RESPONSE, 0x959930BF, b"D")
+    )
+
+    assert isinstance(frames[0].error, FrameCRCMismatch)
+    assert frames[0].object_id == 0x7924ABD9
+    assert frames[1].error is None
+    assert frames[1].object_id == 0x959930BF
+
+
+def test_reports_invalid_command() -> None:
+    """Test that frames with unknown commands are reported and skipped."""
+    frames = FrameDecoder().feed(
+        b"+\x3c\x00" + make_frame(Command.RESPONSE, 0x959930BF, b"D")
+    )
+
+    assert isinstance(frames[0].error, InvalidCommand)
+    assert frames[1].object_id == 0x959930BF
+
+
+def test_resynchronizes_after_truncated_frame() -> None:
+    """Test that a truncated frame is dropped when the next frame starts."""
+    truncated_frame = make_frame(Command.RESPONSE, 0x7924ABD9, b"ABCDEFG")[:6]
+
+    frames = FrameDecoder().feed(
+        truncated_frame + make_frame(Command.RESPONSE, 0x959930BF, b"D")
+    )
+
+    assert [(frame.object_id, frame.payload) for frame in frames] == [
+        (0x959930BF, b"D")
+    ]
@@ -12,6 +12,9 @@ class MultiCoordinatorEntity(Entity):
     """A class for entities using multiple DataUpdateCoordinators."""
 
     _attr_should_poll = False
+    # passed to the coordinators along with the listener, e.g. to limit the
+    # notifications to the objects the entity depends on
+    coordinator_context: object | None = None
 
     def __init__(self, coordinators: list[RctPowerDataUpdateCoordinator]) -> None:
         self.coordinators = coordinators
@@ -25,7 +28,9 @@ class MultiCoordinatorEntity(Entity):
 
         for coordinator in self.coordinators:
             self.async_on_remove(
-                coordinator.async_add_listener(self._handle_coordinator_update)
+                coordinator.async_add_listener(
+                    self._handle_coordinator_update, self.coordinator_context
+                )
             )
 
     @callback
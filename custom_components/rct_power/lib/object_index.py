@@ -0,0 +1,125 @@
+"""Precomputed lookup tables for the objects known to the registry."""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+from rctclient.frame import make_frame
+from rctclient.registry import REGISTRY, ObjectInfo
+from rctclient.types import Command, DataType
+from rctclient.utils import decode_value
+
+if TYPE_CHECKING:
+    from .api import ApiResponseValue
+
+type ValueDecoder = Callable[[bytes], ApiResponseValue]
+
+_STRUCT_FORMATS: dict[DataType, str] = {
+    DataType.UINT8: ">B",
+    DataType.ENUM: ">B",
+    DataType.INT8: ">b",
+    DataType.UINT16: ">H",
+    DataType.INT16: ">h",
+    DataType.UINT32: ">I",
+    DataType.INT32: ">i",
+    DataType.FLOAT: ">f",
+}
+_BOOL_STRUCT = struct.Struct(">B")
+
+
+def _decode_bool(data: bytes) -> bool:
+    return _BOOL_STRUCT.unpack(data)[0] != 0
+
+
+def _decode_string(data: bytes) -> str:
+    end = data.find(0x00)
+    return (data if end < 0 else data[:end]).decode("ascii")
+
+
+def _create_struct_decoder(struct_format: str) -> ValueDecoder:
+    unpack = struct.Struct(struct_format).unpack
+
+    def decode(data: bytes) -> ApiResponseValue:
+        return unpack(data)[0]
+
+    return decode
+
+
+def create_value_decoder(data_type: DataType) -> ValueDecoder:
+    """Create a decoder equivalent to `rctclient.utils.decode_value`.
+
+    The data type is only dispatched on once instead of for every value and
+    the fixed size types are decoded with a precompiled struct.
+    """
+    if data_type == DataType.BOOL:
+        return _decode_bool
+    if data_type == DataType.STRING:
+        return _decode_string
+    if (struct_format := _STRUCT_FORMATS.get(data_type)) is not None:
+        return _create_struct_decoder(struct_format)
+
+    return partial(decode_value, data_type)  # type: ignore
+
+
+@dataclass(slots=True, frozen=True)
+class IndexedObject:
+    object_info: ObjectInfo
+    object_id: int
+    name: str
+    response_data_type: DataType
+    # the escaped READ request ready to be written to the stream
+    read_frame: bytes
+    decode: ValueDecoder
+
+
+class ObjectIndex:
+    """Map object ids and names to everything needed to request objects.
+
+    `rctclient.registry.REGISTRY` searches its list of objects for every
+    lookup by name, while this builds the tables once.
+    """
+
+    def __init__(self, object_infos: Iterable[ObjectInfo]) -> None:
+        self._objects_by_id: dict[int, IndexedObject] = {}
+        self._objects_by_name: dict[str, IndexedObject] = {}
+
+        for object_info in object_infos:
+            indexed_object = IndexedObject(
+                object_info=object_info,
+                object_id=object_info.object_id,
+                name=object_info.name,
+                response_data_type=object_info.response_data_type,
+                read_frame=bytes(make_frame(Command.READ, object_info.object_id)),
+                decode=create_value_decoder(object_info.response_data_type),
+            )
+            self._objects_by_id[indexed_object.object_id] = indexed_object
+            self._objects_by_name[indexed_object.name] = indexed_object
+
+    def __contains__(self, object_id: int) -> bool:
+        return object_id in self._objects_by_id
+
+    def get_by_id(self, object_id: int) -> IndexedObject:
+        """Return the object with the given id or raise a `KeyError`."""
+        return self._objects_by_id[object_id]
+
+    def get_by_name(self, name: str) -> IndexedObject:
+        """Return the object with the given name or raise a `KeyError`."""
+        return self._objects_by_name[name]
+
+    def has_name(self, name: str) -> bool:
+        return name in self._objects_by_name
+
+    def get_object_id(self, name: str) -> int:
+        return self._objects_by_name[name].object_id
+
+    def get_name(self, object_id: int) -> str:
+        """Return the name of the object for logging, even if it's unknown."""
+        indexed_object = self._objects_by_id.get(object_id)
+        return indexed_object.name if indexed_object is not None else "unknown"
+
+
+OBJECT_INDEX = ObjectIndex(REGISTRY.all())
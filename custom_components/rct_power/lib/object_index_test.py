@@ -0,0 +1,47 @@
+"""Test the precomputed object index."""
+
+from __future__ import annotations
+
+import pytest
+from rctclient.frame import SendFrame
+from rctclient.registry import REGISTRY
+from rctclient.types import Command
+from rctclient.utils import decode_value, encode_value
+
+from custom_components.rct_power.lib.object_index import OBJECT_INDEX
+from tests.simulator import create_default_objects
+
+
+def test_indexes_all_registry_objects() -> None:
+    """Test that every object can be found by its id and its name."""
+    for object_info in REGISTRY.all():
+        indexed_object = OBJECT_INDEX.get_by_id(object_info.object_id)
+
+        assert OBJECT_INDEX.get_by_name(object_info.name) is indexed_object
+        assert indexed_object.name == object_info.name
+        assert indexed_object.response_data_type == object_info.response_data_type
+        assert (
+            indexed_object.read_frame
+            == SendFrame(command=Command.READ, id=object_info.object_id).data
+        )
+
+
+def test_decoders_match_reference_implementation() -> None:
+    """Test that the specialized decoders return the same values as rctclient."""
+    for object_id, value in create_default_objects().items():
+        indexed_object = OBJECT_INDEX.get_by_id(object_id)
+        data = encode_value(indexed_object.response_data_type, value)  # type: ignore
+
+        assert indexed_object.decode(data) == decode_value(
+            indexed_object.response_data_type,  # type: ignore
+            data,
+        )
+
+
+def test_reports_unknown_objects() -> None:
+    """Test that unknown objects raise errors, but can still be logged."""
+    with pytest.raises(KeyError):
+        OBJECT_INDEX.get_by_id(0x12345678)
+
+    assert 0x12345678 not in OBJECT_INDEX
+    assert OBJECT_INDEX.get_name(0x12345678) == "unknown"
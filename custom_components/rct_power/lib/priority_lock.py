@@ -0,0 +1,76 @@
+"""A lock that is handed to the most urgent waiter first."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+
+class PriorityLock:
+    """An asyncio lock granted to waiters in the order of their priority.
+
+    Lower values take precedence and waiters with the same priority are served
+    in the order they arrived. The holder can check whether it's blocking a
+    more urgent waiter to release the lock early and acquire it again later.
+    """
+
+    def __init__(self) -> None:
+        self._locked = False
+        # the waiters as a heap of (priority, arrival, future) tuples
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._arrivals = itertools.count()
+
+    def locked(self) -> bool:
+        return self._locked
+
+    def has_waiters(self) -> bool:
+        return bool(self._waiters)
+
+    def is_contended(self, priority: int) -> bool:
+        """Whether a waiter is more urgent than the given priority."""
+        return bool(self._waiters) and self._waiters[0][0] < priority
+
+    @asynccontextmanager
+    async def hold(self, priority: int) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int) -> None:
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._arrivals), waiter)
+        heapq.heappush(self._waiters, entry)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the lock was handed over just before the cancellation
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        if not self._locked:
+            raise RuntimeError("Lock is not acquired")
+
+        while self._waiters:
+            _priority, _arrival, waiter = heapq.heappop(self._waiters)
+
+            if not waiter.done():
+                # hand the lock over without unlocking it in between
+                waiter.set_result(None)
+                return
+
+        self._locked = False
@@ -0,0 +1,88 @@
+"""Read timeouts derived from the observed latency of each object."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+# the gains and the variance factor recommended for TCP retransmission
+# timeouts by RFC 6298
+LATENCY_GAIN = 1 / 8
+VARIANCE_GAIN = 1 / 4
+VARIANCE_FACTOR = 4
+# the factor the timeout of an object grows by whenever a read timed out
+TIMEOUT_BACKOFF_FACTOR = 2
+
+
+@dataclass(slots=True)
+class LatencyEstimate:
+    smoothed_latency: float  # in seconds
+    latency_variance: float  # in seconds
+    timeout: float  # in seconds
+
+
+class ReadTimeoutEstimator:
+    """Estimate how long to wait for the response to a read request per object.
+
+    The latency of each object is tracked as an exponentially weighted moving
+    average along with its mean deviation, like TCP does for retransmission
+    timeouts. Objects without samples use the initial timeout and timeouts
+    double for objects whose reads time out until a response arrives.
+    """
+
+    def __init__(
+        self, *, initial_timeout: float, min_timeout: float, max_timeout: float
+    ) -> None:
+        self._min_timeout = min_timeout
+        self._max_timeout = max(max_timeout, min_timeout)
+        self._initial_timeout = self._clamp(initial_timeout)
+        self._estimates: dict[int, LatencyEstimate] = {}
+
+    @property
+    def timeouts(self) -> Mapping[int, float]:
+        """The current timeouts of all objects with samples or timeouts."""
+        return {
+            object_id: estimate.timeout
+            for object_id, estimate in self._estimates.items()
+        }
+
+    def get_timeout(self, object_id: int) -> float:
+        estimate = self._estimates.get(object_id)
+        return estimate.timeout if estimate is not None else self._initial_timeout
+
+    def add_sample(self, object_id: int, latency: float) -> None:
+        estimate = self._estimates.get(object_id)
+
+        if estimate is None or estimate.smoothed_latency <= 0:
+            smoothed_latency = latency
+            latency_variance = latency / 2
+        else:
+            latency_variance = (
+                1 - VARIANCE_GAIN
+            ) * estimate.latency_variance + VARIANCE_GAIN * abs(
+                estimate.smoothed_latency - latency
+            )
+            smoothed_latency = (
+                1 - LATENCY_GAIN
+            ) * estimate.smoothed_latency + LATENCY_GAIN * latency
+
+        self._estimates[object_id] = LatencyEstimate(
+            smoothed_latency=smoothed_latency,
+            latency_variance=latency_variance,
+            timeout=self._clamp(smoothed_latency + VARIANCE_FACTOR * latency_variance),
+        )
+
+    def add_timeout(self, object_id: int) -> None:
+        estimate = self._estimates.get(object_id)
+        timeout = self._clamp(self.get_timeout(object_id) * TIMEOUT_BACKOFF_FACTOR)
+
+        if estimate is None:
+            # no latency is known yet, so the next sample starts from scratch
+            self._estimates[object_id] = LatencyEstimate(
+                smoothed_latency=0, latency_variance=0, timeout=timeout
+            )
+        else:
+            estimate.timeout = timeout
+
+    def _clamp(self, timeout: float) -> float:
+        return min(max(timeout, self._min_timeout), self._max_timeout)
@@ -0,0 +1,50 @@
+"""Test the estimation of read timeouts."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.rct_power.lib.read_timeouts import ReadTimeoutEstimator
+
+
+@pytest.fixture(name="estimator")
+def estimator_fixture() -> ReadTimeoutEstimator:
+    return ReadTimeoutEstimator(initial_timeout=2, min_timeout=0.1, max_timeout=5)
+
+
+def test_uses_initial_timeout_without_samples(
+    estimator: ReadTimeoutEstimator,
+) -> None:
+    """Test that objects that were never read use the initial timeout."""
+    assert estimator.get_timeout(1) == 2
+    assert estimator.timeouts == {}
+
+
+def test_adapts_timeout_to_observed_latency(estimator: ReadTimeoutEstimator) -> None:
+    """Test that the timeouts of fast objects shrink towards their latency."""
+    for _ in range(20):
+        estimator.add_sample(1, 0.02)
+        estimator.add_sample(2, 0.2)
+
+    assert estimator.get_timeout(1) == pytest.approx(0.1)
+    assert 0.2 < estimator.get_timeout(2) < 0.5
+    assert estimator.timeouts == {
+        1: estimator.get_timeout(1),
+        2: estimator.get_timeout(2),
+    }
+
+
+def test_backs_off_after_timeouts(estimator: ReadTimeoutEstimator) -> None:
+    """Test that timeouts double up to the maximum until a response arrives."""
+    estimator.add_sample(1, 0.2)
+    timeout = estimator.get_timeout(1)
+
+    estimator.add_timeout(1)
+    assert estimator.get_timeout(1) == pytest.approx(timeout * 2)
+
+    for _ in range(5):
+        estimator.add_timeout(1)
+    assert estimator.get_timeout(1) == 5
+
+    estimator.add_sample(1, 0.2)
+    assert estimator.get_timeout(1) < 5
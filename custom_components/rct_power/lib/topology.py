@@ -0,0 +1,84 @@
+"""Discovery of the hardware connected to the inverter."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from ..const import LOGGER
+from .api import RctPowerApiClient, RctPowerData, get_valid_response_value_or
+from .object_index import OBJECT_INDEX
+
+MAX_BATTERY_MODULES = 6
+MAX_SOLAR_GENERATORS = 2
+MAX_PHASES = 3
+
+BATTERY_MODULE_SN_OIDS = [
+    OBJECT_INDEX.get_object_id(f"battery.module_sn[{index}]")
+    for index in range(MAX_BATTERY_MODULES)
+]
+SOLAR_GENERATOR_ENABLED_OIDS = [
+    OBJECT_INDEX.get_object_id(f"dc_conv.dc_conv_struct[{index}].enabled")
+    for index in range(MAX_SOLAR_GENERATORS)
+]
+PHASE_3_MODE_OID = OBJECT_INDEX.get_object_id("phase_3_mode")
+TOPOLOGY_OIDS = [
+    *BATTERY_MODULE_SN_OIDS,
+    *SOLAR_GENERATOR_ENABLED_OIDS,
+    PHASE_3_MODE_OID,
+]
+
+
+@dataclass(frozen=True)
+class HardwareTopology:
+    """The hardware connected to the inverter, everything by default."""
+
+    battery_modules: frozenset[int] = frozenset(range(MAX_BATTERY_MODULES))
+    solar_generators: frozenset[int] = frozenset(range(MAX_SOLAR_GENERATORS))
+    phases: int = MAX_PHASES
+
+
+async def async_discover_hardware_topology(
+    client: RctPowerApiClient,
+) -> HardwareTopology:
+    data = await client.async_get_data(TOPOLOGY_OIDS)
+    topology = get_hardware_topology(data)
+
+    LOGGER.debug("Discovered hardware topology: %s", topology)
+
+    return topology
+
+
+def get_hardware_topology(data: RctPowerData) -> HardwareTopology:
+    """Derive the hardware from the configuration objects.
+
+    Hardware is only considered missing if the inverter says so, objects that
+    couldn't be read don't rule anything out.
+    """
+    return HardwareTopology(
+        battery_modules=frozenset(
+            index
+            for index, object_id in enumerate(BATTERY_MODULE_SN_OIDS)
+            if get_valid_response_value_or(data.get(object_id), None) != ""
+        ),
+        solar_generators=frozenset(
+            index
+            for index, object_id in enumerate(SOLAR_GENERATOR_ENABLED_OIDS)
+            if get_valid_response_value_or(data.get(object_id), None) is not False
+        ),
+        phases=1
+        if get_valid_response_value_or(data.get(PHASE_3_MODE_OID), None) is False
+        else MAX_PHASES,
+    )
+
+
+def has_battery_module(index: int) -> Callable[[HardwareTopology], bool]:
+    return lambda topology: index in topology.battery_modules
+
+
+def has_solar_generator(index: int) -> Callable[[HardwareTopology], bool]:
+    return lambda topology: index in topology.solar_generators
+
+
+def has_phase(index: int) -> Callable[[HardwareTopology], bool]:
+    return lambda topology: index < topology.phases
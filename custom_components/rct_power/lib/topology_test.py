@@ -0,0 +1,59 @@
+"""Test the discovery of the connected hardware."""
+
+from __future__ import annotations
+
+from custom_components.rct_power.lib.api import RctPowerApiClient
+from custom_components.rct_power.lib.entities import all_entity_descriptions
+from custom_components.rct_power.lib.topology import (
+    HardwareTopology,
+    async_discover_hardware_topology,
+)
+from tests.simulator import RctPowerSimulator
+
+
+async def test_discovers_connected_hardware(rct_simulator: RctPowerSimulator) -> None:
+    """Test that missing modules, generators and phases are detected."""
+    for index in range(6):
+        rct_simulator.set_value_by_name(
+            f"battery.module_sn[{index}]", f"MODULE{index}" if index < 2 else ""
+        )
+    rct_simulator.set_value_by_name("dc_conv.dc_conv_struct[0].enabled", True)
+    rct_simulator.set_value_by_name("dc_conv.dc_conv_struct[1].enabled", False)
+    rct_simulator.set_value_by_name("phase_3_mode", False)
+    client = RctPowerApiClient("127.0.0.1", rct_simulator.port)
+
+    topology = await async_discover_hardware_topology(client)
+
+    assert topology == HardwareTopology(
+        battery_modules=frozenset({0, 1}), solar_generators=frozenset({0}), phases=1
+    )
+    assert {
+        entity_description.key
+        for entity_description in all_entity_descriptions
+        if not entity_description.is_installed(topology)
+    } >= {
+        "battery.module_sn[2]",
+        "dc_conv.dc_conv_struct[1].p_dc",
+        "energy.e_dc_total[1]",
+        "g_sync.p_ac[2]",
+        "g_sync.p_ac_load[1]",
+        "g_sync.p_ac_sc[2]",
+        "rb485.f_grid[1]",
+        "rb485.u_l_grid[2]",
+    }
+
+
+async def test_assumes_hardware_that_cannot_be_read(
+    rct_simulator: RctPowerSimulator,
+) -> None:
+    """Test that unanswered configuration objects don't rule out hardware."""
+    rct_simulator.objects.clear()
+    client = RctPowerApiClient(
+        "127.0.0.1",
+        rct_simulator.port,
+        min_read_timeout=0.05,
+        max_read_timeout=0.05,
+        retry_budget=0,
+    )
+
+    assert await async_discover_hardware_topology(client) == HardwareTopology()
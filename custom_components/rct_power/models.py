@@ -12,3 +12,14 @@ class RctConfEntryOptions(TypedDict, total=False):
     frequent_scan_interval: int
     infrequent_scan_interval: int
     static_scan_interval: int
+    persistent_connection: bool
+    read_window: int
+    push_updates: bool
+    passive_listening: bool
+    min_read_timeout: float
+    max_read_timeout: float
+    retry_budget: float
+    max_value_age: int
+    adaptive_polling: bool
+    learned_update_priorities: bool
+    derived_sensors: str
@@ -13,7 +13,11 @@ from .lib.entities import (
     bitfield_sensor_entity_descriptions,
     inverter_sensor_entity_descriptions,
 )
-from .lib.entity import RctPowerBitfieldSensorEntity, RctPowerSensorEntity
+from .lib.entity import (
+    RctPowerBitfieldSensorEntity,
+    RctPowerDerivedSensorEntity,
+    RctPowerSensorEntity,
+)
 
 
 async def async_setup_entry(
@@ -26,29 +30,41 @@ async def async_setup_entry(
 
     battery_sensor_entities = [
         RctPowerSensorEntity(
-            coordinators=list(data.update_coordinators.values()),
+            coordinators=[data.update_coordinator],
             config_entry=entry,
             entity_description=entity_description,
         )
         for entity_description in battery_sensor_entity_descriptions
+        if entity_description.is_installed(data.hardware_topology)
     ]
 
     inverter_sensor_entities = [
         RctPowerSensorEntity(
-            coordinators=list(data.update_coordinators.values()),
+            coordinators=[data.update_coordinator],
             config_entry=entry,
             entity_description=entity_description,
         )
         for entity_description in inverter_sensor_entity_descriptions
+        if entity_description.is_installed(data.hardware_topology)
     ]
 
     bitfield_sensor_entities = [
         RctPowerBitfieldSensorEntity(
-            coordinators=list(data.update_coordinators.values()),
+            coordinators=[data.update_coordinator],
             config_entry=entry,
             entity_description=entity_description,
         )
         for entity_description in bitfield_sensor_entity_descriptions
+        if entity_description.is_installed(data.hardware_topology)
+    ]
+
+    derived_sensor_entities = [
+        RctPowerDerivedSensorEntity(
+            coordinators=[data.update_coordinator],
+            config_entry=entry,
+            entity_description=entity_description,
+        )
+        for entity_description in data.derived_sensor_entity_descriptions
     ]
 
     async_add_entities(
@@ -56,5 +72,6 @@ async def async_setup_entry(
             *battery_sensor_entities,
             *inverter_sensor_entities,
             *bitfield_sensor_entities,
+            *derived_sensor_entities,
         ]
     )
@@ -0,0 +1,416 @@
+"""Benchmark poll cycles against a simulated inverter.
+
+Every scenario polls the objects of one update priority from a simulator
+running in a separate process, so the measured event loop time and memory
+allocations only include the work done by the integration. The results are
+written as JSON, which allows for comparing them between commits:
+
+    python -m tests.benchmark --output baseline.json
+    git checkout my-branch
+    python -m tests.benchmark --output current.json --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from itertools import product
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any
+
+from homeassistant.const import CONF_PORT
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.rct_power import object_ids_for_update_priority
+from custom_components.rct_power.const import (
+    CONF_ENTITY_PREFIX,
+    CONF_HOSTNAME,
+    DEFAULT_ENTITY_PREFIX,
+    DOMAIN,
+    EntityUpdatePriority,
+    ScanIntervalDefault,
+)
+from custom_components.rct_power.coordinator import RctPowerDataUpdateCoordinator
+from custom_components.rct_power.lib.api import (
+    InvalidApiResponse,
+    RctPowerApiClient,
+    RctPowerData,
+)
+from custom_components.rct_power.lib.entities import (
+    battery_sensor_entity_descriptions,
+    bitfield_sensor_entity_descriptions,
+    inverter_sensor_entity_descriptions,
+)
+from custom_components.rct_power.lib.entity import (
+    RctPowerBitfieldSensorEntity,
+    RctPowerSensorEntity,
+)
+from tests.simulator import RctPowerSimulator, SimulatorConfig
+
+BENCHMARKS = ("async_get_data", "read_object", "coordinator_cycle", "entity_states")
+
+
+@dataclass(frozen=True)
+class BenchmarkScenario:
+    update_priority: EntityUpdatePriority
+    # poll at most this many objects of the update priority
+    object_count: int | None
+    latency: float  # in seconds
+    error_rate: float
+    read_window: int
+
+    def describe(self) -> dict[str, Any]:
+        return {**asdict(self), "update_priority": self.update_priority.name}
+
+
+@dataclass
+class BenchmarkResult:
+    benchmark: str
+    scenario: BenchmarkScenario
+    wall_times: list[float] = field(default_factory=list)  # in seconds
+    loop_times: list[float] = field(default_factory=list)  # in seconds
+    peak_allocated_bytes: int = 0
+    invalid_responses: int = 0
+
+    @property
+    def key(self) -> str:
+        return json.dumps(
+            {"benchmark": self.benchmark, **self.scenario.describe()}, sort_keys=True
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "benchmark": self.benchmark,
+            **self.scenario.describe(),
+            "wall_time": summarize(self.wall_times),
+            "loop_time": summarize(self.loop_times),
+            "peak_allocated_bytes": self.peak_allocated_bytes,
+            "invalid_responses": self.invalid_responses,
+        }
+
+
+def summarize(samples: Sequence[float]) -> dict[str, float]:
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def _serve_simulator(config: SimulatorConfig, connection: Connection) -> None:
+    async def serve() -> None:
+        simulator = RctPowerSimulator(config=config)
+        await simulator.start()
+        connection.send(simulator.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+@contextmanager
+def simulator_process(config: SimulatorConfig) -> Iterator[int]:
+    """Run a simulator in a separate process and return its port."""
+    context = multiprocessing.get_context("spawn")
+    parent_connection, child_connection = context.Pipe()
+    process = context.Process(
+        target=_serve_simulator, args=(config, child_connection), daemon=True
+    )
+    process.start()
+
+    try:
+        yield parent_connection.recv()
+    finally:
+        process.terminate()
+        process.join()
+
+
+async def measure(
+    result: BenchmarkResult,
+    run: Callable[[], Awaitable[RctPowerData | None]],
+    repeat: int,
+) -> None:
+    """Run a benchmark several times and once more to count its allocations.
+
+    Tracing the allocations slows down the code considerably, which is why the
+    times are only measured in untraced runs.
+    """
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        loop_start = time.thread_time()
+        data = await run()
+        result.loop_times.append(time.thread_time() - loop_start)
+        result.wall_times.append(time.perf_counter() - wall_start)
+
+        if data is not None:
+            result.invalid_responses += sum(
+                isinstance(response, InvalidApiResponse) for response in data.values()
+            )
+
+    tracemalloc.start()
+    try:
+        await run()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result.peak_allocated_bytes = peak
+
+
+def create_entities(
+    hass: HomeAssistant,
+    entry: MockConfigEntry,
+    coordinators: list[RctPowerDataUpdateCoordinator],
+) -> list[RctPowerSensorEntity]:
+    entities = [
+        *(
+            RctPowerSensorEntity(coordinators, entry, entity_description)
+            for entity_description in (
+                *battery_sensor_entity_descriptions,
+                *inverter_sensor_entity_descriptions,
+            )
+        ),
+        *(
+            RctPowerBitfieldSensorEntity(coordinators, entry, entity_description)
+            for entity_description in bitfield_sensor_entity_descriptions
+        ),
+    ]
+
+    for index, entity in enumerate(entities):
+        entity.hass = hass
+        entity.entity_id = f"sensor.rct_power_benchmark_{index}"
+
+    return entities
+
+
+def compute_entity_states(entities: list[RctPowerSensorEntity]) -> None:
+    """Compute the states the same way writing them to Home Assistant does."""
+    for entity in entities:
+        if entity.available:
+            _state = entity.state
+            _attributes = entity.extra_state_attributes
+
+
+async def run_scenario(
+    hass: HomeAssistant, scenario: BenchmarkScenario, port: int, repeat: int
+) -> list[BenchmarkResult]:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_HOSTNAME: "127.0.0.1",
+            CONF_PORT: port,
+            CONF_ENTITY_PREFIX: DEFAULT_ENTITY_PREFIX,
+        },
+    )
+    client = RctPowerApiClient("127.0.0.1", port, read_window=scenario.read_window)
+    object_ids = {
+        update_priority: object_ids_for_update_priority(update_priority)[
+            : scenario.object_count
+        ]
+        for update_priority in EntityUpdatePriority
+    }
+    coordinator = RctPowerDataUpdateCoordinator(
+        hass,
+        entry,
+        client=client,
+        object_ids=object_ids,
+        update_intervals={
+            EntityUpdatePriority.FREQUENT: ScanIntervalDefault.FREQUENT,
+            EntityUpdatePriority.INFREQUENT: ScanIntervalDefault.INFREQUENT,
+            EntityUpdatePriority.STATIC: ScanIntervalDefault.STATIC,
+        },
+    )
+    # the entities read objects of all priorities, so all of them need data
+    await coordinator.async_refresh()
+
+    polled_object_ids = object_ids[scenario.update_priority]
+    entities = create_entities(hass, entry, [coordinator])
+    results = {
+        benchmark: BenchmarkResult(benchmark, scenario) for benchmark in BENCHMARKS
+    }
+
+    async def get_data() -> RctPowerData:
+        return await client.async_get_data(polled_object_ids)
+
+    async def read_objects() -> RctPowerData:
+        persistent_client = RctPowerApiClient(
+            "127.0.0.1", port, persistent_connection=True
+        )
+        try:
+            connection = await persistent_client._async_get_connection()
+            return {
+                object_id: await persistent_client._read_object(connection, object_id)
+                for object_id in polled_object_ids
+            }
+        finally:
+            persistent_client.close()
+
+    async def run_coordinator_cycle() -> RctPowerData:
+        coordinator.schedule_now(polled_object_ids)
+        await coordinator.async_refresh()
+        # objects that aren't updated frequently are read in the background
+        await hass.async_block_till_done(wait_background_tasks=True)
+        compute_entity_states(entities)
+        return {
+            object_id: coordinator.data[object_id] for object_id in polled_object_ids
+        }
+
+    async def compute_states() -> None:
+        compute_entity_states(entities)
+
+    try:
+        await measure(results["async_get_data"], get_data, repeat)
+        await measure(results["read_object"], read_objects, repeat)
+        await measure(results["coordinator_cycle"], run_coordinator_cycle, repeat)
+        await measure(results["entity_states"], compute_states, repeat)
+    finally:
+        client.close()
+        await coordinator.async_shutdown()
+
+    return list(results.values())
+
+
+async def run_benchmarks(
+    scenarios: list[BenchmarkScenario], repeat: int
+) -> list[BenchmarkResult]:
+    results: list[BenchmarkResult] = []
+
+    async with async_test_home_assistant() as hass:
+        for scenario in scenarios:
+            print(f"Running {scenario.describe()}")
+            config = SimulatorConfig(
+                latency=scenario.latency, drop_rate=scenario.error_rate, seed=0
+            )
+
+            with simulator_process(config) as port:
+                results += await run_scenario(hass, scenario, port, repeat)
+
+    return results
+
+
+def get_git_revision() -> str | None:
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=False, text=True
+        )
+    except OSError:
+        return None
+
+    return process.stdout.strip() if process.returncode == 0 else None
+
+
+def print_comparison(results: list[BenchmarkResult], baseline: dict[str, Any]) -> None:
+    baseline_results = {
+        json.dumps(
+            {
+                key: value
+                for key, value in baseline_result.items()
+                if key in ("benchmark", *BenchmarkScenario.__dataclass_fields__)
+            },
+            sort_keys=True,
+        ): baseline_result
+        for baseline_result in baseline["results"]
+    }
+
+    for result in results:
+        if (baseline_result := baseline_results.get(result.key)) is None:
+            continue
+
+        current = result.to_json()
+        changes = [
+            f"{metric} {current[metric]['median'] / baseline_result[metric]['median'] - 1:+.1%}"
+            for metric in ("wall_time", "loop_time")
+            if baseline_result[metric]["median"] > 0
+        ]
+        print(f"{result.key}: {', '.join(changes)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--update-priority",
+        action="append",
+        choices=[update_priority.name for update_priority in EntityUpdatePriority],
+        help="the update priorities whose objects are polled (default: all)",
+    )
+    parser.add_argument(
+        "--object-count",
+        action="append",
+        type=int,
+        help="poll at most this many objects of each priority (default: all)",
+    )
+    parser.add_argument(
+        "--latency", action="append", type=float, help="(default: 0 and 0.01)"
+    )
+    parser.add_argument(
+        "--error-rate",
+        action="append",
+        type=float,
+        help="the rate of lost responses (default: 0 and 0.02)",
+    )
+    parser.add_argument("--read-window", action="append", type=int, help="(default: 1)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"))
+    parser.add_argument("--compare", type=Path, help="a previous output file")
+    args = parser.parse_args()
+
+    scenarios = [
+        BenchmarkScenario(
+            update_priority=EntityUpdatePriority[update_priority],
+            object_count=object_count,
+            latency=latency,
+            error_rate=error_rate,
+            read_window=read_window,
+        )
+        for (
+            update_priority,
+            object_count,
+            latency,
+            error_rate,
+            read_window,
+        ) in product(
+            args.update_priority
+            or [update_priority.name for update_priority in EntityUpdatePriority],
+            args.object_count or [None],
+            args.latency or [0, 0.01],
+            args.error_rate or [0, 0.02],
+            args.read_window or [1],
+        )
+    ]
+
+    results = asyncio.run(run_benchmarks(scenarios, args.repeat))
+
+    args.output.write_text(
+        json.dumps(
+            {
+                "revision": get_git_revision(),
+                "created_at": datetime.now(UTC).isoformat(),
+                "python": platform.python_version(),
+                "repeat": args.repeat,
+                "results": [result.to_json() for result in results],
+            },
+            indent=2,
+        )
+    )
+
+    if args.compare is not None:
+        print_comparison(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
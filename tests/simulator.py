@@ -0,0 +1,323 @@
+"""Simulated RCT Power inverter for tests and benchmarks.
+
+The simulator speaks the RCT frame protocol over TCP and answers READ requests
+from a table of object values. Latency, packet loss, corrupted checksums and
+some firmware quirks can be configured to exercise the client under realistic
+conditions without access to a real inverter.
+
+Run it from the command line to point a development instance of Home
+Assistant at it:
+
+    python -m tests.simulator --port 8899 --latency 0.02 --drop-rate 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+from rctclient.frame import SendFrame
+from rctclient.registry import REGISTRY
+from rctclient.types import Command, DataType
+from rctclient.utils import encode_value
+
+from custom_components.rct_power.lib.frame_decoder import FrameDecoder
+
+LOGGER = logging.getLogger(__name__)
+# a frame starting with a command byte the protocol doesn't define
+INVALID_COMMAND_FRAME = b"+\x00"
+
+type SimulatedValue = bool | bytes | float | int | str
+
+ENCODABLE_DATA_TYPES = {
+    DataType.BOOL,
+    DataType.UINT8,
+    DataType.INT8,
+    DataType.UINT16,
+    DataType.INT16,
+    DataType.UINT32,
+    DataType.INT32,
+    DataType.ENUM,
+    DataType.FLOAT,
+    DataType.STRING,
+}
+
+
+def create_default_objects() -> dict[int, SimulatedValue]:
+    """Create a table of all registry objects with their simulation values."""
+    return {
+        object_info.object_id: object_info.sim_data
+        for object_info in REGISTRY.all()
+        if object_info.response_data_type in ENCODABLE_DATA_TYPES
+    }
+
+
+@dataclass
+class SimulatorConfig:
+    # the delay before each response is sent and the maximum random deviation
+    latency: float = 0.0  # in seconds
+    jitter: float = 0.0  # in seconds
+    # probabilities of the respective faults per response
+    drop_rate: float = 0.0
+    crc_error_rate: float = 0.0
+    wrong_id_rate: float = 0.0
+    # answer READ_PERIODICALLY requests by pushing the values in this interval
+    periodic_read_interval: float | None = None  # in seconds
+    # send every response to all connected clients, like an inverter with
+    # several clients appears to do
+    broadcast_responses: bool = False
+    # close the connection after this many requests have been received on it
+    close_after_requests: int | None = None
+    seed: int | None = None
+
+
+@dataclass
+class SimulatorStatistics:
+    connections: int = 0
+    requests: Counter[int] = field(default_factory=Counter)
+    responses: int = 0
+
+
+class RctPowerSimulator:
+    """An asyncio TCP server simulating an RCT Power inverter.
+
+    Objects that aren't in the object table are never answered, just like the
+    real firmware does for objects it doesn't implement. Rejected objects are
+    answered with an invalid command frame, which carries no object id.
+    """
+
+    def __init__(
+        self,
+        objects: Mapping[int, SimulatedValue] | None = None,
+        config: SimulatorConfig | None = None,
+    ) -> None:
+        self.objects: dict[int, SimulatedValue] = dict(
+            objects if objects is not None else create_default_objects()
+        )
+        self.config = config or SimulatorConfig()
+        self.rejected_object_ids: set[int] = set()
+        self.statistics = SimulatorStatistics()
+
+        self._random = random.Random(self.config.seed)
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._timers: set[asyncio.TimerHandle] = set()
+
+    @property
+    def port(self) -> int:
+        if self._server is None:
+            raise RuntimeError("The simulator is not running")
+
+        return self._server.sockets[0].getsockname()[1]
+
+    def set_value_by_name(self, object_name: str, value: SimulatedValue) -> None:
+        self.objects[REGISTRY.get_by_name(object_name).object_id] = value
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+
+    async def stop(self) -> None:
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+
+        for writer in self._writers:
+            writer.close()
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.add(task)
+
+        self.statistics.connections += 1
+        self._writers.add(writer)
+        decoder = FrameDecoder()
+        periodic_object_ids: set[int] = set()
+        push_task: asyncio.Task[None] | None = None
+        request_count = 0
+
+        try:
+            while data := await reader.read(4096):
+                for frame in decoder.feed(data):
+                    if frame.error is not None:
+                        LOGGER.debug("Discarding invalid frame: %s", frame.error)
+                        continue
+
+                    request_count += 1
+                    self.statistics.requests[frame.object_id] += 1
+
+                    if frame.command == Command.READ:
+                        self._schedule_response(writer, frame.object_id)
+                    elif (
+                        frame.command == Command.READ_PERIODICALLY
+                        and self.config.periodic_read_interval is not None
+                    ):
+                        periodic_object_ids.add(frame.object_id)
+                        if push_task is None:
+                            push_task = asyncio.create_task(
+                                self._push_periodically(writer, periodic_object_ids)
+                            )
+                            self._tasks.add(push_task)
+
+                    if (
+                        self.config.close_after_requests is not None
+                        and request_count >= self.config.close_after_requests
+                    ):
+                        writer.close()
+                        return
+        except ConnectionError:
+            pass
+        finally:
+            if push_task is not None:
+                push_task.cancel()
+            self._writers.discard(writer)
+            writer.close()
+            if task is not None:
+                self._tasks.discard(task)
+
+    async def _push_periodically(
+        self, writer: asyncio.StreamWriter, object_ids: set[int]
+    ) -> None:
+        assert self.config.periodic_read_interval is not None
+
+        while not writer.is_closing():
+            for object_id in list(object_ids):
+                if object_id in self.objects:
+                    self._send_response(writer, object_id)
+
+            await asyncio.sleep(self.config.periodic_read_interval)
+
+    def _schedule_response(self, writer: asyncio.StreamWriter, object_id: int) -> None:
+        if object_id not in self.objects and object_id not in self.rejected_object_ids:
+            return
+
+        if self._random.random() < self.config.drop_rate:
+            LOGGER.debug("Dropping response for object %x", object_id)
+            return
+
+        delay = max(
+            self.config.latency
+            + self._random.uniform(-self.config.jitter, self.config.jitter),
+            0,
+        )
+
+        if delay <= 0:
+            self._send_response(writer, object_id)
+            return
+
+        timer: asyncio.TimerHandle
+
+        def send_response() -> None:
+            self._timers.discard(timer)
+            self._send_response(writer, object_id)
+
+        timer = asyncio.get_running_loop().call_later(delay, send_response)
+        self._timers.add(timer)
+
+    def _send_response(self, writer: asyncio.StreamWriter, object_id: int) -> None:
+        if object_id in self.rejected_object_ids:
+            if not writer.is_closing():
+                writer.write(INVALID_COMMAND_FRAME)
+                self.statistics.responses += 1
+            return
+
+        if self._random.random() < self.config.wrong_id_rate:
+            object_id = self._random.choice(list(self.objects))
+
+        object_info = REGISTRY.get_by_id(object_id)
+        data = bytearray(
+            SendFrame(
+                command=Command.RESPONSE,
+                id=object_id,
+                payload=encode_value(
+                    object_info.response_data_type,  # type: ignore
+                    self.objects[object_id],  # type: ignore
+                ),
+            ).data
+        )
+
+        if self._random.random() < self.config.crc_error_rate:
+            # the last byte is always part of the checksum, but must not turn
+            # into a start or escape token to keep the framing intact
+            corrupted_byte = data[-1]
+            while corrupted_byte in (data[-1], ord("+"), ord("-")):
+                corrupted_byte = (corrupted_byte + 1) % 256
+            data[-1] = corrupted_byte
+
+        receivers = self._writers if self.config.broadcast_responses else {writer}
+
+        for receiver in receivers:
+            if not receiver.is_closing():
+                receiver.write(bytes(data))
+                self.statistics.responses += 1
+
+
+async def run_simulator(
+    host: str, port: int, config: SimulatorConfig
+) -> None:  # pragma: no cover
+    simulator = RctPowerSimulator(config=config)
+    await simulator.start(host, port)
+    LOGGER.info("Simulating an RCT Power inverter on %s:%d", host, simulator.port)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+def main() -> None:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--crc-error-rate", type=float, default=0.0)
+    parser.add_argument("--wrong-id-rate", type=float, default=0.0)
+    parser.add_argument("--periodic-read-interval", type=float, default=None)
+    parser.add_argument("--broadcast-responses", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        asyncio.run(
+            run_simulator(
+                args.host,
+                args.port,
+                SimulatorConfig(
+                    latency=args.latency,
+                    jitter=args.jitter,
+                    drop_rate=args.drop_rate,
+                    crc_error_rate=args.crc_error_rate,
+                    wrong_id_rate=args.wrong_id_rate,
+                    periodic_read_interval=args.periodic_read_interval,
+                    broadcast_responses=args.broadcast_responses,
+                    seed=args.seed,
+                ),
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()